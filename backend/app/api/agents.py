@@ -4,12 +4,13 @@ Agent management endpoints
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import and_, case, desc, func
 from typing import List, Optional
 from pydantic import BaseModel
 
 from app.database import get_db
 from app.models.agent import Agent, AgentStatus, AgentProvider
+from app.models.arena import ArenaParticipation
 from app.models.user import User, UserRole
 from app.api.auth import get_current_user
 
@@ -109,6 +110,96 @@ async def get_my_agents(
     return agents
 
 
+def _resource_usage_columns():
+    """Per-agent aggregates over completed executions"""
+    p = ArenaParticipation
+    # NULL when neither CPU figure was recorded, so AVG/SUM skip those rows
+    cpu = case(
+        (and_(p.cpu_user_seconds.is_(None), p.cpu_system_seconds.is_(None)), None),
+        else_=func.coalesce(p.cpu_user_seconds, 0) + func.coalesce(p.cpu_system_seconds, 0)
+    )
+    return [
+        func.count(p.id).label("executions"),
+        func.avg(p.execution_time_seconds).label("avg_execution_seconds"),
+        func.max(p.execution_time_seconds).label("max_execution_seconds"),
+        func.avg(cpu).label("avg_cpu_seconds"),
+        func.sum(cpu).label("total_cpu_seconds"),
+        func.avg(p.peak_rss_mb).label("avg_peak_rss_mb"),
+        func.max(p.peak_rss_mb).label("max_peak_rss_mb"),
+        func.avg(p.output_bytes).label("avg_output_bytes"),
+        func.avg(p.queue_wait_seconds).label("avg_queue_wait_seconds"),
+        func.avg(p.provider_latency_ms).label("avg_provider_latency_ms"),
+        func.sum(p.tokens_used).label("total_tokens"),
+        func.sum(p.cached_tokens).label("total_cached_tokens"),
+        func.sum(p.api_calls_made).label("total_api_calls")
+    ]
+
+
+def _resource_usage_dict(row) -> dict:
+    """Aggregate row as a dict, floats rounded to 4 places"""
+    return {
+        key: (round(value, 4) if isinstance(value, float) else value)
+        for key, value in row._mapping.items()
+    }
+
+
+# Sort keys for the resource usage ranking
+_RESOURCE_ORDER = {
+    "cpu": "avg_cpu_seconds",
+    "rss": "max_peak_rss_mb",
+    "time": "avg_execution_seconds",
+    "queue": "avg_queue_wait_seconds",
+    "output": "avg_output_bytes",
+    "tokens": "total_tokens"
+}
+
+
+@router.get("/resource-usage")
+async def list_agent_resource_usage(
+    order_by: str = Query("cpu", description="cpu, rss, time, queue, output or tokens"),
+    limit: int = Query(20, le=100),
+    db: Session = Depends(get_db)
+):
+    """Rank agents by resource usage across their completed executions (heaviest first)"""
+    if order_by not in _RESOURCE_ORDER:
+        raise HTTPException(status_code=400, detail=f"order_by must be one of: {', '.join(_RESOURCE_ORDER)}")
+    
+    columns = _resource_usage_columns()
+    sort_column = next(c for c in columns if c.name == _RESOURCE_ORDER[order_by])
+    rows = db.query(
+        Agent.id.label("agent_id"),
+        Agent.name.label("agent_name"),
+        *columns
+    ).join(
+        ArenaParticipation, ArenaParticipation.agent_id == Agent.id
+    ).filter(
+        Agent.is_public == True,
+        ArenaParticipation.completed_at.isnot(None)
+    ).group_by(
+        Agent.id, Agent.name
+    ).order_by(
+        desc(func.coalesce(sort_column, 0))
+    ).limit(limit).all()
+    
+    return [_resource_usage_dict(row) for row in rows]
+
+
+@router.get("/{agent_id}/resource-usage")
+async def get_agent_resource_usage(agent_id: int, db: Session = Depends(get_db)):
+    """Aggregate resource telemetry of one agent's completed executions"""
+    # Same visibility as the ranking: private agents are not exposed
+    agent = db.query(Agent).filter(Agent.id == agent_id, Agent.is_public == True).first()
+    if not agent:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    
+    row = db.query(*_resource_usage_columns()).filter(
+        ArenaParticipation.agent_id == agent_id,
+        ArenaParticipation.completed_at.isnot(None)
+    ).one()
+    
+    return {"agent_id": agent.id, "agent_name": agent.name, **_resource_usage_dict(row)}
+
+
 @router.get("/{agent_id}", response_model=AgentResponse)
 async def get_agent(agent_id: int, db: Session = Depends(get_db)):
     """Get agent by ID"""
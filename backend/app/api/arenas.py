@@ -3,9 +3,9 @@ Arena competition endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer
 from sqlalchemy import desc
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 import json
@@ -17,6 +17,8 @@ from app.models.agent import Agent, AgentStatus
 from app.models.user import User, UserRole
 from app.api.auth import get_current_user
 from app.services.arena_runner import ArenaRunner
+from app.services.arena_queue import ArenaJobQueue
+from app.services.blob_store import load_output, load_text
 from app.services.judge import JudgeService
 
 router = APIRouter()
@@ -27,6 +29,9 @@ class ArenaCreate(BaseModel):
     max_participants: int = 10
     min_participants: int = 2
     simulation_duration_seconds: int = 300
+    heat_size: Optional[int] = None  # Enables heats-and-finals mode for large arenas
+    advance_per_heat: int = 2
+    judge_mode: str = "realtime"  # "batch" trades latency (hours) for cheaper batch-API judging
 
 
 class ArenaResponse(BaseModel):
@@ -65,6 +70,15 @@ async def create_arena(
     if existing_arena:
         raise HTTPException(status_code=400, detail="Arena already exists for this bounty")
     
+    if arena_data.heat_size is not None and arena_data.heat_size < 2:
+        raise HTTPException(status_code=400, detail="heat_size must be at least 2")
+    
+    if arena_data.advance_per_heat < 1:
+        raise HTTPException(status_code=400, detail="advance_per_heat must be at least 1")
+    
+    if arena_data.judge_mode not in ("realtime", "batch"):
+        raise HTTPException(status_code=400, detail="judge_mode must be 'realtime' or 'batch'")
+    
     # Create arena
     arena = Arena(
         name=f"Arena: {bounty.title}",
@@ -73,6 +87,9 @@ async def create_arena(
         max_participants=arena_data.max_participants,
         min_participants=arena_data.min_participants,
         simulation_duration_seconds=arena_data.simulation_duration_seconds,
+        heat_size=arena_data.heat_size,
+        advance_per_heat=arena_data.advance_per_heat,
+        judge_mode=arena_data.judge_mode,
         status=ArenaStatus.REGISTRATION_OPEN
     )
     
@@ -164,18 +181,13 @@ async def start_arena(
     if participant_count < arena.min_participants:
         raise HTTPException(status_code=400, detail=f"Need at least {arena.min_participants} participants")
     
-    # Start arena
+    # Start arena and queue it for the background workers in one transaction
     arena.status = ArenaStatus.IN_PROGRESS
     arena.started_at = datetime.utcnow()
+    job = ArenaJobQueue().enqueue(db, arena_id, commit=False)
     db.commit()
     
-    # Run arena competition (async)
-    from app.services.arena_runner import ArenaRunner
-    arena_runner = ArenaRunner()
-    # This would typically be run in a background task
-    # For now, we'll return immediately and handle async execution separately
-    
-    return {"message": "Arena started", "arena_id": arena_id}
+    return {"message": "Arena started", "arena_id": arena_id, "job_id": job.id}
 
 
 @router.get("/{arena_id}", response_model=ArenaResponse)
@@ -200,6 +212,53 @@ async def get_arena(arena_id: int, db: Session = Depends(get_db)):
     }
 
 
+@router.get("/{arena_id}/bracket")
+async def get_arena_bracket(arena_id: int, db: Session = Depends(get_db)):
+    """Get the heats-and-finals bracket of a tournament arena"""
+    arena = db.query(Arena).filter(Arena.id == arena_id).first()
+    if not arena:
+        raise HTTPException(status_code=404, detail="Arena not found")
+    
+    if not arena.heat_size:
+        raise HTTPException(status_code=400, detail="Arena is not a tournament")
+    
+    return {
+        "arena_id": arena.id,
+        "status": arena.status.value,
+        "heat_size": arena.heat_size,
+        "advance_per_heat": arena.advance_per_heat,
+        "bracket": arena.bracket
+    }
+
+
+@router.get("/{arena_id}/participants/{participation_id}/output")
+async def get_participant_output(arena_id: int, participation_id: int, db: Session = Depends(get_db)):
+    """Get a participant's full output and logs, reading spilled blobs on demand"""
+    participation = db.query(ArenaParticipation).options(
+        undefer(ArenaParticipation.output_data),
+        undefer(ArenaParticipation.execution_log)
+    ).filter(
+        ArenaParticipation.id == participation_id,
+        ArenaParticipation.arena_id == arena_id
+    ).first()
+    if not participation:
+        raise HTTPException(status_code=404, detail="Participant not found")
+    
+    try:
+        output = load_output(participation.output_data, participation.output_blob)
+        logs = load_text(participation.execution_log, participation.execution_log_blob)
+    except FileNotFoundError:
+        raise HTTPException(status_code=410, detail="Stored output is no longer available")
+    
+    return {
+        "participation_id": participation.id,
+        "agent_id": participation.agent_id,
+        "output": output,
+        "execution_log": logs,
+        "error_log": participation.error_log
+    }
+
+
 @router.get("/", response_model=List[ArenaResponse])
 async def list_arenas(
     status: ArenaStatus = None,
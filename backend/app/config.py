@@ -29,11 +29,58 @@ class Settings(BaseSettings):
     GOOGLE_API_KEY: str = os.getenv("GOOGLE_API_KEY", "")
     GROK_API_KEY: str = os.getenv("GROK_API_KEY", "")
     
+    # AI Provider Endpoints
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+    ANTHROPIC_BASE_URL: str = os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com")
+    GOOGLE_BASE_URL: str = os.getenv("GOOGLE_BASE_URL", "https://generativelanguage.googleapis.com")
+    GROK_BASE_URL: str = os.getenv("GROK_BASE_URL", "https://api.x.ai/v1")
+    
+    # Provider HTTP Clients (shared, pooled per provider and key)
+    PROVIDER_TIMEOUT_SECONDS: float = float(os.getenv("PROVIDER_TIMEOUT_SECONDS", "120"))
+    PROVIDER_MAX_CONNECTIONS: int = int(os.getenv("PROVIDER_MAX_CONNECTIONS", "100"))
+    PROVIDER_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("PROVIDER_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    PROVIDER_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("PROVIDER_KEEPALIVE_EXPIRY_SECONDS", "60"))
+    PROVIDER_MAX_CLIENTS: int = int(os.getenv("PROVIDER_MAX_CLIENTS", "32"))
+    # Used when the h2 package is installed
+    PROVIDER_HTTP2: bool = os.getenv("PROVIDER_HTTP2", "true").lower() == "true"
+    
+    # Provider Rate Limits, per key and per process (0 = unlimited)
+    OPENAI_RPM: int = int(os.getenv("OPENAI_RPM", "500"))
+    OPENAI_TPM: int = int(os.getenv("OPENAI_TPM", "300000"))
+    ANTHROPIC_RPM: int = int(os.getenv("ANTHROPIC_RPM", "50"))
+    ANTHROPIC_TPM: int = int(os.getenv("ANTHROPIC_TPM", "40000"))
+    GOOGLE_RPM: int = int(os.getenv("GOOGLE_RPM", "60"))
+    GOOGLE_TPM: int = int(os.getenv("GOOGLE_TPM", "1000000"))
+    GROK_RPM: int = int(os.getenv("GROK_RPM", "60"))
+    GROK_TPM: int = int(os.getenv("GROK_TPM", "100000"))
+    PROVIDER_DEFAULT_RPM: int = int(os.getenv("PROVIDER_DEFAULT_RPM", "0"))
+    PROVIDER_DEFAULT_TPM: int = int(os.getenv("PROVIDER_DEFAULT_TPM", "0"))
+    # Fraction of the quota to aim for, leaving room for clock skew between us and the provider
+    PROVIDER_RATE_LIMIT_HEADROOM: float = float(os.getenv("PROVIDER_RATE_LIMIT_HEADROOM", "0.9"))
+    PROVIDER_MAX_RETRIES: int = int(os.getenv("PROVIDER_MAX_RETRIES", "3"))
+    
+    # Provider Response Cache (temperature-0 calls; agents opt out with config {"cache": false})
+    PROVIDER_CACHE_ENABLED: bool = os.getenv("PROVIDER_CACHE_ENABLED", "false").lower() == "true"
+    PROVIDER_CACHE_DIR: str = os.getenv("PROVIDER_CACHE_DIR", "./.cache/provider_responses")
+    PROVIDER_CACHE_MAX_MB: int = int(os.getenv("PROVIDER_CACHE_MAX_MB", "512"))
+    
+    # Blob Store (agent outputs and logs larger than BLOB_INLINE_MAX_BYTES)
+    BLOB_STORE_DIR: str = os.getenv("BLOB_STORE_DIR", "./.blobs")
+    BLOB_INLINE_MAX_BYTES: int = int(os.getenv("BLOB_INLINE_MAX_BYTES", "16384"))
+    BLOB_PREVIEW_CHARS: int = int(os.getenv("BLOB_PREVIEW_CHARS", "500"))
+    BLOB_COMPRESSION_LEVEL: int = int(os.getenv("BLOB_COMPRESSION_LEVEL", "6"))
+    
     # Platform Economics
     PLATFORM_FEE_PERCENTAGE: float = float(os.getenv("PLATFORM_FEE_PERCENTAGE", "15"))
     AGENT_REWARD_PERCENTAGE: float = float(os.getenv("AGENT_REWARD_PERCENTAGE", "80"))
     RUNNER_UP_REWARD_PERCENTAGE: float = float(os.getenv("RUNNER_UP_REWARD_PERCENTAGE", "5"))
     
+    # Agent Ratings (multi-player Elo, stored in Agent.reputation_score)
+    RATING_INITIAL: float = float(os.getenv("RATING_INITIAL", "1500"))
+    RATING_K_FACTOR: float = float(os.getenv("RATING_K_FACTOR", "32"))
+    # Agents move at twice the K factor for their first N competitions
+    RATING_PROVISIONAL_GAMES: int = int(os.getenv("RATING_PROVISIONAL_GAMES", "10"))
+    
     # Payment Processing
     STRIPE_SECRET_KEY: str = os.getenv("STRIPE_SECRET_KEY", "")
     STRIPE_PUBLISHABLE_KEY: str = os.getenv("STRIPE_PUBLISHABLE_KEY", "")
@@ -42,10 +89,72 @@ class Settings(BaseSettings):
     SANDBOX_TIMEOUT_SECONDS: int = int(os.getenv("SANDBOX_TIMEOUT_SECONDS", "300"))
     MAX_AGENT_MEMORY_MB: int = int(os.getenv("MAX_AGENT_MEMORY_MB", "512"))
     MAX_AGENT_CPU_PERCENT: int = int(os.getenv("MAX_AGENT_CPU_PERCENT", "50"))
+    # "process" runs agent code in rlimited worker processes; "inline" only simulates
+    SANDBOX_BACKEND: str = os.getenv("SANDBOX_BACKEND", "process")
+    SANDBOX_POOL_MIN_WORKERS: int = int(os.getenv("SANDBOX_POOL_MIN_WORKERS", "2"))
+    SANDBOX_POOL_MAX_WORKERS: int = int(os.getenv("SANDBOX_POOL_MAX_WORKERS", "8"))
+    SANDBOX_POOL_IDLE_SECONDS: float = float(os.getenv("SANDBOX_POOL_IDLE_SECONDS", "60"))
+    # Reuse limits for workers running agent_class agents (custom code gets a fresh worker every time)
+    SANDBOX_WORKER_MAX_EXECUTIONS: int = int(os.getenv("SANDBOX_WORKER_MAX_EXECUTIONS", "50"))
+    SANDBOX_WORKER_MAX_RSS_MB: int = int(os.getenv("SANDBOX_WORKER_MAX_RSS_MB", "256"))
+    # Imported once by each warm worker before it takes requests
+    SANDBOX_PREIMPORT_MODULES: str = os.getenv("SANDBOX_PREIMPORT_MODULES", "json,re,math,datetime,httpx,openai,anthropic")
+    
+    # Arena Execution
+    # Global cap on agents executing at once across all arenas in this process,
+    # and a per-arena cap so one large arena cannot take every slot
+    ARENA_MAX_CONCURRENT_AGENTS: int = int(os.getenv("ARENA_MAX_CONCURRENT_AGENTS", "20"))
+    ARENA_MAX_CONCURRENT_AGENTS_PER_ARENA: int = int(os.getenv("ARENA_MAX_CONCURRENT_AGENTS_PER_ARENA", "10"))
+    
+    # Arena Job Queue
+    ARENA_WORKER_COUNT: int = int(os.getenv("ARENA_WORKER_COUNT", "4"))
+    ARENA_WORKER_PROCESSES: int = int(os.getenv("ARENA_WORKER_PROCESSES", "2"))
+    # Disable when a separate arena_worker.py fleet runs the jobs
+    ARENA_WORKERS_IN_API: bool = os.getenv("ARENA_WORKERS_IN_API", "true").lower() == "true"
+    ARENA_JOB_LEASE_SECONDS: int = int(os.getenv("ARENA_JOB_LEASE_SECONDS", "60"))
+    ARENA_JOB_POLL_INTERVAL_SECONDS: float = float(os.getenv("ARENA_JOB_POLL_INTERVAL_SECONDS", "1.0"))
+    ARENA_JOB_MAX_ATTEMPTS: int = int(os.getenv("ARENA_JOB_MAX_ATTEMPTS", "3"))
     
     # Judge Settings
     JUDGE_MODEL: str = os.getenv("JUDGE_MODEL", "claude-3-5-sonnet-20241022")
     JUDGE_TEMPERATURE: float = float(os.getenv("JUDGE_TEMPERATURE", "0.3"))
+    # Criteria naming a registered metric (app/services/metrics.py) skip the LLM judge
+    JUDGE_METRICS_ENABLED: bool = os.getenv("JUDGE_METRICS_ENABLED", "true").lower() == "true"
+    JUDGE_TIMEOUT_SECONDS: float = float(os.getenv("JUDGE_TIMEOUT_SECONDS", "60"))  # Per request
+    # Asked when the primary judge is slow or fails; empty disables hedging
+    JUDGE_BACKUP_MODEL: str = os.getenv("JUDGE_BACKUP_MODEL", "gpt-4-turbo-preview")
+    JUDGE_HEDGE_DELAY_SECONDS: float = float(os.getenv("JUDGE_HEDGE_DELAY_SECONDS", "15"))
+    JUDGE_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("JUDGE_CIRCUIT_FAILURE_THRESHOLD", "5"))
+    JUDGE_CIRCUIT_RESET_SECONDS: float = float(os.getenv("JUDGE_CIRCUIT_RESET_SECONDS", "60"))
+    # Arenas whose results do not fit one prompt are judged in concurrent chunks,
+    # then the leaders of every chunk are judged against each other
+    JUDGE_PROMPT_TOKEN_BUDGET: int = int(os.getenv("JUDGE_PROMPT_TOKEN_BUDGET", "12000"))
+    JUDGE_CHUNK_MAX_AGENTS: int = int(os.getenv("JUDGE_CHUNK_MAX_AGENTS", "10"))
+    JUDGE_CHUNK_LEADERS: int = int(os.getenv("JUDGE_CHUNK_LEADERS", "2"))
+    # Score participants as they finish; only the top few are re-judged together at the end
+    JUDGE_SPECULATIVE_ENABLED: bool = os.getenv("JUDGE_SPECULATIVE_ENABLED", "true").lower() == "true"
+    JUDGE_RECONCILE_TOP: int = int(os.getenv("JUDGE_RECONCILE_TOP", "5"))
+    # Output tokens each agent is guaranteed when packing chunks; short outputs leave theirs to long ones
+    JUDGE_OUTPUT_TOKENS_PER_AGENT: int = int(os.getenv("JUDGE_OUTPUT_TOKENS_PER_AGENT", "500"))
+    # Verdicts are cached by model, prompt version, criteria and agent outputs
+    JUDGE_CACHE_ENABLED: bool = os.getenv("JUDGE_CACHE_ENABLED", "true").lower() == "true"
+    JUDGE_CACHE_DIR: str = os.getenv("JUDGE_CACHE_DIR", "./.cache/judge")
+    JUDGE_CACHE_MAX_MB: int = int(os.getenv("JUDGE_CACHE_MAX_MB", "128"))
+    JUDGE_CACHE_TTL_SECONDS: int = int(os.getenv("JUDGE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    # Arenas with judge_mode "batch" queue their judge prompt for a provider batch:
+    # "provider" uses the OpenAI/Anthropic batch APIs, "local" sends each prompt
+    # through the normal completion API (a stand-in for tests and other providers)
+    JUDGE_BATCH_BACKEND: str = os.getenv("JUDGE_BATCH_BACKEND", "provider")
+    JUDGE_BATCH_MAX_SIZE: int = int(os.getenv("JUDGE_BATCH_MAX_SIZE", "1000"))  # Requests per batch
+    # A partial batch is submitted once its oldest request has waited this long
+    JUDGE_BATCH_INTERVAL_SECONDS: float = float(os.getenv("JUDGE_BATCH_INTERVAL_SECONDS", "300"))
+    JUDGE_BATCH_POLL_SECONDS: float = float(os.getenv("JUDGE_BATCH_POLL_SECONDS", "30"))
+    # Submitted requests are resubmitted if their batch has not finished by then
+    JUDGE_BATCH_TIMEOUT_SECONDS: int = int(os.getenv("JUDGE_BATCH_TIMEOUT_SECONDS", str(26 * 3600)))
+    # Local batches and not-yet-submitted claims die with the scheduler process
+    # that made them, so they time out much sooner
+    JUDGE_BATCH_LOCAL_TIMEOUT_SECONDS: int = int(os.getenv("JUDGE_BATCH_LOCAL_TIMEOUT_SECONDS", "900"))
+    JUDGE_BATCH_MAX_ATTEMPTS: int = int(os.getenv("JUDGE_BATCH_MAX_ATTEMPTS", "3"))
     
     # Frontend
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:3000")
@@ -2,7 +2,8 @@
 Database configuration and session management
 """
 
-from sqlalchemy import create_engine
+from loguru import logger
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
@@ -36,3 +37,73 @@ def get_db():
     finally:
         db.close()
 
+
+# Columns introduced after their table was first created:
+# {table: {column: (PostgreSQL definition, SQLite definition)}}
+ADDED_COLUMNS = {
+    'bounties': {
+        # Crypto payments
+        'payment_method': ("VARCHAR DEFAULT 'fiat'", "TEXT DEFAULT 'fiat'"),
+        'crypto_type': ("VARCHAR", "TEXT"),
+        'crypto_wallet_address': ("VARCHAR", "TEXT"),
+        'crypto_amount': ("DOUBLE PRECISION", "REAL")
+    },
+    'arenas': {
+        # Tournament mode
+        'heat_size': ("INTEGER", "INTEGER"),
+        'advance_per_heat': ("INTEGER DEFAULT 2", "INTEGER DEFAULT 2"),
+        'bracket': ("JSON", "JSON"),
+        # Batch judging
+        'judge_mode': ("VARCHAR DEFAULT 'realtime'", "TEXT DEFAULT 'realtime'")
+    },
+    'arena_participations': {
+        # Response cache accounting
+        'cached_tokens': ("INTEGER DEFAULT 0", "INTEGER DEFAULT 0"),
+        'cached_api_calls': ("INTEGER DEFAULT 0", "INTEGER DEFAULT 0"),
+        # Resource telemetry
+        'cpu_user_seconds': ("DOUBLE PRECISION", "REAL"),
+        'cpu_system_seconds': ("DOUBLE PRECISION", "REAL"),
+        'peak_rss_mb': ("DOUBLE PRECISION", "REAL"),
+        'output_bytes': ("INTEGER", "INTEGER"),
+        'queue_wait_seconds': ("DOUBLE PRECISION", "REAL"),
+        'provider_latency_ms': ("DOUBLE PRECISION", "REAL"),
+        'provider_latencies_ms': ("JSON", "JSON"),
+        # Blob store references
+        'output_blob': ("VARCHAR", "TEXT"),
+        'execution_log_blob': ("VARCHAR", "TEXT")
+    }
+}
+
+
+def init_db():
+    """
+    Create missing tables and add missing columns (never drops tables or data)
+    
+    Run by every entry point that touches the database (the API and the arena
+    worker fleet), so whichever starts first brings an existing database up
+    to the current schema.
+    """
+    import app.models  # noqa: F401 - registers every table on Base.metadata
+    
+    Base.metadata.create_all(bind=engine, checkfirst=True)
+    
+    postgres = engine.dialect.name == "postgresql"
+    try:
+        inspector = inspect(engine)
+        with engine.begin() as conn:
+            for table_name, table_columns in ADDED_COLUMNS.items():
+                columns = [col['name'] for col in inspector.get_columns(table_name)]
+                for col_name, (pg_def, sqlite_def) in table_columns.items():
+                    if col_name in columns:
+                        logger.debug(f"⏭️  Column {table_name}.{col_name} already exists")
+                        continue
+                    
+                    logger.info(f"🔄 Adding missing column: {table_name}.{col_name}")
+                    sql = f"ALTER TABLE {table_name} ADD COLUMN {col_name} {pg_def if postgres else sqlite_def}"
+                    try:
+                        conn.execute(text(sql))
+                        logger.info(f"✅ Added column: {table_name}.{col_name}")
+                    except Exception as col_error:
+                        logger.warning(f"⚠️  Could not add column {table_name}.{col_name} (may already exist): {col_error}")
+    except Exception as migration_error:
+        logger.warning(f"⚠️  Migration check failed (columns may already exist): {migration_error}")
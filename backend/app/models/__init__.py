@@ -3,10 +3,14 @@ from app.models.user import User, UserRole
 from app.models.bounty import Bounty, BountyStatus, BountyType
 from app.models.agent import Agent, AgentStatus, AgentProvider
 from app.models.arena import Arena, ArenaStatus, ArenaParticipation
+from app.models.arena_job import ArenaJob, ArenaJobStatus
+from app.models.judge_batch import JudgeBatchRequest, JudgeBatchStatus
 
 __all__ = [
     "User", "UserRole",
     "Bounty", "BountyStatus", "BountyType",
     "Agent", "AgentStatus", "AgentProvider",
-    "Arena", "ArenaStatus", "ArenaParticipation"
+    "Arena", "ArenaStatus", "ArenaParticipation",
+    "ArenaJob", "ArenaJobStatus",
+    "JudgeBatchRequest", "JudgeBatchStatus"
 ]
@@ -3,7 +3,7 @@ Arena model for competitions
 """
 
 from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Enum as SQLEnum, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 import enum
 from app.database import Base
@@ -39,6 +39,14 @@ class Arena(Base):
     min_participants = Column(Integer, default=2)
     simulation_duration_seconds = Column(Integer, default=300)  # 5 minutes default
     
+    # Tournament mode (heats and finals); None runs everyone in a single round
+    heat_size = Column(Integer, nullable=True)  # Max participants per heat
+    advance_per_heat = Column(Integer, default=2)  # Top-k of each heat that advance
+    bracket = Column(JSON, nullable=True)  # JSON: {"rounds": [{"heats": [...]}], "finals": {...}}
+    
+    # "realtime", or "batch" to judge through provider batch APIs (cheaper, done within hours)
+    judge_mode = Column(String, default="realtime")
+    
     # Participants
     participants = relationship("ArenaParticipation", back_populates="arena", cascade="all, delete-orphan")
     
@@ -85,14 +93,30 @@ class ArenaParticipation(Base):
     rank = Column(Integer, nullable=True)  # Final rank (1 = winner)
     
     # Execution data
-    execution_log = Column(Text, nullable=True)  # JSON: agent's actions during competition
-    output_data = Column(JSON, nullable=True)  # Agent's output/results
+    # Large outputs and logs are spilled to the blob store (app.services.blob_store);
+    # the row then keeps only a preview and the blob reference. Both columns are
+    # deferred so queries over participations do not drag them along.
+    execution_log = deferred(Column(Text, nullable=True))  # JSON: agent's actions during competition
+    output_data = deferred(Column(JSON, nullable=True))  # Agent's output/results
     error_log = Column(Text, nullable=True)  # Any errors encountered
+    output_blob = Column(String, nullable=True)  # "sha256:..." when output_data was spilled
+    execution_log_blob = Column(String, nullable=True)  # "sha256:..." when execution_log was spilled
     
     # Resources used
     execution_time_seconds = Column(Float, nullable=True)
     tokens_used = Column(Integer, nullable=True)
     api_calls_made = Column(Integer, nullable=True)
+    cached_tokens = Column(Integer, default=0)  # Part of tokens_used served from the response cache
+    cached_api_calls = Column(Integer, default=0)  # Part of api_calls_made served from the response cache
+    
+    # Resource telemetry (None where the sandbox could not measure it)
+    cpu_user_seconds = Column(Float, nullable=True)
+    cpu_system_seconds = Column(Float, nullable=True)
+    peak_rss_mb = Column(Float, nullable=True)
+    output_bytes = Column(Integer, nullable=True)
+    queue_wait_seconds = Column(Float, nullable=True)  # Waiting for an execution slot and a sandbox worker
+    provider_latency_ms = Column(Float, nullable=True)  # Total across provider calls
+    provider_latencies_ms = Column(JSON, nullable=True)  # Per call
     
     # Reward
     reward_amount = Column(Float, default=0.0)
@@ -0,0 +1,49 @@
+"""
+Arena job model for background arena execution
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import enum
+from app.database import Base
+
+
+class ArenaJobStatus(str, enum.Enum):
+    """Arena job status"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ArenaJob(Base):
+    """Queued request to run an arena, leased by one worker at a time"""
+    __tablename__ = "arena_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Relationships
+    arena_id = Column(Integer, ForeignKey("arenas.id"), nullable=False, index=True)
+    arena = relationship("Arena")
+    
+    # Status
+    status = Column(SQLEnum(ArenaJobStatus), default=ArenaJobStatus.QUEUED, index=True)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    
+    # Lease (set while a worker owns the job, renewed by heartbeats)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Errors
+    last_error = Column(Text, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<ArenaJob {self.id} for Arena {self.arena_id} ({self.status.value})>"
@@ -0,0 +1,56 @@
+"""
+Judge batch request model for batch-mode arena judging
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Enum as SQLEnum
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.sql import func
+import enum
+from app.database import Base
+
+
+class JudgeBatchStatus(str, enum.Enum):
+    """Judge batch request status"""
+    PENDING = "pending"  # Waiting to be submitted with the next batch
+    SUBMITTED = "submitted"  # Part of a batch the provider is working on
+    COMPLETED = "completed"  # Verdict received
+    FAILED = "failed"  # Gave up; the arena is judged in real time instead
+
+
+class JudgeBatchRequest(Base):
+    """One arena's judge prompt, waiting for or answered by a provider batch"""
+    __tablename__ = "judge_batch_requests"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Relationships
+    arena_id = Column(Integer, ForeignKey("arenas.id"), nullable=False, index=True)
+    arena = relationship("Arena")
+    
+    # Request (cache_key identifies the results that were judged)
+    cache_key = Column(String, nullable=False)
+    provider = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    prompt = deferred(Column(Text, nullable=False))
+    
+    # Status
+    status = Column(SQLEnum(JudgeBatchStatus), default=JudgeBatchStatus.PENDING, index=True)
+    batch_id = Column(String, nullable=True, index=True)  # Provider batch id once submitted
+    attempts = Column(Integer, default=0)
+    
+    # Results
+    verdict = Column(JSON, nullable=True)  # Judge's parsed JSON verdict
+    last_error = Column(Text, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    submitted_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    @property
+    def custom_id(self) -> str:
+        """Id of this request within its batch"""
+        return f"judge-{self.id}"
+    
+    def __repr__(self):
+        return f"<JudgeBatchRequest {self.id} for Arena {self.arena_id} ({self.status.value})>"
@@ -0,0 +1,363 @@
+"""
+Durable arena job queue
+Persists arena start requests and runs them on a pool of leasing workers
+"""
+
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.arena import Arena, ArenaStatus
+from app.models.arena_job import ArenaJob, ArenaJobStatus
+from app.services.arena_runner import ArenaRunner, LeaseLostError
+from app.services.sandbox import SandboxManager
+
+
+class ArenaJobQueue:
+    """Database-backed queue of arena jobs with expiring leases"""
+    
+    def __init__(self, lease_seconds: int = None, max_attempts: int = None):
+        self.lease_seconds = lease_seconds or settings.ARENA_JOB_LEASE_SECONDS
+        self.max_attempts = max_attempts or settings.ARENA_JOB_MAX_ATTEMPTS
+    
+    def enqueue(self, db: Session, arena_id: int, commit: bool = True) -> ArenaJob:
+        """
+        Queue an arena for execution
+        
+        Returns the existing job if the arena is already queued or running.
+        """
+        job = db.query(ArenaJob).filter(
+            ArenaJob.arena_id == arena_id,
+            ArenaJob.status.in_([ArenaJobStatus.QUEUED, ArenaJobStatus.RUNNING])
+        ).first()
+        if job:
+            return job
+        
+        job = ArenaJob(
+            arena_id=arena_id,
+            status=ArenaJobStatus.QUEUED,
+            attempts=0,
+            max_attempts=self.max_attempts
+        )
+        db.add(job)
+        if commit:
+            db.commit()
+        return job
+    
+    def lease(self, db: Session, worker_id: str) -> Optional[ArenaJob]:
+        """
+        Claim the oldest queued job for a worker
+        
+        On PostgreSQL the candidate row is locked with FOR UPDATE SKIP LOCKED, so
+        concurrent workers in any process or host each claim a different job
+        without waiting on each other. Elsewhere (SQLite) the claim is a
+        conditional UPDATE on the job's QUEUED status, so when two workers race
+        for the same row only one of them sees a matched row.
+        """
+        if db.bind.dialect.name == "postgresql":
+            return self._lease_skip_locked(db, worker_id)
+        
+        candidates = db.query(ArenaJob.id).filter(
+            ArenaJob.status == ArenaJobStatus.QUEUED
+        ).order_by(ArenaJob.id).limit(5).all()
+        
+        for (job_id,) in candidates:
+            claimed = db.execute(
+                update(ArenaJob)
+                .where(ArenaJob.id == job_id, ArenaJob.status == ArenaJobStatus.QUEUED)
+                .values(**self._lease_values(worker_id), attempts=ArenaJob.attempts + 1)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            if claimed:
+                return db.query(ArenaJob).filter(ArenaJob.id == job_id).first()
+        
+        return None
+    
+    def _lease_skip_locked(self, db: Session, worker_id: str) -> Optional[ArenaJob]:
+        """Claim a job with SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL)"""
+        job = db.query(ArenaJob).filter(
+            ArenaJob.status == ArenaJobStatus.QUEUED
+        ).order_by(ArenaJob.id).with_for_update(skip_locked=True).first()
+        if not job:
+            db.rollback()
+            return None
+        
+        for field, value in self._lease_values(worker_id).items():
+            setattr(job, field, value)
+        job.attempts = (job.attempts or 0) + 1
+        db.commit()
+        return job
+    
+    def _lease_values(self, worker_id: str) -> Dict[str, Any]:
+        """Column values for a freshly leased job"""
+        now = datetime.utcnow()
+        return {
+            "status": ArenaJobStatus.RUNNING,
+            "lease_owner": worker_id,
+            "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+            "heartbeat_at": now,
+            "started_at": now
+        }
+    
+    def heartbeat(self, db: Session, job_id: int, worker_id: str) -> bool:
+        """Extend a job's lease; returns False if the worker no longer owns it"""
+        renewed = self.renew(db, job_id, worker_id)
+        db.commit()
+        return renewed
+    
+    def renew(self, db: Session, job_id: int, worker_id: str) -> bool:
+        """
+        Extend a job's lease inside the caller's transaction
+        
+        Returns False if the worker no longer owns the job. Does not commit:
+        the renewed row stays locked until the caller commits, so a reaper or
+        another worker cannot take the job between this check and the commit.
+        """
+        now = datetime.utcnow()
+        renewed = db.execute(
+            update(ArenaJob)
+            .where(
+                ArenaJob.id == job_id,
+                ArenaJob.lease_owner == worker_id,
+                ArenaJob.status == ArenaJobStatus.RUNNING
+            )
+            .values(
+                heartbeat_at=now,
+                lease_expires_at=now + timedelta(seconds=self.lease_seconds)
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        return bool(renewed)
+    
+    def complete(self, db: Session, job_id: int, worker_id: str):
+        """Mark a leased job as completed"""
+        db.execute(
+            update(ArenaJob)
+            .where(ArenaJob.id == job_id, ArenaJob.lease_owner == worker_id)
+            .values(
+                status=ArenaJobStatus.COMPLETED,
+                completed_at=datetime.utcnow(),
+                lease_owner=None,
+                lease_expires_at=None
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    
+    def fail(self, db: Session, job_id: int, worker_id: str, error: str):
+        """Record a failed attempt, re-queueing the job until it runs out of attempts"""
+        job = db.query(ArenaJob).filter(
+            ArenaJob.id == job_id,
+            ArenaJob.lease_owner == worker_id
+        ).first()
+        if not job:
+            return
+        
+        job.last_error = error
+        job.lease_owner = None
+        job.lease_expires_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = ArenaJobStatus.FAILED
+            job.completed_at = datetime.utcnow()
+            # Out of retries: give up on the arena instead of resuming it again
+            db.execute(
+                update(Arena)
+                .where(Arena.id == job.arena_id, Arena.status != ArenaStatus.COMPLETED)
+                .values(status=ArenaStatus.CANCELLED)
+                .execution_options(synchronize_session=False)
+            )
+            logger.error(f"Arena job {job.id} failed permanently, arena {job.arena_id} cancelled: {error}")
+        else:
+            job.status = ArenaJobStatus.QUEUED
+            logger.warning(f"Arena job {job.id} failed (attempt {job.attempts}), re-queued: {error}")
+        db.commit()
+    
+    def requeue_expired(self, db: Session) -> int:
+        """
+        Recover RUNNING jobs whose lease expired (crashed or stalled worker)
+        
+        Jobs with attempts left go back to the queue; jobs that used their last
+        attempt fail and their arenas are cancelled, as in fail(), so an arena
+        that keeps killing its worker is not retried forever.
+        """
+        now = datetime.utcnow()
+        expired = (
+            ArenaJob.status == ArenaJobStatus.RUNNING,
+            ArenaJob.lease_expires_at < now
+        )
+        
+        exhausted = db.query(ArenaJob.id, ArenaJob.arena_id).filter(
+            *expired,
+            ArenaJob.attempts >= ArenaJob.max_attempts
+        ).all()
+        if exhausted:
+            db.execute(
+                update(ArenaJob)
+                .where(ArenaJob.id.in_([job_id for job_id, _ in exhausted]), *expired)
+                .values(
+                    status=ArenaJobStatus.FAILED,
+                    completed_at=now,
+                    lease_owner=None,
+                    lease_expires_at=None,
+                    last_error="Lease expired"
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.execute(
+                update(Arena)
+                .where(
+                    Arena.id.in_([arena_id for _, arena_id in exhausted]),
+                    Arena.status != ArenaStatus.COMPLETED
+                )
+                .values(status=ArenaStatus.CANCELLED)
+                .execution_options(synchronize_session=False)
+            )
+        
+        requeued = db.execute(
+            update(ArenaJob)
+            .where(*expired)
+            .values(
+                status=ArenaJobStatus.QUEUED,
+                lease_owner=None,
+                lease_expires_at=None,
+                last_error="Lease expired"
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if exhausted:
+            logger.error(
+                f"Arena job(s) {[job_id for job_id, _ in exhausted]} failed permanently "
+                f"after their last lease expired; arenas cancelled"
+            )
+        if requeued:
+            logger.warning(f"Re-queued {requeued} arena job(s) with expired leases")
+        return requeued
+
+
+class ArenaWorkerPool:
+    """Pool of async workers that lease arena jobs and run them"""
+    
+    def __init__(
+        self,
+        worker_count: int = None,
+        sandbox_manager: SandboxManager = None,
+        queue: ArenaJobQueue = None,
+        session_factory: Callable[[], Session] = SessionLocal
+    ):
+        self.worker_count = worker_count or settings.ARENA_WORKER_COUNT
+        self.queue = queue or ArenaJobQueue()
+        self.session_factory = session_factory
+        self.runner = ArenaRunner(sandbox_manager=sandbox_manager)
+        self.poll_interval = settings.ARENA_JOB_POLL_INTERVAL_SECONDS
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._running = False
+    
+    async def start(self):
+        """Start the worker tasks and the lease reaper"""
+        self._running = True
+        for index in range(self.worker_count):
+            worker_id = f"{self.worker_prefix}:{index}"
+            self._tasks.append(asyncio.create_task(self._worker_loop(worker_id)))
+        self._tasks.append(asyncio.create_task(self._reaper_loop()))
+        logger.info(f"Arena worker pool started with {self.worker_count} workers")
+    
+    async def stop(self):
+        """Stop all workers; jobs they held are re-queued once their leases expire"""
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Arena worker pool stopped")
+    
+    async def _reaper_loop(self):
+        """Periodically re-queue jobs whose worker stopped heartbeating"""
+        while self._running:
+            db = self.session_factory()
+            try:
+                self.queue.requeue_expired(db)
+            except Exception as e:
+                logger.error(f"Arena job reaper error: {e}")
+            finally:
+                db.close()
+            await asyncio.sleep(self.queue.lease_seconds / 2)
+    
+    async def _worker_loop(self, worker_id: str):
+        """Lease and run jobs until stopped"""
+        while self._running:
+            db = self.session_factory()
+            try:
+                job = self.queue.lease(db, worker_id)
+                if not job:
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                await self._run_job(db, job.id, job.arena_id, worker_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Arena worker {worker_id} error: {e}")
+                await asyncio.sleep(self.poll_interval)
+            finally:
+                db.close()
+    
+    async def _run_job(self, db: Session, job_id: int, arena_id: int, worker_id: str):
+        """Run one leased job while heartbeating its lease"""
+        logger.info(f"Worker {worker_id} running arena {arena_id} (job {job_id})")
+        # Checked in the arena's final transaction, so a worker that lost the
+        # lease cannot commit results over the worker that now owns the job
+        def fence(session: Session) -> bool:
+            return self.queue.renew(session, job_id, worker_id)
+        
+        run_task = asyncio.create_task(self.runner.run_arena(arena_id, db, fence=fence))
+        heartbeat_task = asyncio.create_task(self._heartbeat_loop(job_id, worker_id, run_task))
+        
+        try:
+            await run_task
+            self.queue.complete(db, job_id, worker_id)
+        except (asyncio.CancelledError, LeaseLostError):
+            if self._running:
+                # Lease lost to another worker; it now owns the job
+                logger.warning(f"Worker {worker_id} lost the lease on job {job_id}")
+            else:
+                raise
+        except Exception as e:
+            db.rollback()
+            self.queue.fail(db, job_id, worker_id, str(e))
+        finally:
+            heartbeat_task.cancel()
+    
+    async def _heartbeat_loop(self, job_id: int, worker_id: str, run_task: asyncio.Task):
+        """
+        Renew the job lease while it runs, cancelling the run if the lease is lost
+        
+        The run is cancelled on the first heartbeat that matches no row, and
+        also once heartbeats have been failing for as long as the lease lasts:
+        by then the reaper may have handed the job to another worker.
+        """
+        loop = asyncio.get_running_loop()
+        lease_deadline = loop.time() + self.queue.lease_seconds
+        while not run_task.done():
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            db = self.session_factory()
+            try:
+                if not self.queue.heartbeat(db, job_id, worker_id):
+                    run_task.cancel()
+                    return
+                lease_deadline = loop.time() + self.queue.lease_seconds
+            except Exception as e:
+                logger.error(f"Heartbeat failed for job {job_id}: {e}")
+                if loop.time() >= lease_deadline:
+                    run_task.cancel()
+                    return
+            finally:
+                db.close()
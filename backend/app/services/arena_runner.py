@@ -4,182 +4,634 @@ Orchestrates agent competitions and manages execution
 """
 
 import asyncio
-from typing import List, Dict, Any
+import json
+import time
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from loguru import logger
-from sqlalchemy.orm import Session
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session, joinedload, undefer
 
 from app.database import get_db
 from app.models.arena import Arena, ArenaStatus, ArenaParticipation
 from app.models.agent import Agent
-from app.models.bounty import Bounty
+from app.models.bounty import Bounty, BountyStatus
+from app.models.user import User
 from app.services.sandbox import SandboxManager
 from app.services.judge import JudgeService
+from app.services.ratings import RatingEngine
+from app.services.rate_limiter import current_arena
+from app.services.blob_store import spill_output, spill_text, load_output
+from app.config import settings
+
+
+# Shared by every runner in the process so concurrent arenas respect one global limit
+_global_semaphore: Optional[asyncio.Semaphore] = None
+
+
+class LeaseLostError(RuntimeError):
+    """Raised when a run's fence check fails before it commits the arena's results"""
+
+
+def _get_global_semaphore() -> asyncio.Semaphore:
+    """Get the process-wide agent execution semaphore"""
+    global _global_semaphore
+    if _global_semaphore is None:
+        _global_semaphore = asyncio.Semaphore(settings.ARENA_MAX_CONCURRENT_AGENTS)
+    return _global_semaphore
+
+
+async def _gather_or_cancel(coroutines: List[Any]) -> List[Any]:
+    """
+    Run coroutines concurrently and return their results in order
+    
+    Unlike asyncio.gather, a failure cancels the remaining tasks and waits
+    for them before the error propagates, so nothing keeps holding semaphore
+    slots or writing through the session once the run has been abandoned
+    (and a retry cannot overlap with leftovers of the failed attempt).
+    """
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
 
 
 class ArenaRunner:
     """Runs arena competitions"""
     
-    def __init__(self):
-        self.sandbox_manager = SandboxManager()
-        self.judge_service = JudgeService()
+    def __init__(self, sandbox_manager: SandboxManager = None):
+        # Share the application's sandbox manager when one is provided
+        self.sandbox_manager = sandbox_manager or SandboxManager()
+        self.judge_service = JudgeService(providers=self.sandbox_manager.providers)
+        self.ratings = RatingEngine()
     
-    async def run_arena(self, arena_id: int, db: Session):
+    async def run_arena(self, arena_id: int, db: Session, fence: Callable[[Session], bool] = None):
         """
-        Run a complete arena competition
+        Run a complete arena competition, or resume an interrupted one
+        
+        Each participant's result is checkpointed on its participation row as
+        soon as it finishes. If the arena is run again (e.g. by a worker that
+        picked up the job after a crash or redeploy), participants that already
+        have a result are not executed again, and an arena whose participants
+        are all done goes straight to judging. Errors leave the arena in its
+        current state so the job can be retried; the job queue cancels the
+        arena once it runs out of attempts.
+        
+        Single-round arenas with judge_mode "batch" stop in JUDGING once their
+        judge request is queued; JudgeBatchScheduler runs them again when the
+        batch has answered, and that run finalizes them.
+        
+        Everything the run needs is loaded up front in a fixed number of
+        eager-loaded queries and copied into plain dicts, and results are written
+        back with UPDATE statements, so database round-trips per arena do not
+        grow with the number of participants (beyond one write per finished agent).
         
         Args:
             arena_id: Arena ID to run
             db: Database session
+            fence: Called in the final transaction before it commits; if it
+                returns False the results are rolled back and LeaseLostError
+                is raised (the job queue uses it to check the lease is still held)
         """
         logger.info(f"Starting arena {arena_id}")
         
-        # Get arena
-        arena = db.query(Arena).filter(Arena.id == arena_id).first()
+        # Get arena and bounty
+        arena = db.query(Arena).options(joinedload(Arena.bounty)).filter(Arena.id == arena_id).first()
         if not arena:
             raise ValueError(f"Arena {arena_id} not found")
         
-        # Get bounty
-        bounty = db.query(Bounty).filter(Bounty.id == arena.bounty_id).first()
+        if arena.status in (ArenaStatus.COMPLETED, ArenaStatus.CANCELLED):
+            logger.info(f"Arena {arena_id} is already {arena.status.value}, skipping")
+            return
+        
+        bounty = arena.bounty
         if not bounty:
             raise ValueError(f"Bounty {arena.bounty_id} not found")
         
-        # Get participants
-        participations = db.query(ArenaParticipation).filter(
+        # Get participants with their agents, in a fixed order: judge indices,
+        # verdict cache keys and batch verdicts all map back to participants by position
+        # output_data is deferred on the model but needed to resume checkpoints
+        # (spilled outputs leave only a small stub in it)
+        participations = db.query(ArenaParticipation).options(
+            joinedload(ArenaParticipation.agent),
+            undefer(ArenaParticipation.output_data)
+        ).filter(
             ArenaParticipation.arena_id == arena_id
-        ).all()
+        ).order_by(ArenaParticipation.id).all()
         
         if len(participations) < arena.min_participants:
             raise ValueError(f"Not enough participants (need {arena.min_participants})")
         
-        # Update arena status
-        arena.status = ArenaStatus.IN_PROGRESS
-        arena.started_at = datetime.utcnow()
-        db.commit()
+        # Snapshot what the run needs; ORM instances expire on every commit below
+        arena_info = {
+            "id": arena.id,
+            "bounty_id": bounty.id,
+            "timeout_seconds": arena.simulation_duration_seconds,
+            "task_description": bounty.description,
+            "success_criteria": bounty.success_criteria,
+            "criteria": json.loads(bounty.success_criteria),
+            "budget": bounty.budget,
+            "agent_reward": bounty.agent_reward,
+            "heat_size": arena.heat_size,
+            "advance_per_heat": arena.advance_per_heat or 2,
+            "judge_mode": arena.judge_mode or "realtime"
+        }
+        entries = [
+            {
+                "participation_id": participation.id,
+                "agent_id": participation.agent_id,
+                "builder_id": participation.agent_builder_id,
+                "agent_config": {
+                    "provider": participation.agent.provider.value,
+                    "provider_model": participation.agent.provider_model,
+                    "config": participation.agent.config,
+                    "code": participation.agent.code
+                },
+                # Checkpointed result from an earlier, interrupted run
+                "result": self._stored_result(participation) if participation.completed_at else None
+            }
+            for participation in participations
+            if participation.agent
+        ]
+        
+        completed = [entry for entry in entries if entry["result"] is not None]
+        if completed:
+            logger.info(
+                f"Resuming arena {arena_id}: {len(completed)}/{len(entries)} participants already finished"
+            )
+        
+        # Update arena status (keeping the original start time when resuming)
+        if arena.status not in (ArenaStatus.IN_PROGRESS, ArenaStatus.JUDGING) or not arena.started_at:
+            self._update_arena(db, arena_id, status=ArenaStatus.IN_PROGRESS, started_at=datetime.utcnow())
+            db.commit()
         
         try:
-            # Execute all agents in parallel
-            agent_results = []
-            for participation in participations:
-                agent = db.query(Agent).filter(Agent.id == participation.agent_id).first()
-                if not agent:
-                    continue
-                
-                # Execute agent
-                result = await self.sandbox_manager.execute_agent(
-                    agent_config={
-                        "provider": agent.provider.value,
-                        "provider_model": agent.provider_model,
-                        "config": agent.config
-                    },
-                    task_description=bounty.description,
-                    timeout_seconds=arena.simulation_duration_seconds
+            # Execute all agents in parallel, bounded by the global and per-arena limits
+            arena_semaphore = asyncio.Semaphore(settings.ARENA_MAX_CONCURRENT_AGENTS_PER_ARENA)
+            criteria = arena_info["criteria"]
+            
+            heat_size = arena_info["heat_size"]
+            if heat_size and len(entries) > heat_size:
+                agent_results, judge_results = await self._run_tournament(
+                    entries, arena_info, criteria, db, arena_semaphore
                 )
+            elif arena_info["judge_mode"] == "batch":
+                agent_results = await self._run_participants(entries, arena_info, db, arena_semaphore)
                 
-                # Update participation
-                participation.started_at = datetime.utcnow()
-                participation.execution_log = str(result.get("logs", []))
-                participation.output_data = {"output": result.get("output")}
-                participation.execution_time_seconds = result.get("execution_time_seconds", 0)
-                participation.tokens_used = result.get("tokens_used", 0)
-                participation.api_calls_made = result.get("api_calls", 0)
-                participation.completed_at = datetime.utcnow()
+                self._update_arena(db, arena_id, status=ArenaStatus.JUDGING)
+                db.commit()
                 
-                agent_results.append({
-                    "participation_id": participation.id,
-                    "agent_id": agent.id,
-                    "result": result
-                })
-            
-            # Judge the competition
-            import json
-            criteria = json.loads(bounty.success_criteria)
-            judge_results = await self.judge_service.judge_arena(
-                bounty_criteria=criteria,
-                agent_results=[r["result"] for r in agent_results]
-            )
-            
-            # Update arena with results
-            arena.status = ArenaStatus.JUDGING
-            db.commit()
-            
-            # Assign scores and ranks
-            for score_data in judge_results.get("scores", []):
-                # Find corresponding participation
-                agent_idx = score_data["agent_id"] - 1
-                if agent_idx < len(agent_results):
-                    participation_id = agent_results[agent_idx]["participation_id"]
-                    participation = db.query(ArenaParticipation).filter(
-                        ArenaParticipation.id == participation_id
-                    ).first()
-                    if participation:
-                        participation.score = score_data["score"]
-                        participation.rank = score_data["rank"]
-            
-            # Determine winner
-            winner_id = judge_results.get("winner_id")
-            if winner_id and winner_id <= len(agent_results):
-                winner_agent_id = agent_results[winner_id - 1]["agent_id"]
-                arena.winner_id = winner_agent_id
+                judge_results = await self.judge_service.judge_batched(
+                    arena_id, criteria, [r["result"] for r in agent_results], db
+                )
+                if judge_results is None:
+                    # JudgeBatchScheduler re-queues the arena once the verdict is in;
+                    # the resumed run reuses the checkpoints and finalizes it
+                    logger.info(f"Arena {arena_id} is waiting for batch judging")
+                    return
+            else:
+                # Participants are judged as they finish, overlapping the stragglers
+                speculative = self.judge_service.speculative(criteria, len(entries))
+                try:
+                    agent_results = await self._run_participants(
+                        entries, arena_info, db, arena_semaphore, on_result=speculative.submit
+                    )
+                except BaseException:
+                    speculative.cancel()
+                    raise
                 
-                # Update bounty
-                bounty.winning_agent_id = winner_agent_id
-                bounty.status = BountyStatus.COMPLETED
-                bounty.completed_at = datetime.utcnow()
+                # Judge the competition
+                self._update_arena(db, arena_id, status=ArenaStatus.JUDGING)
+                db.commit()
                 
-                # Distribute rewards
-                await self._distribute_rewards(arena, bounty, db)
+                judge_results = await speculative.finish([r["result"] for r in agent_results])
             
-            # Finalize arena
-            arena.status = ArenaStatus.COMPLETED
-            arena.completed_at = datetime.utcnow()
-            arena.results = judge_results
-            arena.judge_feedback = judge_results.get("overall_feedback", "")
-            db.commit()
+            winner_id = self._finalize_arena(
+                db, arena_info, agent_results, judge_results,
+                bracket=judge_results.pop("bracket", None), fence=fence
+            )
             
             logger.info(f"Arena {arena_id} completed. Winner: {winner_id}")
-            
+        
         except Exception as e:
+            # Leave the arena IN_PROGRESS/JUDGING so a retry resumes from the checkpoints
             logger.error(f"Error running arena {arena_id}: {e}")
-            arena.status = ArenaStatus.CANCELLED
-            db.commit()
+            db.rollback()
             raise
     
-    async def _distribute_rewards(self, arena: Arena, bounty: Bounty, db: Session):
-        """Distribute rewards to winners"""
-        # Get winner participation
-        winner_participation = db.query(ArenaParticipation).filter(
-            ArenaParticipation.arena_id == arena.id,
-            ArenaParticipation.rank == 1
-        ).first()
-        
-        if winner_participation:
-            # Winner gets 80% of bounty
-            winner_participation.reward_amount = bounty.agent_reward
-            winner_participation.reward_paid = False  # Would be paid via payment system
+    async def _run_participants(
+        self,
+        entries: List[Dict[str, Any]],
+        arena_info: Dict[str, Any],
+        db: Session,
+        arena_semaphore: asyncio.Semaphore,
+        on_result: Callable[[int, Dict[str, Any]], None] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute participants concurrently, reusing checkpointed results
+        
+        on_result(index, result) is called as each participant finishes.
+        """
+        async def run(index: int, entry: Dict[str, Any]) -> Dict[str, Any]:
+            if entry["result"] is None:
+                done = await self._execute_participant(entry, arena_info, db, arena_semaphore)
+            else:
+                done = await self._checkpointed_result(entry)
+            if on_result:
+                on_result(index, done["result"])
+            return done
+        
+        # gather() keeps submission order, so judge indices still map to participations
+        return await _gather_or_cancel([run(index, entry) for index, entry in enumerate(entries)])
+    
+    async def _run_tournament(
+        self,
+        entries: List[Dict[str, Any]],
+        arena_info: Dict[str, Any],
+        criteria: Dict[str, Any],
+        db: Session,
+        arena_semaphore: asyncio.Semaphore
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Run a large arena as heats and finals
+        
+        Participants are split into heats of at most heat_size. Every heat
+        executes and is judged concurrently, and the top advance_per_heat of
+        each heat move on. Later rounds re-judge the advancing outputs in new
+        heats (agents are not executed again) until the field fits in a single
+        final. Latency therefore grows with the number of rounds rather than
+        the number of participants.
+        
+        Returns:
+            (agent_results, judge_results) in the same shape as a single-round
+            arena, with the bracket under judge_results["bracket"]
+        """
+        heat_size = max(2, arena_info["heat_size"])
+        advance = max(1, min(arena_info["advance_per_heat"], heat_size - 1))
+        
+        async def run_heat(heat_entries):
+            results = await self._run_participants(heat_entries, arena_info, db, arena_semaphore)
+            judged = await self.judge_service.judge_arena(
+                bounty_criteria=criteria,
+                agent_results=[r["result"] for r in results]
+            )
+            return results, judged
+        
+        async def judge_heat(heat_results):
+            judged = await self.judge_service.judge_arena(
+                bounty_criteria=criteria,
+                agent_results=[r["result"] for r in heat_results]
+            )
+            return heat_results, judged
+        
+        bracket = {"heat_size": heat_size, "advance_per_heat": advance, "rounds": []}
+        # Participation id -> (last round reached, score in that round)
+        standings: Dict[int, Tuple[int, float]] = {}
+        
+        # Round 1: heats execute and are judged in parallel
+        heats = await _gather_or_cancel([
+            run_heat(heat_entries) for heat_entries in self._split_heats(entries, heat_size)
+        ])
+        agent_results = [result for heat_results, _ in heats for result in heat_results]
+        
+        self._update_arena(db, arena_info["id"], status=ArenaStatus.JUDGING)
+        db.commit()
+        
+        round_number = 1
+        advancing = self._record_round(bracket, standings, round_number, heats, advance)
+        
+        # Later rounds only re-judge, until the field fits in one final
+        while len(advancing) > heat_size:
+            round_number += 1
+            heats = await _gather_or_cancel([
+                judge_heat(heat_results) for heat_results in self._split_heats(advancing, heat_size)
+            ])
+            advancing = self._record_round(bracket, standings, round_number, heats, advance)
+        
+        # Finals
+        _, finals = await judge_heat(advancing)
+        final_scores = {
+            advancing[score["agent_id"] - 1]["participation_id"]: score
+            for score in finals.get("scores", [])
+            if 0 < score.get("agent_id", 0) <= len(advancing)
+        }
+        bracket["finals"] = {
+            "participation_ids": [r["participation_id"] for r in advancing],
+            "scores": {str(pid): score["score"] for pid, score in final_scores.items()},
+            "feedback": finals.get("overall_feedback", ""),
+            "cached": finals.get("cached", False)
+        }
+        
+        # Finalists are ranked by the finals, everyone else by how far they
+        # got and then by their score in the round they were eliminated
+        def sort_key(result):
+            pid = result["participation_id"]
+            if pid in final_scores:
+                return (0, final_scores[pid].get("rank", len(advancing)), 0.0)
+            last_round, score = standings.get(pid, (0, 0.0))
+            return (1, -last_round, -score)
+        
+        index = {r["participation_id"]: i for i, r in enumerate(agent_results)}
+        feedback = {pid: score.get("feedback", "") for pid, score in final_scores.items()}
+        scores = []
+        for rank, result in enumerate(sorted(agent_results, key=sort_key), start=1):
+            pid = result["participation_id"]
+            score = final_scores[pid]["score"] if pid in final_scores else standings.get(pid, (0, 0.0))[1]
+            scores.append({
+                "agent_id": index[pid] + 1,
+                "score": score,
+                "rank": rank,
+                "feedback": feedback.get(pid, f"Eliminated in round {standings.get(pid, (0, 0.0))[0]}")
+            })
+        
+        judge_results = {
+            "scores": scores,
+            "winner_id": scores[0]["agent_id"] if scores else None,
+            "overall_feedback": finals.get("overall_feedback", ""),
+            "bracket": bracket,
+            # Cached only if no heat or final needed a fresh judge call
+            "cached": finals.get("cached", False) and all(
+                heat["cached"] for round_ in bracket["rounds"] for heat in round_["heats"]
+            )
+        }
+        return agent_results, judge_results
+    
+    def _split_heats(self, items: List[Any], heat_size: int) -> List[List[Any]]:
+        """Split items into the fewest heats of at most heat_size, balanced by striding"""
+        heat_count = -(-len(items) // heat_size)
+        return [items[i::heat_count] for i in range(heat_count)]
+    
+    def _record_round(
+        self,
+        bracket: Dict[str, Any],
+        standings: Dict[int, Tuple[int, float]],
+        round_number: int,
+        heats: List[Tuple[List[Dict[str, Any]], Dict[str, Any]]],
+        advance: int
+    ) -> List[Dict[str, Any]]:
+        """Record one round's heats in the bracket and return the advancing results"""
+        advancing = []
+        round_heats = []
+        for heat_number, (heat_results, judged) in enumerate(heats, start=1):
+            ranked = sorted(
+                (s for s in judged.get("scores", []) if 0 < s.get("agent_id", 0) <= len(heat_results)),
+                key=lambda s: (s.get("rank") or len(heat_results), -s.get("score", 0))
+            )
+            heat_scores = {}
+            for score in ranked:
+                pid = heat_results[score["agent_id"] - 1]["participation_id"]
+                standings[pid] = (round_number, score["score"])
+                heat_scores[str(pid)] = score["score"]
             
-            # Update agent stats
-            agent = db.query(Agent).filter(Agent.id == winner_participation.agent_id).first()
-            if agent:
-                agent.total_wins += 1
-                agent.total_earnings += bounty.agent_reward
+            # Every heat eliminates at least one participant so the field always shrinks
+            heat_advance = min(advance, max(1, len(heat_results) - 1))
+            winners = [heat_results[s["agent_id"] - 1] for s in ranked[:heat_advance]]
+            advancing.extend(winners)
+            round_heats.append({
+                "heat": heat_number,
+                "participation_ids": [r["participation_id"] for r in heat_results],
+                "scores": heat_scores,
+                "advancing": [r["participation_id"] for r in winners],
+                "cached": judged.get("cached", False)
+            })
+        
+        bracket["rounds"].append({"round": round_number, "heats": round_heats})
+        return advancing
+    
+    async def _execute_participant(
+        self,
+        entry: Dict[str, Any],
+        arena_info: Dict[str, Any],
+        db: Session,
+        arena_semaphore: asyncio.Semaphore
+    ) -> Dict[str, Any]:
+        """Execute one participant and persist its result as soon as it finishes"""
+        # Provider calls from this task queue fairly against other arenas
+        current_arena.set(arena_info["id"])
+        
+        # Take the per-arena slot first so queued agents never hold global slots
+        queued_at = time.monotonic()
+        async with arena_semaphore, _get_global_semaphore():
+            slot_wait = time.monotonic() - queued_at
+            started_at = datetime.utcnow()
+            result = await self.sandbox_manager.execute_agent(
+                agent_config=entry["agent_config"],
+                task_description=arena_info["task_description"],
+                timeout_seconds=arena_info["timeout_seconds"],
+                criteria=arena_info["criteria"]
+            )
+        # Time waiting for an execution slot plus time waiting for a sandbox worker
+        result["queue_wait_seconds"] = slot_wait + (result.get("queue_wait_seconds") or 0.0)
+        provider_latencies = result.get("provider_latencies_ms") or []
+        
+        # Large outputs and logs go to the blob store instead of the row
+        (output_data, output_blob), (execution_log, log_blob) = await asyncio.gather(
+            asyncio.to_thread(spill_output, result.get("output")),
+            asyncio.to_thread(spill_text, str(result.get("logs", [])))
+        )
+        
+        # Update participation
+        db.execute(
+            update(ArenaParticipation)
+            .where(ArenaParticipation.id == entry["participation_id"])
+            .values(
+                started_at=started_at,
+                execution_log=execution_log,
+                execution_log_blob=log_blob,
+                output_data=output_data,
+                output_blob=output_blob,
+                execution_time_seconds=result.get("execution_time_seconds", 0),
+                tokens_used=result.get("tokens_used", 0),
+                api_calls_made=result.get("api_calls", 0),
+                cached_tokens=result.get("cached_tokens", 0),
+                cached_api_calls=result.get("cached_api_calls", 0),
+                cpu_user_seconds=result.get("cpu_user_seconds"),
+                cpu_system_seconds=result.get("cpu_system_seconds"),
+                peak_rss_mb=result.get("peak_rss_mb"),
+                output_bytes=result.get("output_bytes"),
+                queue_wait_seconds=result["queue_wait_seconds"],
+                provider_latencies_ms=provider_latencies,
+                provider_latency_ms=sum(provider_latencies),
+                error_log=result.get("error"),
+                completed_at=datetime.utcnow()
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        
+        return {
+            "participation_id": entry["participation_id"],
+            "agent_id": entry["agent_id"],
+            "builder_id": entry["builder_id"],
+            "result": result
+        }
+    
+    async def _checkpointed_result(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Result of a participant that finished in an earlier run"""
+        return {
+            "participation_id": entry["participation_id"],
+            "agent_id": entry["agent_id"],
+            "builder_id": entry["builder_id"],
+            "result": entry["result"]
+        }
+    
+    def _stored_result(self, participation: ArenaParticipation) -> Dict[str, Any]:
+        """Rebuild a sandbox result from a checkpointed participation row"""
+        return {
+            "success": participation.error_log is None,
+            "output": load_output(participation.output_data, participation.output_blob),
+            "execution_time_seconds": participation.execution_time_seconds or 0,
+            "tokens_used": participation.tokens_used or 0,
+            "api_calls": participation.api_calls_made or 0,
+            "cached_tokens": participation.cached_tokens or 0,
+            "cached_api_calls": participation.cached_api_calls or 0,
+            "logs": [],
+            "error": participation.error_log
+        }
+    
+    def _finalize_arena(
+        self,
+        db: Session,
+        arena_info: Dict[str, Any],
+        agent_results: List[Dict[str, Any]],
+        judge_results: Dict[str, Any],
+        bracket: Optional[Dict[str, Any]] = None,
+        fence: Callable[[Session], bool] = None
+    ) -> Optional[int]:
+        """
+        Write scores, ranks, rewards, ratings and the winner in one transaction
+        
+        If fence(db) returns False the transaction is rolled back instead of
+        committed and LeaseLostError is raised.
+        
+        Returns:
+            The judge's winner index (1-based), if any
+        """
+        # Scores and ranks, keyed by participation
+        rows: Dict[int, Dict[str, Any]] = {}
+        for score_data in judge_results.get("scores", []):
+            # Rows without an integer rank (e.g. a cached malformed verdict) are
+            # left unranked rather than failing the whole arena
+            rank = score_data.get("rank")
+            if not isinstance(rank, int) or isinstance(rank, bool):
+                continue
+            # Find corresponding participation
+            agent_idx = score_data["agent_id"] - 1
+            if 0 <= agent_idx < len(agent_results):
+                participation_id = agent_results[agent_idx]["participation_id"]
+                rows[participation_id] = {
+                    "id": participation_id,
+                    "score": score_data["score"],
+                    "rank": rank
+                }
+        
+        # Determine winner
+        winner_id = judge_results.get("winner_id")
+        arena_values = {"bracket": bracket} if bracket else {}
+        if winner_id and winner_id <= len(agent_results):
+            winner = agent_results[winner_id - 1]
+            arena_values["winner_id"] = winner["agent_id"]
             
-            # Update builder stats
-            from app.models.user import User
-            builder = db.query(User).filter(User.id == winner_participation.agent_builder_id).first()
-            if builder:
-                builder.total_earnings += bounty.agent_reward
-                builder.balance += bounty.agent_reward
+            # Update bounty
+            db.execute(
+                update(Bounty)
+                .where(Bounty.id == arena_info["bounty_id"])
+                .values(
+                    winning_agent_id=winner["agent_id"],
+                    status=BountyStatus.COMPLETED,
+                    completed_at=datetime.utcnow()
+                )
+                .execution_options(synchronize_session=False)
+            )
+            
+            # Distribute rewards
+            self._distribute_rewards(db, arena_info, agent_results, rows)
         
-        # Runner-ups get micro-rewards (5% split)
-        runner_ups = db.query(ArenaParticipation).filter(
-            ArenaParticipation.arena_id == arena.id,
-            ArenaParticipation.rank.in_([2, 3])
-        ).all()
+        if rows:
+            db.execute(update(ArenaParticipation), list(rows.values()))
         
-        runner_up_reward = (bounty.budget * 0.05) / len(runner_ups) if runner_ups else 0
-        for participation in runner_ups:
-            participation.reward_amount = runner_up_reward
+        # Ratings and competition stats of every ranked agent, in one bulk update
+        agent_ids = {r["participation_id"]: r["agent_id"] for r in agent_results}
+        self.ratings.apply_arena(
+            db,
+            [(agent_ids[row["id"]], row["rank"], float(row["score"] or 0)) for row in rows.values()],
+            arena_values.get("winner_id")
+        )
         
+        # Finalize arena
+        self._update_arena(
+            db,
+            arena_info["id"],
+            status=ArenaStatus.COMPLETED,
+            completed_at=datetime.utcnow(),
+            results=judge_results,
+            judge_feedback=judge_results.get("overall_feedback", ""),
+            **arena_values
+        )
+        if fence and not fence(db):
+            db.rollback()
+            raise LeaseLostError(f"Arena {arena_info['id']} lost its lease before finalizing")
         db.commit()
-
+        return winner_id
+    
+    def _distribute_rewards(
+        self,
+        db: Session,
+        arena_info: Dict[str, Any],
+        agent_results: List[Dict[str, Any]],
+        rows: Dict[int, Dict[str, Any]]
+    ):
+        """
+        Distribute rewards to winners
+        
+        Reward amounts are added to the pending participation rows; agent and
+        builder totals are incremented in place with UPDATE statements.
+        """
+        by_participation = {r["participation_id"]: r for r in agent_results}
+        winners = [row for row in rows.values() if row["rank"] == 1]
+        runner_ups = [row for row in rows.values() if row["rank"] in (2, 3)]
+        
+        for row in winners[:1]:
+            # Winner gets 80% of bounty
+            reward = arena_info["agent_reward"]
+            row["reward_amount"] = reward
+            row["reward_paid"] = False  # Would be paid via payment system
+            
+            # Update agent and builder stats
+            entry = by_participation[row["id"]]
+            db.execute(
+                update(Agent)
+                .where(Agent.id == entry["agent_id"])
+                .values(total_earnings=func.coalesce(Agent.total_earnings, 0) + reward)
+                .execution_options(synchronize_session=False)
+            )
+            db.execute(
+                update(User)
+                .where(User.id == entry["builder_id"])
+                .values(
+                    total_earnings=func.coalesce(User.total_earnings, 0) + reward,
+                    balance=func.coalesce(User.balance, 0) + reward
+                )
+                .execution_options(synchronize_session=False)
+            )
+        
+        # Runner-ups get micro-rewards (5% split)
+        runner_up_reward = (
+            arena_info["budget"] * (settings.RUNNER_UP_REWARD_PERCENTAGE / 100) / len(runner_ups)
+            if runner_ups else 0
+        )
+        for row in runner_ups:
+            row["reward_amount"] = runner_up_reward
+    
+    def _update_arena(self, db: Session, arena_id: int, **values):
+        """Update arena columns without reloading the row"""
+        db.execute(
+            update(Arena)
+            .where(Arena.id == arena_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
@@ -0,0 +1,102 @@
+"""
+Blob store for large agent outputs and logs
+Content-addressed, compressed and deduplicated, kept out of the arena tables
+"""
+
+import hashlib
+import json
+import os
+import threading
+import zlib
+from typing import Any, Optional, Tuple
+from app.config import settings
+
+
+class BlobStore:
+    """
+    Local filesystem blob store
+    
+    Blobs are addressed by the SHA-256 of their uncompressed content
+    ("sha256:<hex>") and stored zlib-compressed under a two-level fan-out, so
+    identical outputs from many agents or re-runs are stored once. Writes go
+    to a temp file and are renamed into place, so readers never see a partial
+    blob.
+    """
+    
+    def __init__(self, directory: str = None):
+        self.directory = directory or settings.BLOB_STORE_DIR
+    
+    def put(self, data: bytes) -> str:
+        """Store data and return its reference"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(data, settings.BLOB_COMPRESSION_LEVEL))
+            os.replace(tmp_path, path)
+        return f"sha256:{digest}"
+    
+    def get(self, ref: str) -> bytes:
+        """Read a blob by reference"""
+        algorithm, _, digest = ref.partition(":")
+        if algorithm != "sha256" or not digest:
+            raise ValueError(f"Invalid blob reference: {ref}")
+        with open(self._path(digest), "rb") as f:
+            return zlib.decompress(f.read())
+    
+    def exists(self, ref: str) -> bool:
+        return os.path.exists(self._path(ref.partition(":")[2]))
+    
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest[2:4], f"{digest}.z")
+
+
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    """Process-wide blob store"""
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BlobStore()
+    return _blob_store
+
+
+def spill_output(output: Any, store: BlobStore = None) -> Tuple[dict, Optional[str]]:
+    """
+    Row value for a participation's output_data, spilling large outputs
+    
+    Returns:
+        (output_data, blob reference or None). A spilled output keeps only its
+        size and a short preview in the row.
+    """
+    data = json.dumps(output, default=str).encode()
+    if len(data) <= settings.BLOB_INLINE_MAX_BYTES:
+        return {"output": output}, None
+    ref = (store or get_blob_store()).put(data)
+    preview = output if isinstance(output, str) else data.decode(errors="replace")
+    return {"bytes": len(data), "preview": preview[:settings.BLOB_PREVIEW_CHARS]}, ref
+
+
+def spill_text(text: str, store: BlobStore = None) -> Tuple[Optional[str], Optional[str]]:
+    """Row value for a text column such as execution_log: (inline text, blob reference)"""
+    data = text.encode()
+    if len(data) <= settings.BLOB_INLINE_MAX_BYTES:
+        return text, None
+    return None, (store or get_blob_store()).put(data)
+
+
+def load_output(output_data: Optional[dict], ref: Optional[str], store: BlobStore = None) -> Any:
+    """Full output of a participation, reading the blob if it was spilled"""
+    if ref:
+        return json.loads((store or get_blob_store()).get(ref))
+    return (output_data or {}).get("output")
+
+
+def load_text(text: Optional[str], ref: Optional[str], store: BlobStore = None) -> Optional[str]:
+    """Full text of a spilled-or-inline text column"""
+    if ref:
+        return (store or get_blob_store()).get(ref).decode()
+    return text
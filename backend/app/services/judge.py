@@ -2,31 +2,80 @@
 AI Judge service for scoring agent performance
 """
 
+import asyncio
 import json
-from typing import Dict, List, Any
+import re
+import time
+from typing import Dict, List, Any, Optional, Tuple
 from loguru import logger
-import anthropic
-import openai
+from sqlalchemy.orm import Session
 from app.config import settings
+from app.models.judge_batch import JudgeBatchRequest, JudgeBatchStatus
+from app.services.judge_prompt import JudgePromptBuilder, prompt_budget
+from app.services.metrics import evaluate_metrics, is_objective
+from app.services.providers import ProviderGateway
+from app.services.response_cache import ResponseCache
+
+
+# Bump whenever the judge prompt changes, so verdicts given under the old
+# prompt are no longer served from the cache
+PROMPT_TEMPLATE_VERSION = 3
+
+
+class CircuitBreaker:
+    """
+    Stops sending judge calls to a provider that keeps failing
+    
+    After `threshold` consecutive failures the circuit opens for
+    `reset_seconds`. Once that passes, calls are let through again, and the
+    first failure reopens it immediately while a success closes it.
+    """
+    
+    def __init__(self, threshold: int = None, reset_seconds: float = None):
+        self.threshold = threshold or settings.JUDGE_CIRCUIT_FAILURE_THRESHOLD
+        self.reset_seconds = reset_seconds or settings.JUDGE_CIRCUIT_RESET_SECONDS
+        self.failures = 0
+        self.opened_until = 0.0
+    
+    @property
+    def is_open(self) -> bool:
+        return time.monotonic() < self.opened_until
+    
+    def record_success(self):
+        self.failures = 0
+        self.opened_until = 0.0
+    
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_until = time.monotonic() + self.reset_seconds
 
 
 class JudgeService:
     """AI-powered judge for evaluating agent performance"""
     
-    def __init__(self):
+    def __init__(self, providers: ProviderGateway = None, cache: ResponseCache = None):
         self.judge_model = settings.JUDGE_MODEL
+        self.backup_model = settings.JUDGE_BACKUP_MODEL
         self.temperature = settings.JUDGE_TEMPERATURE
+        self.timeout = settings.JUDGE_TIMEOUT_SECONDS
         
-        # Initialize AI clients
-        if settings.ANTHROPIC_API_KEY:
-            self.anthropic_client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
-        else:
-            self.anthropic_client = None
+        # Async pooled provider clients, so judging never blocks the event loop.
+        # Sharing the sandbox's gateway also puts judge calls under the same
+        # per-key rate limits as agent calls.
+        self.providers = providers or ProviderGateway()
         
-        if settings.OPENAI_API_KEY:
-            self.openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-        else:
-            self.openai_client = None
+        # Persistent verdict cache, so re-judging identical outputs (resumes,
+        # disputes, re-runs) does not pay for another judge call
+        if cache is None and settings.JUDGE_CACHE_ENABLED:
+            cache = ResponseCache(
+                directory=settings.JUDGE_CACHE_DIR,
+                max_bytes=settings.JUDGE_CACHE_MAX_MB * 1024 * 1024
+            )
+        self.cache = cache
+        
+        # Provider -> circuit breaker
+        self.breakers: Dict[str, CircuitBreaker] = {}
     
     async def judge_arena(
         self,
@@ -41,117 +90,376 @@ class JudgeService:
             agent_results: List of agent execution results
         
         Returns:
-            Judging results with scores, rankings, feedback
+            Judging results with scores, rankings, feedback, and "cached"
+            when the verdict came from the judge cache
         """
+        # Objective criteria are scored deterministically, in milliseconds
+        objective = self._objective_verdict(bounty_criteria, agent_results)
+        if objective is not None:
+            return {**objective, "cached": False}
+        
         try:
-            # Build judge prompt
-            prompt = self._build_judge_prompt(bounty_criteria, agent_results)
+            cache_key = self._cache_key(bounty_criteria, agent_results) if self.cache else None
+            if cache_key:
+                cached = await self._cached_verdict(cache_key)
+                if cached is not None:
+                    return {**cached, "cached": True}
             
-            # Call judge model
-            if "claude" in self.judge_model.lower() and self.anthropic_client:
-                response = await self._judge_with_claude(prompt)
-            elif self.openai_client:
-                response = await self._judge_with_openai(prompt)
-            else:
+            if not self._candidates():
                 # Fallback to simple scoring
                 return self._simple_scoring(agent_results)
             
-            # Parse response
-            results = self._parse_judge_response(response, agent_results)
-            return results
-            
+            results = await self._judge_ranked(bounty_criteria, agent_results)
+            if cache_key and not results.get("fallback"):
+                await self.cache.put(cache_key, {"stored_at": time.time(), "results": results})
+            return {**results, "cached": False}
+        
         except Exception as e:
             logger.error(f"Judge error: {e}")
             # Fallback to simple scoring
             return self._simple_scoring(agent_results)
     
+    def speculative(self, bounty_criteria: Dict[str, Any], participants: int = None) -> "SpeculativeJudge":
+        """Start judging an arena incrementally, while its participants are still running"""
+        return SpeculativeJudge(self, bounty_criteria, participants)
+    
+    async def judge_batched(
+        self,
+        arena_id: int,
+        bounty_criteria: Dict[str, Any],
+        agent_results: List[Dict[str, Any]],
+        db: Session
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Judge an arena in batch mode
+        
+        The first call stores the judge prompt as a JudgeBatchRequest and
+        returns None; JudgeBatchScheduler submits it with other arenas'
+        requests and re-queues the arena once its verdict is in, and the next
+        call returns that verdict. Objective criteria, cache hits and arenas
+        too large for a single prompt are judged straight away, and requests
+        the batch could not answer fall back to real-time judging.
+        
+        Returns:
+            Judging results, or None while the request waits for its batch
+        """
+        objective = self._objective_verdict(bounty_criteria, agent_results)
+        if objective is not None:
+            return {**objective, "cached": False}
+        
+        cache_key = self._cache_key(bounty_criteria, agent_results)
+        request = db.query(JudgeBatchRequest).filter(
+            JudgeBatchRequest.arena_id == arena_id,
+            JudgeBatchRequest.cache_key == cache_key
+        ).order_by(JudgeBatchRequest.id.desc()).first()
+        
+        if request is not None:
+            if request.status in (JudgeBatchStatus.PENDING, JudgeBatchStatus.SUBMITTED):
+                return None
+            if request.status == JudgeBatchStatus.COMPLETED:
+                size = len(agent_results)
+                results = {
+                    **self._verdict_from_order(self._ranked(request.verdict, size), request.verdict),
+                    "batch_id": request.batch_id
+                }
+                if self.cache:
+                    await self.cache.put(cache_key, {"stored_at": time.time(), "results": results})
+                return {**results, "cached": False}
+            logger.warning(f"Batch judging failed for arena {arena_id} ({request.last_error}); judging now")
+            return await self.judge_arena(bounty_criteria, agent_results)
+        
+        if self.cache:
+            cached = await self._cached_verdict(cache_key)
+            if cached is not None:
+                return {**cached, "cached": True}
+        
+        candidates = self._candidates()
+        if not candidates or len(self._chunk(bounty_criteria, agent_results)) > 1:
+            return await self.judge_arena(bounty_criteria, agent_results)
+        
+        provider, model = candidates[0]
+        db.add(JudgeBatchRequest(
+            arena_id=arena_id,
+            cache_key=cache_key,
+            provider=provider,
+            model=model,
+            prompt=self._build_judge_prompt(bounty_criteria, agent_results),
+            status=JudgeBatchStatus.PENDING
+        ))
+        db.commit()
+        return None
+    
+    def _objective_verdict(self, criteria: Dict[str, Any], results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Metric-based verdict for machine-checkable criteria, or None to use the LLM judge"""
+        if not settings.JUDGE_METRICS_ENABLED:
+            return None
+        try:
+            return evaluate_metrics(criteria, results)
+        except Exception as e:
+            logger.error(f"Metric evaluation failed, using the LLM judge: {e}")
+            return None
+    
+    def _cache_key(self, criteria: Dict[str, Any], results: List[Dict[str, Any]], mode: str = None) -> str:
+        """
+        Hash of everything that determines a verdict
+        
+        Agent results are normalized to their outputs and success flags, in
+        order; timings and token counts vary between otherwise identical runs
+        and are left out so re-runs still hit. `mode` separates other kinds of
+        verdict on the same results, such as single-agent rubric scores.
+        """
+        request = {
+            "model": self.judge_model,
+            "temperature": self.temperature,
+            "prompt_version": PROMPT_TEMPLATE_VERSION,
+            "criteria": criteria,
+            "results": [
+                {"output": result.get("output"), "success": bool(result.get("success"))}
+                for result in results
+            ]
+        }
+        if mode:
+            request["mode"] = mode
+        return ResponseCache.key(request)
+    
+    async def _cached_verdict(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = await self.cache.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry.get("stored_at", 0) > settings.JUDGE_CACHE_TTL_SECONDS:
+            await self.cache.delete(key)
+            return None
+        return entry.get("results")
+    
+    def _breaker(self, provider: str) -> CircuitBreaker:
+        if provider not in self.breakers:
+            self.breakers[provider] = CircuitBreaker()
+        return self.breakers[provider]
+    
+    def _candidates(self) -> List[Tuple[str, str]]:
+        """(provider, model) to judge with, primary first, skipping open circuits"""
+        candidates = []
+        for model in (self.judge_model, self.backup_model):
+            if not model:
+                continue
+            if "claude" in model.lower() and self.providers.is_configured("anthropic"):
+                candidate = ("anthropic", model)
+            elif self.providers.is_configured("openai"):
+                candidate = ("openai", model if "gpt" in model.lower() else "gpt-4-turbo-preview")
+            else:
+                continue
+            if candidate not in candidates and not self._breaker(candidate[0]).is_open:
+                candidates.append(candidate)
+        return candidates
+    
+    async def _judge_once(self, criteria: Dict[str, Any], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Judge results in a single prompt, hedged across the judge models
+        
+        The primary model is asked first. If it has not answered after
+        JUDGE_HEDGE_DELAY_SECONDS, or fails or returns an unparseable answer,
+        the backup model is asked the same question, and the first valid
+        verdict wins; the slower request is cancelled. Simple scoring is only
+        used when every candidate fails.
+        """
+        prompt = self._build_judge_prompt(criteria, results)
+        backups = self._candidates()
+        pending: Dict[asyncio.Task, Tuple[str, str]] = {}
+        
+        def ask_next():
+            provider, model = backups.pop(0)
+            pending[asyncio.create_task(self._complete(provider, model, prompt))] = (provider, model)
+        
+        if backups:
+            ask_next()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=settings.JUDGE_HEDGE_DELAY_SECONDS if backups else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    logger.info(f"Judge slower than {settings.JUDGE_HEDGE_DELAY_SECONDS}s; hedging")
+                    ask_next()
+                    continue
+                
+                for task in done:
+                    provider, model = pending.pop(task)
+                    try:
+                        verdict = self._parse_verdict(task.result())
+                    except Exception as e:
+                        self._breaker(provider).record_failure()
+                        logger.warning(f"Judge {provider}/{model} failed: {e}")
+                        continue
+                    if verdict is not None:
+                        self._breaker(provider).record_success()
+                        return {**verdict, "judge_model": model}
+                    # An unusable answer counts against the circuit like an error
+                    self._breaker(provider).record_failure()
+                    logger.warning(f"Judge {provider}/{model} returned an unparseable verdict")
+                
+                # Nothing usable yet: ask the next candidate now rather than after the delay
+                if backups:
+                    ask_next()
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        return self._simple_scoring(results)
+    
+    async def _judge_ranked(self, criteria: Dict[str, Any], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Judge results that may not fit in one prompt
+        
+        Results are split into chunks that fit JUDGE_PROMPT_TOKEN_BUDGET and
+        the chunks are judged concurrently. The top JUDGE_CHUNK_LEADERS of
+        each chunk are then judged against each other (recursively, should the
+        leaders still not fit), so latency grows with the number of merge
+        levels rather than with the number of participants.
+        
+        Leaders are ranked by the merge; everyone else follows, by their rank
+        within their chunk and then by score. Each agent keeps the score from
+        the last comparison it took part in. A single prompt's verdict goes
+        through the same ordering, so every agent gets an integer rank however
+        the judge filled in its answer.
+        """
+        chunks = self._chunk(criteria, results)
+        if len(chunks) == 1:
+            judged = await self._judge_once(criteria, results)
+            return self._verdict_from_order(self._ranked(judged, len(results)), judged)
+        
+        judged_chunks = await asyncio.gather(*[
+            self._judge_once(criteria, [results[i] for i in chunk]) for chunk in chunks
+        ])
+        
+        leaders: List[int] = []
+        others: List[Tuple[int, float, int, Dict[str, Any]]] = []  # (chunk rank, -score, index, score)
+        for chunk, judged in zip(chunks, judged_chunks):
+            # Every chunk holds at least two agents, so each merge level shrinks the field
+            leader_count = max(1, min(settings.JUDGE_CHUNK_LEADERS, len(chunk) - 1))
+            for position, (local, score) in enumerate(self._ranked(judged, len(chunk))):
+                if position < leader_count:
+                    leaders.append(chunk[local])
+                else:
+                    others.append((position, -float(score.get("score") or 0), chunk[local], score))
+        
+        merged = await self._judge_ranked(criteria, [results[i] for i in leaders])
+        
+        order = [(leaders[local], score) for local, score in self._ranked(merged, len(leaders))]
+        order += [(index, score) for _, _, index, score in sorted(others, key=lambda o: o[:3])]
+        fallback = any(judged.get("fallback") for judged in judged_chunks)
+        return self._verdict_from_order(order, merged, fallback)
+    
+    def _verdict_from_order(
+        self,
+        order: List[Tuple[int, Dict[str, Any]]],
+        merged: Dict[str, Any],
+        fallback: bool = False
+    ) -> Dict[str, Any]:
+        """Verdict from final (index, score) order, with the deciding judgement's feedback"""
+        scores = [
+            {
+                "agent_id": index + 1,
+                "score": float(score.get("score") or 0),
+                "rank": rank,
+                "feedback": score.get("feedback", "")
+            }
+            for rank, (index, score) in enumerate(order, start=1)
+        ]
+        verdict = {
+            "scores": scores,
+            "winner_id": scores[0]["agent_id"] if scores else None,
+            "overall_feedback": merged.get("overall_feedback", ""),
+            "judge_model": merged.get("judge_model")
+        }
+        if fallback or merged.get("fallback"):
+            verdict["fallback"] = True
+        return verdict
+    
+    def _chunk(self, criteria: Dict[str, Any], results: List[Dict[str, Any]]) -> List[List[int]]:
+        """Split result indices into consecutive chunks that fit the prompt token budget"""
+        builder = self._prompt_builder(criteria)
+        chunks: List[List[int]] = []
+        chunk: List[int] = []
+        used = 0
+        for i, result in enumerate(results):
+            # Each agent is packed at its guaranteed share; the builder then
+            # hands what short outputs leave over to the long ones
+            tokens = builder.section_tokens + min(
+                builder.output_tokens(result), settings.JUDGE_OUTPUT_TOKENS_PER_AGENT
+            )
+            full = len(chunk) >= settings.JUDGE_CHUNK_MAX_AGENTS or used + tokens > builder.agent_budget
+            # Never judge an agent alone: a chunk of one says nothing about ranking
+            if chunk and full and len(chunk) >= 2:
+                chunks.append(chunk)
+                chunk, used = [], 0
+            chunk.append(i)
+            used += tokens
+        if len(chunk) == 1 and chunks:
+            chunks[-1].extend(chunk)
+        elif chunk:
+            chunks.append(chunk)
+        return chunks
+    
+    def _ranked(self, judged: Dict[str, Any], size: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """(0-based position, score) for every agent of a judged prompt, best first"""
+        scores: Dict[int, Dict[str, Any]] = {}
+        for score in judged.get("scores", []):
+            agent_id = score.get("agent_id")
+            if isinstance(agent_id, int) and 0 < agent_id <= size and agent_id not in scores:
+                scores[agent_id] = score
+        ranked = sorted(
+            scores.values(),
+            key=lambda s: (s["rank"] if isinstance(s.get("rank"), int) else size, -float(s.get("score") or 0))
+        )
+        # Agents the judge left out go last
+        missing = [
+            (i, {"score": 0.0, "feedback": "Not scored by the judge"})
+            for i in range(size) if i + 1 not in scores
+        ]
+        return [(score["agent_id"] - 1, score) for score in ranked] + missing
+    
+    def _prompt_builder(self, criteria: Dict[str, Any]) -> JudgePromptBuilder:
+        """Prompt builder sized for every model that may be asked (primary and backup)"""
+        models = [model for _, model in self._candidates()] or [self.judge_model]
+        return JudgePromptBuilder(criteria, prompt_budget(models))
+    
     def _build_judge_prompt(
         self,
         criteria: Dict[str, Any],
         results: List[Dict[str, Any]]
     ) -> str:
         """Build prompt for AI judge"""
-        prompt = f"""You are an AI judge evaluating agent performance in a competitive arena.
-
-BOUNTY CRITERIA:
-{json.dumps(criteria, indent=2)}
-
-AGENT RESULTS:
-"""
-        for i, result in enumerate(results):
-            prompt += f"""
-Agent {i+1}:
-- Output: {result.get('output', 'N/A')[:500]}
-- Execution Time: {result.get('execution_time_seconds', 0):.2f}s
-- Tokens Used: {result.get('tokens_used', 0)}
-- Success: {result.get('success', False)}
-"""
-        
-        prompt += """
-TASK:
-Evaluate each agent's performance based on:
-1. How well they met the bounty criteria
-2. Quality of output
-3. Efficiency (execution time, resource usage)
-4. Innovation and approach
-
-Return a JSON object with:
-{
-  "scores": [
-    {"agent_id": 1, "score": 85.5, "rank": 1, "feedback": "..."},
-    ...
-  ],
-  "winner_id": 1,
-  "overall_feedback": "..."
-}
-
-Score range: 0-100. Higher is better.
-"""
-        return prompt
+        return self._prompt_builder(criteria).build(results)
     
-    async def _judge_with_claude(self, prompt: str) -> str:
-        """Judge using Claude"""
-        message = self.anthropic_client.messages.create(
-            model=self.judge_model,
-            max_tokens=2000,
-            temperature=self.temperature,
-            messages=[{
+    async def _complete(self, provider: str, model: str, prompt: str) -> str:
+        """Ask one judge model"""
+        completion = await self.providers.complete(
+            provider,
+            model,
+            [{
                 "role": "user",
                 "content": prompt
-            }]
-        )
-        return message.content[0].text
-    
-    async def _judge_with_openai(self, prompt: str) -> str:
-        """Judge using OpenAI"""
-        response = self.openai_client.chat.completions.create(
-            model=self.judge_model if "gpt" in self.judge_model.lower() else "gpt-4-turbo-preview",
+            }],
+            max_tokens=2000,
             temperature=self.temperature,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
+            timeout=self.timeout
         )
-        return response.choices[0].message.content
+        return completion["text"]
     
-    def _parse_judge_response(
-        self,
-        response: str,
-        agent_results: List[Dict[str, Any]]
-    ) -> Dict[str, Any]:
-        """Parse judge's JSON response"""
+    def _parse_verdict(self, response: str) -> Optional[Dict[str, Any]]:
+        """Judge's JSON verdict, or None if the response has no usable scores"""
         try:
             # Extract JSON from response
-            import re
             json_match = re.search(r'\{.*\}', response, re.DOTALL)
             if json_match:
                 data = json.loads(json_match.group(0))
-                return data
+                if isinstance(data, dict) and isinstance(data.get("scores"), list) and data["scores"]:
+                    return data
         except Exception as e:
             logger.error(f"Failed to parse judge response: {e}")
-        
-        # Fallback
-        return self._simple_scoring(agent_results)
+        return None
     
     def _simple_scoring(self, agent_results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Simple fallback scoring"""
@@ -180,6 +488,131 @@ Score range: 0-100. Higher is better.
         return {
             "scores": scores,
             "winner_id": scores[0]["agent_id"] if scores else None,
-            "overall_feedback": "Scored using fallback algorithm"
+            "overall_feedback": "Scored using fallback algorithm",
+            "fallback": True
         }
 
+
+class SpeculativeJudge:
+    """
+    Judges an arena while it runs, so judging overlaps execution
+    
+    Each participant is scored on its own against the rubric (a single-agent
+    judge prompt) as soon as it finishes. Once the last one is in, finish()
+    makes a single reconciliation call: the top JUDGE_RECONCILE_TOP by rubric
+    score are judged head to head together with any participants whose
+    rubric score is not in yet (the stragglers), which settles the podium.
+    The reconciled contenders rank first, in reconciled order, and everyone
+    else follows in rubric order; the two judgments score on different
+    scales, so their scores are never compared. Rubric scores are cached per
+    output, so a resumed arena does not pay for them again.
+    
+    Arenas scored on metrics (criteria that is_objective accepts; an
+    unregistered "metric" still goes to the LLM judge), without an LLM
+    judge, or with no more than JUDGE_RECONCILE_TOP participants (where the
+    reconciliation would judge everyone anyway) are not judged
+    speculatively; finish() then simply calls judge_arena.
+    """
+    
+    def __init__(self, judge: JudgeService, criteria: Dict[str, Any], participants: int = None):
+        self.judge = judge
+        self.criteria = criteria
+        self.enabled = bool(
+            settings.JUDGE_SPECULATIVE_ENABLED
+            and (participants is None or participants > settings.JUDGE_RECONCILE_TOP)
+            and judge._candidates()
+            and not (settings.JUDGE_METRICS_ENABLED and is_objective(criteria))
+        )
+        # Participant index -> rubric scoring task
+        self.tasks: Dict[int, asyncio.Task] = {}
+    
+    def submit(self, index: int, result: Dict[str, Any]):
+        """Start scoring a participant that just finished"""
+        if self.enabled and index not in self.tasks:
+            self.tasks[index] = asyncio.create_task(self._rubric_score(result))
+    
+    def cancel(self):
+        for task in self.tasks.values():
+            task.cancel()
+    
+    async def finish(self, agent_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Final verdict once every participant has finished, in judge_arena's format"""
+        if not self.enabled or len(agent_results) < 2:
+            self.cancel()
+            return await self.judge.judge_arena(self.criteria, agent_results)
+        
+        try:
+            cache_key = self.judge._cache_key(self.criteria, agent_results) if self.judge.cache else None
+            if cache_key:
+                cached = await self.judge._cached_verdict(cache_key)
+                if cached is not None:
+                    self.cancel()
+                    return {**cached, "cached": True}
+            
+            # Rubric scores that are in; whoever is still unscored (the
+            # stragglers) goes straight into the reconciliation instead
+            rubric: Dict[int, Dict[str, Any]] = {}
+            in_flight: List[int] = []  # In the order participants finished
+            for index, task in self.tasks.items():
+                if not task.done():
+                    in_flight.append(index)
+                elif not task.cancelled() and task.exception() is None:
+                    rubric[index] = task.result()
+            
+            # The best rubric scores and the unscored are judged head to head.
+            # Should that not fit one prompt, wait for the oldest rubric calls
+            # still running (the soonest to return) rather than add a merge level.
+            while True:
+                by_score = sorted(rubric, key=lambda i: -float(rubric[i].get("score") or 0))
+                leaders = by_score[:max(1, settings.JUDGE_RECONCILE_TOP)]
+                contenders = leaders + [i for i in range(len(agent_results)) if i not in rubric]
+                fits = len(self.judge._chunk(self.criteria, [agent_results[i] for i in contenders])) == 1
+                if fits or not in_flight:
+                    break
+                index = in_flight.pop(0)
+                try:
+                    rubric[index] = await self.tasks[index]
+                except Exception as e:
+                    logger.warning(f"Rubric scoring failed: {e}")
+            self.cancel()
+            
+            merged = await self.judge._judge_ranked(self.criteria, [agent_results[i] for i in contenders])
+            
+            # Contenders in reconciled order, then everyone else in rubric order
+            reconciled = [(contenders[local], score) for local, score in self.judge._ranked(merged, len(contenders))]
+            rest = [(i, rubric[i]) for i in by_score[len(leaders):]]
+            order = reconciled + rest
+            
+            verdict = self.judge._verdict_from_order(
+                order, merged, fallback=any(score.get("fallback") for score in rubric.values())
+            )
+            verdict["speculative"] = {"rubric_scored": len(rubric), "reconciled": len(contenders)}
+            
+            if cache_key and not verdict.get("fallback"):
+                await self.judge.cache.put(cache_key, {"stored_at": time.time(), "results": verdict})
+            return {**verdict, "cached": False}
+        
+        except Exception as e:
+            logger.error(f"Speculative judging failed, judging the arena in full: {e}")
+            self.cancel()
+            return await self.judge.judge_arena(self.criteria, agent_results)
+    
+    async def _rubric_score(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """{"score", "feedback"} for one participant judged on its own"""
+        cache_key = self.judge._cache_key(self.criteria, [result], mode="rubric") if self.judge.cache else None
+        if cache_key:
+            cached = await self.judge._cached_verdict(cache_key)
+            if cached is not None:
+                return cached
+        
+        judged = await self.judge._judge_once(self.criteria, [result])
+        ranked = self.judge._ranked(judged, 1)
+        score = {
+            "score": float(ranked[0][1].get("score") or 0),
+            "feedback": ranked[0][1].get("feedback", "")
+        }
+        if judged.get("fallback"):
+            score["fallback"] = True
+        elif cache_key:
+            await self.judge.cache.put(cache_key, {"stored_at": time.time(), "results": score})
+        return score
@@ -0,0 +1,474 @@
+"""
+Batch judging
+Collects batch-mode judge requests from many arenas into provider batches
+"""
+
+import asyncio
+import json
+import os
+import socket
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional, Tuple
+import httpx
+from loguru import logger
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session, undefer
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.judge_batch import JudgeBatchRequest, JudgeBatchStatus
+from app.services.arena_queue import ArenaJobQueue
+from app.services.judge import JudgeService
+from app.services.providers import ProviderGateway
+
+# Completion length of a batched judge answer (as for real-time judging)
+JUDGE_MAX_TOKENS = 2000
+
+# Batch ids given to requests while a scheduler submits them
+_CLAIM_PREFIX = "claim:"
+
+
+class BatchBackend(ABC):
+    """
+    Submits judge prompts as one batch and collects the answers
+    
+    submit() returns the batch id. poll() returns None while the batch is
+    still running, then {custom_id: {"text": ...} or {"error": ...}}; prompts
+    missing from the answers are retried with a later batch.
+    """
+    
+    @abstractmethod
+    async def submit(self, provider: str, model: str, requests: List[Tuple[str, str]]) -> str:
+        """Submit (custom_id, prompt) pairs as one batch and return its id"""
+    
+    @abstractmethod
+    async def poll(self, batch_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Answers of a finished batch by custom_id, or None while it runs"""
+    
+    async def close(self):
+        pass
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    Runs batches through the normal completion API, in this process
+    
+    A stand-in for tests and for providers without a batch API. Batches only
+    live in memory, so the scheduler does not wait out the provider batch
+    timeout for them: close() hands back the ids of the batches it cancelled
+    so their requests can be resubmitted at once, and batches lost with a
+    crashed process are resubmitted after JUDGE_BATCH_LOCAL_TIMEOUT_SECONDS.
+    """
+    
+    PREFIX = "local:"
+    
+    def __init__(self, judge: JudgeService, concurrency: int = 8):
+        self.judge = judge
+        self.concurrency = concurrency
+        self.prefix = f"{self.PREFIX}{socket.gethostname()}:{os.getpid()}:"
+        self._batches: Dict[str, asyncio.Task] = {}
+    
+    async def submit(self, provider: str, model: str, requests: List[Tuple[str, str]]) -> str:
+        batch_id = f"{self.prefix}{uuid.uuid4().hex}"
+        self._batches[batch_id] = asyncio.create_task(self._run(provider, model, requests))
+        return batch_id
+    
+    async def poll(self, batch_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        task = self._batches.get(batch_id)
+        if task is None or not task.done():
+            # Still running, or another process's batch
+            return None
+        del self._batches[batch_id]
+        return task.result()
+    
+    async def close(self) -> List[str]:
+        """Cancel the running batches; returns their ids"""
+        for task in self._batches.values():
+            task.cancel()
+        await asyncio.gather(*self._batches.values(), return_exceptions=True)
+        cancelled = list(self._batches)
+        self._batches = {}
+        return cancelled
+    
+    async def _run(self, provider: str, model: str, requests: List[Tuple[str, str]]) -> Dict[str, Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def answer(prompt: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return {"text": await self.judge._complete(provider, model, prompt)}
+                except Exception as e:
+                    return {"error": str(e)}
+        
+        answers = await asyncio.gather(*[answer(prompt) for _, prompt in requests])
+        return {custom_id: result for (custom_id, _), result in zip(requests, answers)}
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API: a JSONL file of chat completion requests, answered within 24 hours"""
+    
+    RUNNING = {"validating", "in_progress", "finalizing", "cancelling"}
+    
+    def __init__(self, providers: ProviderGateway, temperature: float):
+        self.providers = providers
+        self.temperature = temperature
+    
+    async def submit(self, provider: str, model: str, requests: List[Tuple[str, str]]) -> str:
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "max_tokens": JUDGE_MAX_TOKENS,
+                    "temperature": self.temperature
+                }
+            })
+            for custom_id, prompt in requests
+        ]
+        async with self._session() as client:
+            response = await client.post(
+                "files",
+                data={"purpose": "batch"},
+                files={"file": ("judge_batch.jsonl", "\n".join(lines).encode(), "application/jsonl")}
+            )
+            response.raise_for_status()
+            response = await client.post("batches", json={
+                "input_file_id": response.json()["id"],
+                "endpoint": "/v1/chat/completions",
+                "completion_window": "24h"
+            })
+            response.raise_for_status()
+        return response.json()["id"]
+    
+    async def poll(self, batch_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        async with self._session() as client:
+            response = await client.get(f"batches/{batch_id}")
+            response.raise_for_status()
+            batch = response.json()
+            if batch.get("status") in self.RUNNING:
+                return None
+            
+            # Completed, failed, expired or cancelled: collect whatever was answered
+            answers: Dict[str, Dict[str, Any]] = {}
+            for file_key in ("output_file_id", "error_file_id"):
+                if not batch.get(file_key):
+                    continue
+                response = await client.get(f"files/{batch[file_key]}/content")
+                response.raise_for_status()
+                for item in _jsonl(response.text):
+                    result = item.get("response") or {}
+                    if result.get("status_code") == 200:
+                        answers[item["custom_id"]] = {"text": self.providers._parse_openai(result.get("body") or {})["text"]}
+                    else:
+                        answers[item["custom_id"]] = {"error": json.dumps(item.get("error") or result.get("body"))}
+        return answers
+    
+    def _session(self) -> AsyncContextManager[httpx.AsyncClient]:
+        return self.providers.session(
+            "openai", self.providers.default_api_key("openai"), self.providers.default_base_url("openai")
+        )
+
+
+class AnthropicBatchBackend(BatchBackend):
+    """Anthropic Message Batches API, answered within 24 hours"""
+    
+    def __init__(self, providers: ProviderGateway, temperature: float):
+        self.providers = providers
+        self.temperature = temperature
+    
+    async def submit(self, provider: str, model: str, requests: List[Tuple[str, str]]) -> str:
+        async with self._session() as client:
+            response = await client.post("v1/messages/batches", json={
+                "requests": [
+                    {
+                        "custom_id": custom_id,
+                        "params": {
+                            "model": model,
+                            "messages": [{"role": "user", "content": prompt}],
+                            "max_tokens": JUDGE_MAX_TOKENS,
+                            "temperature": self.temperature
+                        }
+                    }
+                    for custom_id, prompt in requests
+                ]
+            })
+            response.raise_for_status()
+        return response.json()["id"]
+    
+    async def poll(self, batch_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        async with self._session() as client:
+            response = await client.get(f"v1/messages/batches/{batch_id}")
+            response.raise_for_status()
+            batch = response.json()
+            if batch.get("processing_status") != "ended":
+                return None
+            
+            answers: Dict[str, Dict[str, Any]] = {}
+            if batch.get("results_url"):
+                response = await client.get(batch["results_url"])
+                response.raise_for_status()
+                for item in _jsonl(response.text):
+                    result = item.get("result") or {}
+                    if result.get("type") == "succeeded":
+                        answers[item["custom_id"]] = {"text": self.providers._parse_anthropic(result.get("message") or {})["text"]}
+                    else:
+                        answers[item["custom_id"]] = {"error": json.dumps(result.get("error") or result.get("type"))}
+        return answers
+    
+    def _session(self) -> AsyncContextManager[httpx.AsyncClient]:
+        return self.providers.session(
+            "anthropic", self.providers.default_api_key("anthropic"), self.providers.default_base_url("anthropic")
+        )
+
+
+def _jsonl(text: str) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class JudgeBatchScheduler:
+    """
+    Submits queued judge requests in batches and fans the verdicts back out
+    
+    Every JUDGE_BATCH_POLL_SECONDS the scheduler submits the pending requests
+    of each judge model as one batch, once JUDGE_BATCH_MAX_SIZE of them have
+    gathered or the oldest has waited JUDGE_BATCH_INTERVAL_SECONDS, and polls
+    the batches it is waiting on. Answered requests get their verdict and
+    their arena is queued again, so a worker resumes it and writes the
+    results. Requests are claimed with a conditional UPDATE, so schedulers in
+    several processes never submit the same request twice.
+    """
+    
+    def __init__(
+        self,
+        judge: JudgeService = None,
+        queue: ArenaJobQueue = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+        backends: Dict[str, BatchBackend] = None
+    ):
+        self.judge = judge or JudgeService()
+        self.queue = queue or ArenaJobQueue()
+        self.session_factory = session_factory
+        self.local = LocalBatchBackend(self.judge)
+        if backends is None:
+            backends = {
+                "openai": OpenAIBatchBackend(self.judge.providers, self.judge.temperature),
+                "anthropic": AnthropicBatchBackend(self.judge.providers, self.judge.temperature)
+            }
+        self.backends = backends
+        self.max_size = settings.JUDGE_BATCH_MAX_SIZE
+        self.interval = settings.JUDGE_BATCH_INTERVAL_SECONDS
+        self.poll_interval = settings.JUDGE_BATCH_POLL_SECONDS
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+    
+    async def start(self):
+        """Start the scheduling loop"""
+        self._running = True
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"Judge batch scheduler started ({settings.JUDGE_BATCH_BACKEND} backend)")
+    
+    async def stop(self):
+        """Stop scheduling; submitted batches are picked up again on the next start"""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        cancelled = await self.local.close()
+        if cancelled:
+            # Local batches die with the process; resubmit them now rather than after a timeout
+            db = self.session_factory()
+            try:
+                db.execute(
+                    update(JudgeBatchRequest)
+                    .where(
+                        JudgeBatchRequest.batch_id.in_(cancelled),
+                        JudgeBatchRequest.status == JudgeBatchStatus.SUBMITTED
+                    )
+                    .values(status=JudgeBatchStatus.PENDING, batch_id=None, last_error="Scheduler stopped")
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+            finally:
+                db.close()
+        logger.info("Judge batch scheduler stopped")
+    
+    async def run_once(self, db: Session) -> Dict[str, int]:
+        """One pass: resubmit stalled requests, submit due batches, collect finished ones"""
+        return {
+            "expired": self._expire_stalled(db),
+            "submitted": await self._submit_due(db),
+            "answered": await self._collect(db)
+        }
+    
+    async def _loop(self):
+        while self._running:
+            db = self.session_factory()
+            try:
+                await self.run_once(db)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Judge batch scheduler error: {e}")
+            finally:
+                db.close()
+            await asyncio.sleep(self.poll_interval)
+    
+    def _backend(self, provider: str) -> BatchBackend:
+        if settings.JUDGE_BATCH_BACKEND == "local":
+            return self.local
+        return self.backends.get(provider, self.local)
+    
+    def _expire_stalled(self, db: Session) -> int:
+        """Return requests whose batch never finished (lost, or its process restarted) to the queue"""
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=settings.JUDGE_BATCH_TIMEOUT_SECONDS)
+        local_cutoff = now - timedelta(seconds=settings.JUDGE_BATCH_LOCAL_TIMEOUT_SECONDS)
+        # Local batches and claims (a scheduler that died between claiming requests
+        # and recording their provider batch id) never outlive their process
+        local = or_(
+            JudgeBatchRequest.batch_id.startswith(LocalBatchBackend.PREFIX),
+            JudgeBatchRequest.batch_id.startswith(_CLAIM_PREFIX)
+        )
+        expired = db.execute(
+            update(JudgeBatchRequest)
+            .where(
+                JudgeBatchRequest.status == JudgeBatchStatus.SUBMITTED,
+                or_(
+                    JudgeBatchRequest.submitted_at < cutoff,
+                    and_(local, JudgeBatchRequest.submitted_at < local_cutoff)
+                )
+            )
+            .values(status=JudgeBatchStatus.PENDING, batch_id=None, last_error="Batch timed out")
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if expired:
+            logger.warning(f"Resubmitting {expired} judge request(s) whose batch timed out")
+        return expired
+    
+    async def _submit_due(self, db: Session) -> int:
+        """Submit a batch per judge model that has a full batch or a request waiting too long"""
+        submitted = 0
+        groups = db.query(JudgeBatchRequest.provider, JudgeBatchRequest.model).filter(
+            JudgeBatchRequest.status == JudgeBatchStatus.PENDING
+        ).distinct().all()
+        for provider, model in groups:
+            while True:
+                ids = self._due(db, provider, model)
+                if not ids:
+                    break
+                count = await self._submit(db, provider, model, ids)
+                if not count:
+                    break
+                submitted += count
+        return submitted
+    
+    def _due(self, db: Session, provider: str, model: str) -> List[int]:
+        """Ids of the next batch for a judge model, or [] if it is not due yet"""
+        pending = db.query(JudgeBatchRequest).filter(
+            JudgeBatchRequest.status == JudgeBatchStatus.PENDING,
+            JudgeBatchRequest.provider == provider,
+            JudgeBatchRequest.model == model
+        )
+        ids = [row.id for row in pending.with_entities(JudgeBatchRequest.id).order_by(JudgeBatchRequest.id).limit(self.max_size)]
+        if len(ids) < self.max_size:
+            cutoff = datetime.utcnow() - timedelta(seconds=self.interval)
+            if pending.filter(JudgeBatchRequest.created_at <= cutoff).first() is None:
+                return []
+        return ids
+    
+    async def _submit(self, db: Session, provider: str, model: str, ids: List[int]) -> int:
+        """Claim requests and submit them as one batch; returns how many were submitted"""
+        claim = f"{_CLAIM_PREFIX}{self.owner}:{uuid.uuid4().hex}"
+        db.execute(
+            update(JudgeBatchRequest)
+            .where(JudgeBatchRequest.id.in_(ids), JudgeBatchRequest.status == JudgeBatchStatus.PENDING)
+            .values(status=JudgeBatchStatus.SUBMITTED, batch_id=claim, submitted_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        requests = db.query(JudgeBatchRequest).options(undefer(JudgeBatchRequest.prompt)).filter(
+            JudgeBatchRequest.batch_id == claim
+        ).all()
+        if not requests:
+            return 0
+        
+        try:
+            batch_id = await self._backend(provider).submit(
+                provider, model, [(request.custom_id, request.prompt) for request in requests]
+            )
+        except Exception as e:
+            logger.error(f"Could not submit judge batch for {provider}/{model}: {e}")
+            self._set_batch(db, claim, status=JudgeBatchStatus.PENDING, batch_id=None, last_error=str(e))
+            return 0
+        
+        self._set_batch(db, claim, batch_id=batch_id)
+        logger.info(f"Submitted judge batch {batch_id}: {len(requests)} request(s) for {provider}/{model}")
+        return len(requests)
+    
+    async def _collect(self, db: Session) -> int:
+        """Poll submitted batches; returns how many requests were answered"""
+        batches = db.query(JudgeBatchRequest.batch_id, JudgeBatchRequest.provider).filter(
+            JudgeBatchRequest.status == JudgeBatchStatus.SUBMITTED,
+            JudgeBatchRequest.batch_id.isnot(None),
+            ~JudgeBatchRequest.batch_id.startswith(_CLAIM_PREFIX)
+        ).distinct().all()
+        
+        answered = 0
+        for batch_id, provider in batches:
+            try:
+                answers = await self._backend(provider).poll(batch_id)
+            except Exception as e:
+                logger.warning(f"Could not poll judge batch {batch_id}: {e}")
+                continue
+            if answers is not None:
+                answered += self._fan_out(db, batch_id, answers)
+        return answered
+    
+    def _fan_out(self, db: Session, batch_id: str, answers: Dict[str, Dict[str, Any]]) -> int:
+        """Record a finished batch's verdicts and re-queue their arenas"""
+        requests = db.query(JudgeBatchRequest).filter(
+            JudgeBatchRequest.batch_id == batch_id,
+            JudgeBatchRequest.status == JudgeBatchStatus.SUBMITTED
+        ).all()
+        
+        answered = 0
+        for request in requests:
+            answer = answers.get(request.custom_id) or {"error": "Missing from the batch results"}
+            verdict = self.judge._parse_verdict(answer["text"]) if "text" in answer else None
+            if verdict is not None:
+                request.status = JudgeBatchStatus.COMPLETED
+                request.verdict = {**verdict, "judge_model": request.model}
+                request.completed_at = datetime.utcnow()
+                answered += 1
+            else:
+                request.attempts = (request.attempts or 0) + 1
+                request.last_error = answer.get("error") or "Unparseable judge verdict"
+                if request.attempts < settings.JUDGE_BATCH_MAX_ATTEMPTS:
+                    request.status = JudgeBatchStatus.PENDING
+                    request.batch_id = None
+                    continue
+                # Out of attempts: the resumed arena is judged in real time
+                request.status = JudgeBatchStatus.FAILED
+                request.completed_at = datetime.utcnow()
+            self.queue.enqueue(db, request.arena_id, commit=False)
+        db.commit()
+        
+        logger.info(f"Judge batch {batch_id} finished: {answered}/{len(requests)} verdict(s)")
+        return answered
+    
+    def _set_batch(self, db: Session, claim: str, **values):
+        """Update every request of a claimed batch"""
+        db.execute(
+            update(JudgeBatchRequest)
+            .where(JudgeBatchRequest.batch_id == claim)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
@@ -0,0 +1,224 @@
+"""
+Judge prompt assembly
+Token-budgeted judge prompts with structural truncation of large outputs
+"""
+
+import json
+import math
+from typing import Any, Dict, List
+from app.config import settings
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # Not installed, or the encoding cannot be loaded offline
+    _ENCODING = None
+
+
+# Context windows (tokens) by model name prefix; longest match wins
+MODEL_CONTEXT_TOKENS = {
+    "claude": 200000,
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4-1106": 128000,
+    "gpt-4-0125": 128000,
+    "gpt-4-32k": 32768,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+}
+DEFAULT_CONTEXT_TOKENS = 8192
+
+# Tokens kept back for the judge's answer
+RESPONSE_TOKENS = 2000
+
+PROMPT_HEADER = """You are an AI judge evaluating agent performance in a competitive arena.
+
+BOUNTY CRITERIA:
+{criteria}
+
+AGENT RESULTS:
+"""
+
+AGENT_SECTION = """
+Agent {number}:
+- Output: {output}
+- Execution Time: {execution_time:.2f}s
+- Tokens Used: {tokens_used}
+- Success: {success}
+"""
+
+PROMPT_FOOTER = """
+TASK:
+Evaluate each agent's performance based on:
+1. How well they met the bounty criteria
+2. Quality of output
+3. Efficiency (execution time, resource usage)
+4. Innovation and approach
+
+Outputs marked as truncated or with "... more" entries were shortened to fit;
+judge them on what is shown and the sizes reported.
+
+Return a JSON object with:
+{
+  "scores": [
+    {"agent_id": 1, "score": 85.5, "rank": 1, "feedback": "..."},
+    ...
+  ],
+  "winner_id": 1,
+  "overall_feedback": "..."
+}
+
+Score range: 0-100. Higher is better.
+"""
+
+
+def count_tokens(text: str) -> int:
+    """Token count of text: exact with tiktoken installed, else ~4 characters per token"""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / 4)
+
+
+def context_tokens(model: str) -> int:
+    """Context window of a judge model"""
+    model = (model or "").lower()
+    matches = [prefix for prefix in MODEL_CONTEXT_TOKENS if model.startswith(prefix) or prefix in model]
+    return MODEL_CONTEXT_TOKENS[max(matches, key=len)] if matches else DEFAULT_CONTEXT_TOKENS
+
+
+def prompt_budget(models: List[str]) -> int:
+    """Prompt tokens that fit every given judge model, capped at JUDGE_PROMPT_TOKEN_BUDGET"""
+    budget = settings.JUDGE_PROMPT_TOKEN_BUDGET
+    for model in models:
+        budget = min(budget, context_tokens(model) - RESPONSE_TOKENS)
+    return max(budget, 1000)
+
+
+# (entries kept per list/object, characters kept per string), loosest first
+_SHRINK_STEPS = [
+    (50, 2000), (30, 1000), (20, 600), (14, 400), (10, 250), (7, 160),
+    (5, 100), (3, 60), (2, 40), (1, 20)
+]
+
+
+def _shrink(value: Any, max_items: int, max_chars: int) -> Any:
+    """Copy of a JSON value with long strings cut and long lists/objects elided, keeping its shape"""
+    if isinstance(value, str):
+        if len(value) > max_chars:
+            return f"{value[:max_chars]}... [{len(value) - max_chars} more chars]"
+        return value
+    if isinstance(value, list):
+        shrunk = [_shrink(item, max_items, max_chars) for item in value[:max_items]]
+        if len(value) > max_items:
+            shrunk.append(f"... {len(value) - max_items} more items")
+        return shrunk
+    if isinstance(value, dict):
+        keys = list(value)
+        shrunk = {str(key): _shrink(value[key], max_items, max_chars) for key in keys[:max_items]}
+        if len(keys) > max_items:
+            shrunk["..."] = f"{len(keys) - max_items} more keys"
+        return shrunk
+    return value
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Cut plain text to roughly max_tokens, saying how much was dropped"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    # Characters per token of this text, so one cut lands close to the budget
+    keep = max(0, int(len(text) * max_tokens / max(1, count_tokens(text))) - 20)
+    return f"{text[:keep]}... [truncated, {len(text)} chars in total]"
+
+
+def format_output(output: Any, max_tokens: int) -> str:
+    """
+    An agent output as prompt text within max_tokens
+    
+    Strings are cut at the end. JSON outputs are truncated structurally:
+    every level keeps its first entries and reports how many were elided,
+    with string and list limits tightened step by step until the result
+    fits, so the judge still sees the output's shape and sizes.
+    """
+    if output is None:
+        return "N/A"
+    if isinstance(output, str):
+        return truncate_text(output, max_tokens)
+    
+    text = json.dumps(output, default=str, separators=(",", ":"))
+    for max_items, max_chars in _SHRINK_STEPS:
+        if count_tokens(text) <= max_tokens:
+            break
+        text = json.dumps(_shrink(output, max_items, max_chars), default=str, separators=(",", ":"))
+    return truncate_text(text, max_tokens)
+
+
+class JudgePromptBuilder:
+    """
+    Builds judge prompts within a token budget
+    
+    The fixed header (criteria) and footer (instructions) are counted once;
+    the rest of the budget is shared between agents by water-filling: agents
+    whose output is short get all they need, and what they leave over is
+    split evenly among the longer ones. The prompt is then assembled in a
+    single join, so its size is known before it is sent.
+    """
+    
+    def __init__(self, criteria: Dict[str, Any], token_budget: int):
+        self.header = PROMPT_HEADER.format(criteria=json.dumps(criteria, indent=2, default=str))
+        self.token_budget = token_budget
+        self.fixed_tokens = count_tokens(self.header) + count_tokens(PROMPT_FOOTER)
+        self.section_tokens = count_tokens(self._section(99, {"execution_time_seconds": 0, "tokens_used": 0}, ""))
+    
+    @property
+    def agent_budget(self) -> int:
+        """Tokens available for agent sections"""
+        return max(0, self.token_budget - self.fixed_tokens)
+    
+    def output_tokens(self, result: Dict[str, Any]) -> int:
+        """Tokens an agent's untruncated output would take"""
+        output = result.get("output")
+        if output is None:
+            return count_tokens("N/A")
+        if isinstance(output, str):
+            return count_tokens(output)
+        return count_tokens(json.dumps(output, default=str, separators=(",", ":")))
+    
+    def allocate(self, results: List[Dict[str, Any]]) -> List[int]:
+        """Output token budget per agent, shared out proportionally to need"""
+        available = self.agent_budget - self.section_tokens * len(results)
+        needs = [self.output_tokens(result) for result in results]
+        allocation = [0] * len(results)
+        remaining = sorted(range(len(results)), key=lambda i: needs[i])
+        while remaining:
+            share = max(0, available) // len(remaining)
+            i = remaining[0]
+            if needs[i] <= share:
+                # Short output: fully included, the rest is shared among the others
+                allocation[i] = needs[i]
+                available -= needs[i]
+                remaining.pop(0)
+            else:
+                for j in remaining:
+                    allocation[j] = share
+                break
+        return allocation
+    
+    def build(self, results: List[Dict[str, Any]]) -> str:
+        """The full prompt for these results, within the token budget"""
+        allocation = self.allocate(results)
+        parts = [self.header]
+        parts.extend(
+            self._section(i + 1, result, format_output(result.get("output"), tokens))
+            for i, (result, tokens) in enumerate(zip(results, allocation))
+        )
+        parts.append(PROMPT_FOOTER)
+        return "".join(parts)
+    
+    def _section(self, number: int, result: Dict[str, Any], output: str) -> str:
+        return AGENT_SECTION.format(
+            number=number,
+            output=output,
+            execution_time=result.get("execution_time_seconds") or 0,
+            tokens_used=result.get("tokens_used", 0),
+            success=result.get("success", False)
+        )
@@ -0,0 +1,282 @@
+"""
+Deterministic metric evaluator
+Scores structured agent outputs against machine-checkable bounty criteria
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+
+# Fields counted by field_completeness when the criteria do not list them
+DEFAULT_LEAD_FIELDS = ("company", "contact", "phone", "industry")
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[A-Za-z]{2,}$")
+
+
+class Metric:
+    """
+    A registered metric
+    
+    compute(outputs, criterion) gets every participant's output at once and
+    returns one raw value per participant (NaN where it cannot be measured),
+    so a whole arena is evaluated in a handful of array operations.
+    """
+    
+    def __init__(self, name: str, compute: Callable, higher_is_better: bool = True, description: str = ""):
+        self.name = name
+        self.compute = compute
+        self.higher_is_better = higher_is_better
+        self.description = description
+
+
+METRICS: Dict[str, Metric] = {}
+
+
+def register_metric(name: str, higher_is_better: bool = True):
+    """Decorator registering a batched metric under a criteria name"""
+    def decorator(compute: Callable) -> Callable:
+        METRICS[name] = Metric(name, compute, higher_is_better, (compute.__doc__ or "").strip())
+        return compute
+    return decorator
+
+
+def _leads(output: Any) -> Optional[List[Dict[str, Any]]]:
+    """Lead records of an output: {"leads": [...]} or a bare list of dicts"""
+    if isinstance(output, dict):
+        output = output.get("leads")
+    if isinstance(output, list):
+        return [lead for lead in output if isinstance(lead, dict)]
+    return None
+
+
+def _text(output: Any) -> Optional[str]:
+    if isinstance(output, str):
+        return output
+    if isinstance(output, dict):
+        for key in ("content", "text", "output"):
+            if isinstance(output.get(key), str):
+                return output[key]
+    return None
+
+
+def _flatten_leads(outputs: List[Any]) -> Tuple[List[Dict[str, Any]], np.ndarray, np.ndarray]:
+    """
+    Every participant's leads in one flat list
+    
+    Returns:
+        (leads, owner index per lead, lead count per participant with NaN
+        for outputs that have no leads at all)
+    """
+    leads: List[Dict[str, Any]] = []
+    owners: List[int] = []
+    counts = np.full(len(outputs), np.nan)
+    for i, output in enumerate(outputs):
+        records = _leads(output)
+        if records is None:
+            continue
+        counts[i] = len(records)
+        leads.extend(records)
+        owners.extend([i] * len(records))
+    return leads, np.asarray(owners, dtype=np.int64), counts
+
+
+def _per_participant_mean(values: np.ndarray, owners: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Mean of per-lead values for each participant; NaN without leads"""
+    totals = np.bincount(owners, weights=values, minlength=len(counts)) if len(owners) else np.zeros(len(counts))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, totals / counts, np.nan)
+
+
+@register_metric("lead_count")
+def lead_count(outputs: List[Any], criterion: Dict[str, Any]) -> np.ndarray:
+    """Number of leads returned"""
+    _, _, counts = _flatten_leads(outputs)
+    return counts
+
+
+@register_metric("field_completeness")
+def field_completeness(outputs: List[Any], criterion: Dict[str, Any]) -> np.ndarray:
+    """Fraction of required lead fields that are filled in (0-1)"""
+    fields = criterion.get("fields") or DEFAULT_LEAD_FIELDS
+    leads, owners, counts = _flatten_leads(outputs)
+    filled = np.zeros(len(leads))
+    for field in fields:
+        # Empty strings, lists and dicts are missing; 0 and False are values
+        filled += np.fromiter(
+            (bool(value or value == 0) for value in (lead.get(field) for lead in leads)),
+            dtype=bool,
+            count=len(leads)
+        )
+    return _per_participant_mean(filled / len(fields), owners, counts)
+
+
+@register_metric("duplicate_rate", higher_is_better=False)
+def duplicate_rate(outputs: List[Any], criterion: Dict[str, Any]) -> np.ndarray:
+    """Fraction of a participant's leads that repeat an earlier lead (0-1)"""
+    key_field = criterion.get("key", "contact")
+    leads, owners, counts = _flatten_leads(outputs)
+    if not leads:
+        return np.full(len(outputs), np.nan)
+    # Intern keys to integers so (participant, key) pairs become one int64 each
+    key_ids: Dict[str, int] = {}
+    keys = np.fromiter(
+        (key_ids.setdefault(str(lead.get(key_field, lead.get("company", ""))).strip().lower(), len(key_ids))
+         for lead in leads),
+        dtype=np.int64,
+        count=len(leads)
+    )
+    # A lead is unique the first time its (participant, key) pair appears
+    _, first = np.unique(owners * max(1, len(key_ids)) + keys, return_index=True)
+    duplicate = np.ones(len(leads))
+    duplicate[first] = 0.0
+    return _per_participant_mean(duplicate, owners, counts)
+
+
+@register_metric("email_validity")
+def email_validity(outputs: List[Any], criterion: Dict[str, Any]) -> np.ndarray:
+    """Fraction of leads whose email (or contact) field is a well-formed address (0-1)"""
+    field = criterion.get("field")
+    leads, owners, counts = _flatten_leads(outputs)
+    valid = np.fromiter(
+        (bool(_EMAIL_RE.match(str(lead.get(field) if field else lead.get("email", lead.get("contact", "")))))
+         for lead in leads),
+        dtype=np.float64,
+        count=len(leads)
+    )
+    return _per_participant_mean(valid, owners, counts)
+
+
+@register_metric("word_count")
+def word_count(outputs: List[Any], criterion: Dict[str, Any]) -> np.ndarray:
+    """Words in a text output"""
+    texts = [_text(output) for output in outputs]
+    return np.array([len(text.split()) if text is not None else np.nan for text in texts], dtype=np.float64)
+
+
+def reported_value(outputs: List[Any], name: str) -> np.ndarray:
+    """
+    A numeric field the agent reports about itself, e.g. conversion_rate
+    
+    Nothing checks these numbers, so they only count for criteria that opt
+    in with "self_reported": true.
+    """
+    values = np.full(len(outputs), np.nan)
+    for i, output in enumerate(outputs):
+        value = output.get(name) if isinstance(output, dict) else None
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[i] = value
+    return values
+
+
+def _criteria_list(criteria: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """{"metric": ...} or {"metrics": [{"metric": ...}, ...]} as a list"""
+    if isinstance(criteria.get("metrics"), list):
+        return [c for c in criteria["metrics"] if isinstance(c, dict) and c.get("metric")]
+    if criteria.get("metric"):
+        return [criteria]
+    return []
+
+
+def is_objective(criteria: Dict[str, Any]) -> bool:
+    """Whether evaluate_metrics can score the criteria: every metric is registered or opted in as self_reported"""
+    if not isinstance(criteria, dict) or criteria.get("judge") == "llm":
+        return False
+    criteria_list = _criteria_list(criteria)
+    return bool(criteria_list) and all(
+        criterion["metric"] in METRICS or criterion.get("self_reported") is True
+        for criterion in criteria_list
+    )
+
+
+def _scale(values: np.ndarray, target: Optional[float], higher_is_better: bool) -> np.ndarray:
+    """Raw metric values -> 0-100, against the target or else against the best participant"""
+    if target is None:
+        if np.isnan(values).all():
+            return np.zeros(len(values))
+        target = float(np.nanmax(values) if higher_is_better else np.nanmin(values))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if higher_is_better:
+            scaled = values / target if target > 0 else np.where(values >= target, 1.0, 0.0)
+        else:
+            # A target of zero (e.g. no duplicates) scores rates linearly down from 1
+            scaled = np.where(values <= target, 1.0, target / values) if target > 0 else 1.0 - values
+    scaled = np.nan_to_num(scaled, nan=0.0)
+    return np.clip(scaled, 0.0, 1.0) * 100.0
+
+
+def evaluate_metrics(criteria: Dict[str, Any], agent_results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Score an arena on objective metrics, in the judge's result format
+    
+    Criteria name registered metrics, optionally with a target and a weight:
+        {"metric": "lead_count", "target": 100}
+        {"metrics": [{"metric": "lead_count", "target": 100, "weight": 2},
+                     {"metric": "duplicate_rate", "target": 0.05}]}
+    A numeric field the agents report about themselves (such as
+    conversion_rate) is only scored when its criterion says so with
+    "self_reported": true; any other unregistered name leaves the arena to
+    the LLM judge, since agents could otherwise claim whatever value wins.
+    Each metric scores 0-100 (against the target, or else the best
+    participant); the weighted mean is the participant's score. Failed
+    executions score 0.
+    
+    Returns:
+        Judge-shaped results, or None when the criteria are not objective
+        (no metric, "judge": "llm", an unregistered metric that is not
+        self_reported, or a metric nobody's output can measure), leaving the
+        arena to the LLM judge
+    """
+    if not agent_results or not is_objective(criteria):
+        return None
+    criteria_list = _criteria_list(criteria)
+    
+    outputs = [result.get("output") for result in agent_results]
+    succeeded = np.array([bool(result.get("success")) for result in agent_results])
+    weights = []
+    columns = []
+    measured: List[Tuple[Dict[str, Any], List[Optional[float]]]] = []
+    for criterion in criteria_list:
+        name = criterion["metric"]
+        metric = METRICS.get(name)
+        values = metric.compute(outputs, criterion) if metric else reported_value(outputs, name)
+        if np.isnan(values[succeeded]).all():
+            # Nothing any successful participant produced can be measured this way
+            return None
+        target = criterion.get("target")
+        columns.append(_scale(values, float(target) if target is not None else None,
+                              metric.higher_is_better if metric else True))
+        weights.append(float(criterion.get("weight", 1.0)))
+        measured.append((criterion, [None if np.isnan(v) else round(float(v), 4) for v in values]))
+    if sum(weights) <= 0:
+        return None
+    
+    matrix = np.vstack(columns)  # metrics x participants
+    scores = np.where(succeeded, np.average(matrix, axis=0, weights=weights), 0.0)
+    
+    # Best score first; ties go to the faster execution
+    times = np.array([result.get("execution_time_seconds") or 0.0 for result in agent_results], dtype=np.float64)
+    order = np.lexsort((times, -scores))
+    
+    ranked = []
+    for rank, i in enumerate(order, start=1):
+        feedback = ", ".join(
+            f"{criterion['metric']}={values[i]}"
+            + (f" (target {criterion['target']})" if criterion.get("target") is not None else "")
+            for criterion, values in measured
+        )
+        ranked.append({
+            "agent_id": int(i) + 1,
+            "score": round(float(scores[i]), 2),
+            "rank": rank,
+            "feedback": feedback if succeeded[i] else f"Execution failed; {feedback}"
+        })
+    
+    names = [criterion["metric"] for criterion, _ in measured]
+    return {
+        "scores": ranked,
+        "winner_id": ranked[0]["agent_id"],
+        "overall_feedback": f"Scored on objective metrics: {', '.join(names)}",
+        "metrics": {criterion["metric"]: values for criterion, values in measured},
+        "judge_model": "metrics"
+    }
@@ -0,0 +1,378 @@
+"""
+AI provider gateway
+Shared, pooled HTTP clients and a unified completion call for agent providers
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+import httpx
+from loguru import logger
+from app.config import settings
+from app.services.rate_limiter import ProviderRateLimiter
+from app.services.response_cache import ResponseCache
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+
+# Providers that speak the OpenAI chat completions API
+_OPENAI_COMPATIBLE = {"openai", "grok", "custom"}
+
+# Statuses worth retrying after backing off (rate limited, overloaded)
+_RETRY_STATUSES = {429, 503, 529}
+
+ANTHROPIC_VERSION = "2023-06-01"
+
+
+class ProviderError(Exception):
+    """A provider request failed"""
+    
+    def __init__(self, message: str, status_code: int = None, retry_after: float = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class ProviderGateway:
+    """
+    One long-lived pooled HTTP client per provider, base URL and API key
+    
+    Clients keep connections alive between executions (and use HTTP/2 when the
+    h2 package is installed), so concurrent arenas reuse established TLS
+    connections instead of opening one per agent call. The least recently used
+    client is evicted once more than PROVIDER_MAX_CLIENTS keys are in use; it
+    is closed as soon as the requests still running on it (see session())
+    have finished.
+    
+    Every call goes through the shared ProviderRateLimiter for its key.
+    Deterministic calls (temperature 0) are answered from the ResponseCache
+    when PROVIDER_CACHE_ENABLED is set.
+    """
+    
+    def __init__(
+        self,
+        max_clients: int = None,
+        rate_limiter: ProviderRateLimiter = None,
+        cache: ResponseCache = None
+    ):
+        self.max_clients = max_clients or settings.PROVIDER_MAX_CLIENTS
+        self.rate_limiter = rate_limiter or ProviderRateLimiter()
+        self.cache = cache or (ResponseCache() if settings.PROVIDER_CACHE_ENABLED else None)
+        self._clients: "OrderedDict[Tuple[str, str, str], httpx.AsyncClient]" = OrderedDict()
+        # Requests running per client, and evicted clients waiting for theirs to finish
+        self._in_flight: Dict[httpx.AsyncClient, int] = {}
+        self._evicted: set = set()
+    
+    def default_api_key(self, provider: str) -> str:
+        """Platform API key for a provider, if one is configured"""
+        return {
+            "openai": settings.OPENAI_API_KEY,
+            "anthropic": settings.ANTHROPIC_API_KEY,
+            "google": settings.GOOGLE_API_KEY,
+            "grok": settings.GROK_API_KEY
+        }.get(provider, "")
+    
+    def default_base_url(self, provider: str) -> str:
+        return {
+            "openai": settings.OPENAI_BASE_URL,
+            "anthropic": settings.ANTHROPIC_BASE_URL,
+            "google": settings.GOOGLE_BASE_URL,
+            "grok": settings.GROK_BASE_URL
+        }.get(provider, "")
+    
+    def is_configured(self, provider: str, api_key: str = None, base_url: str = None) -> bool:
+        """Whether complete() has the credentials and endpoint it needs"""
+        api_key, base_url = self._resolve(provider, api_key, base_url)
+        return bool(api_key and base_url)
+    
+    def client(self, provider: str, api_key: str, base_url: str) -> httpx.AsyncClient:
+        """Pooled client for a provider, base URL and key, created on first use"""
+        key = self._key(provider, api_key, base_url)
+        client = self._clients.get(key)
+        if client is not None:
+            self._clients.move_to_end(key)
+            return client
+        
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            http2=_HTTP2_AVAILABLE and settings.PROVIDER_HTTP2,
+            timeout=httpx.Timeout(settings.PROVIDER_TIMEOUT_SECONDS, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=settings.PROVIDER_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.PROVIDER_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.PROVIDER_KEEPALIVE_EXPIRY_SECONDS
+            ),
+            headers=self._auth_headers(provider, api_key)
+        )
+        self._clients[key] = client
+        
+        while len(self._clients) > self.max_clients:
+            _, evicted = self._clients.popitem(last=False)
+            if self._in_flight.get(evicted):
+                self._evicted.add(evicted)
+            else:
+                self._schedule_close(evicted)
+        return client
+    
+    @asynccontextmanager
+    async def session(self, provider: str, api_key: str, base_url: str) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        Pooled client for a run of requests
+        
+        The client is counted as in use until the block exits, so evicting it
+        meanwhile defers closing it instead of failing the requests.
+        """
+        client = self.client(provider, api_key, base_url)
+        self._in_flight[client] = self._in_flight.get(client, 0) + 1
+        try:
+            yield client
+        finally:
+            self._in_flight[client] -= 1
+            if not self._in_flight[client]:
+                del self._in_flight[client]
+                if client in self._evicted:
+                    self._evicted.discard(client)
+                    await client.aclose()
+    
+    async def complete(
+        self,
+        provider: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        system: str = None,
+        max_tokens: int = 1024,
+        temperature: float = 0.7,
+        api_key: str = None,
+        base_url: str = None,
+        timeout: float = None,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Run one chat completion on any supported provider
+        
+        Args:
+            provider: AgentProvider value (openai, anthropic, google, grok, custom)
+            model: Provider model name
+            messages: [{"role": "user" | "assistant", "content": "..."}]
+            system: Optional system prompt
+            api_key: Overrides the platform key for this provider
+            base_url: Overrides the provider endpoint (required for custom)
+            use_cache: Allow a cached response for a deterministic call
+        
+        Returns:
+            {"text", "input_tokens", "output_tokens", "tokens_used", "model",
+             "provider", "latency_seconds", "cached"}
+        
+        Rate-limited (429) and overloaded responses are retried up to
+        PROVIDER_MAX_RETRIES times after the limiter's backoff.
+        
+        Raises:
+            ProviderError: on HTTP errors, with the status code and any Retry-After
+        """
+        provider = getattr(provider, "value", provider)
+        api_key, base_url = self._resolve(provider, api_key, base_url)
+        if not api_key or not base_url:
+            raise ProviderError(f"Provider {provider} is not configured")
+        
+        cache_key = None
+        if self.cache and use_cache and temperature == 0:
+            cache_key = ResponseCache.key({
+                "provider": provider,
+                "base_url": base_url,
+                "model": model,
+                "messages": messages,
+                "system": system,
+                "max_tokens": max_tokens,
+                "temperature": temperature
+            })
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return {**cached, "latency_seconds": 0.0, "cached": True}
+        
+        if provider in _OPENAI_COMPATIBLE:
+            path, body = self._openai_request(model, messages, system, max_tokens, temperature)
+        elif provider == "anthropic":
+            path, body = self._anthropic_request(model, messages, system, max_tokens, temperature)
+        elif provider == "google":
+            path, body = self._google_request(model, messages, system, max_tokens, temperature)
+        else:
+            raise ProviderError(f"Unsupported provider: {provider}")
+        
+        limit_key = self._key(provider, api_key, base_url)
+        estimated_tokens = self._estimate_tokens(messages, system, max_tokens)
+        
+        attempt = 0
+        async with self.session(provider, api_key, base_url) as client:
+            while True:
+                await self.rate_limiter.acquire(limit_key, provider, estimated_tokens)
+                start = time.perf_counter()
+                try:
+                    response = await client.post(path, json=body, timeout=timeout or httpx.USE_CLIENT_DEFAULT)
+                except httpx.TimeoutException as e:
+                    raise ProviderError(f"{provider} request timed out: {e}") from e
+                except httpx.HTTPError as e:
+                    raise ProviderError(f"{provider} request failed: {e}") from e
+                latency = time.perf_counter() - start
+                
+                if response.status_code in _RETRY_STATUSES:
+                    retry_after = self._retry_after(response)
+                    self.rate_limiter.record_rate_limited(limit_key, retry_after, attempt)
+                    if attempt < settings.PROVIDER_MAX_RETRIES:
+                        attempt += 1
+                        continue
+                if response.status_code >= 400:
+                    raise ProviderError(
+                        f"{provider} returned HTTP {response.status_code}: {response.text[:500]}",
+                        status_code=response.status_code,
+                        retry_after=self._retry_after(response)
+                    )
+                break
+        
+        data = response.json()
+        if provider in _OPENAI_COMPATIBLE:
+            result = self._parse_openai(data)
+        elif provider == "anthropic":
+            result = self._parse_anthropic(data)
+        else:
+            result = self._parse_google(data)
+        
+        tokens_used = result["input_tokens"] + result["output_tokens"]
+        self.rate_limiter.record_usage(limit_key, estimated_tokens, tokens_used)
+        self.rate_limiter.record_success(limit_key)
+        
+        result.update({
+            "tokens_used": tokens_used,
+            "model": data.get("model", model),
+            "provider": provider,
+            "latency_seconds": latency,
+            "cached": False
+        })
+        if cache_key:
+            await self.cache.put(cache_key, result)
+        return result
+    
+    async def close(self):
+        """Close every pooled client"""
+        clients = list(self._clients.values()) + list(self._evicted)
+        self._clients.clear()
+        self._evicted.clear()
+        for client in clients:
+            await client.aclose()
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self._clients),
+            "evicted_in_use": len(self._evicted),
+            "rate_limits": self.rate_limiter.stats(),
+            "cache": self.cache.stats if self.cache else None
+        }
+    
+    def _key(self, provider: str, api_key: str, base_url: str) -> Tuple[str, str, str]:
+        return (provider, base_url, hashlib.sha256(api_key.encode()).hexdigest())
+    
+    def _estimate_tokens(self, messages: List[Dict[str, str]], system: str, max_tokens: int) -> int:
+        """Rough token count charged up front (~4 characters per token plus the output budget)"""
+        chars = sum(len(m.get("content") or "") for m in messages) + len(system or "")
+        return chars // 4 + max_tokens
+    
+    def _resolve(self, provider: str, api_key: str = None, base_url: str = None) -> Tuple[str, str]:
+        """
+        Fill in the platform key and endpoint
+        
+        The platform key is only ever sent to the platform's own endpoint, never
+        to a base_url supplied by an agent.
+        """
+        provider = getattr(provider, "value", provider)
+        if base_url:
+            return api_key or "", base_url
+        return api_key or self.default_api_key(provider), self.default_base_url(provider)
+    
+    def _schedule_close(self, client: httpx.AsyncClient):
+        """Close an evicted client in the background"""
+        try:
+            asyncio.get_running_loop().create_task(client.aclose())
+        except RuntimeError:
+            pass
+    
+    def _auth_headers(self, provider: str, api_key: str) -> Dict[str, str]:
+        if provider == "anthropic":
+            return {"x-api-key": api_key, "anthropic-version": ANTHROPIC_VERSION}
+        if provider == "google":
+            return {"x-goog-api-key": api_key}
+        return {"Authorization": f"Bearer {api_key}"}
+    
+    def _retry_after(self, response: httpx.Response) -> Optional[float]:
+        """Seconds to wait from a Retry-After header (numeric form only)"""
+        value = response.headers.get("retry-after")
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+    
+    def _openai_request(self, model, messages, system, max_tokens, temperature):
+        if system:
+            messages = [{"role": "system", "content": system}] + messages
+        return "chat/completions", {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+    
+    def _anthropic_request(self, model, messages, system, max_tokens, temperature):
+        body = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        if system:
+            body["system"] = system
+        return "v1/messages", body
+    
+    def _google_request(self, model, messages, system, max_tokens, temperature):
+        body = {
+            "contents": [
+                {"role": "model" if m["role"] == "assistant" else "user", "parts": [{"text": m["content"]}]}
+                for m in messages
+            ],
+            "generationConfig": {"maxOutputTokens": max_tokens, "temperature": temperature}
+        }
+        if system:
+            body["systemInstruction"] = {"parts": [{"text": system}]}
+        return f"v1beta/models/{model}:generateContent", body
+    
+    def _parse_openai(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        usage = data.get("usage") or {}
+        choices = data.get("choices") or [{}]
+        return {
+            "text": (choices[0].get("message") or {}).get("content") or "",
+            "input_tokens": usage.get("prompt_tokens", 0),
+            "output_tokens": usage.get("completion_tokens", 0)
+        }
+    
+    def _parse_anthropic(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        usage = data.get("usage") or {}
+        return {
+            "text": "".join(block.get("text", "") for block in data.get("content", []) if block.get("type") == "text"),
+            "input_tokens": usage.get("input_tokens", 0),
+            "output_tokens": usage.get("output_tokens", 0)
+        }
+    
+    def _parse_google(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        usage = data.get("usageMetadata") or {}
+        candidates = data.get("candidates") or [{}]
+        parts = (candidates[0].get("content") or {}).get("parts", [])
+        return {
+            "text": "".join(part.get("text", "") for part in parts),
+            "input_tokens": usage.get("promptTokenCount", 0),
+            "output_tokens": usage.get("candidatesTokenCount", 0)
+        }
@@ -0,0 +1,219 @@
+"""
+Provider rate limiting
+Token buckets per provider key with fair queuing across arenas and adaptive backoff
+"""
+
+import asyncio
+import contextvars
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Hashable, Optional, Tuple
+from loguru import logger
+from app.config import settings
+
+
+# Arena the current task is executing for; requests are queued fairly between arenas
+current_arena: contextvars.ContextVar = contextvars.ContextVar("current_arena", default=None)
+
+# Bounds of the adaptive rate multiplier
+_MIN_RATE_FACTOR = 0.1
+_RATE_INCREASE = 0.05
+_RATE_DECREASE = 0.5
+
+
+class TokenBucket:
+    """
+    Refills at `rate` units per second up to `capacity`
+    
+    A request larger than the whole bucket is let through once the bucket is
+    full and leaves it in debt, so oversized requests are slowed rather than
+    blocked forever.
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+    
+    def _refill(self, now: float, rate_factor: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate * rate_factor)
+        self.updated = now
+    
+    def wait_time(self, amount: float, rate_factor: float = 1.0) -> float:
+        """Seconds until `amount` can be taken at the current adjusted rate"""
+        now = time.monotonic()
+        self._refill(now, rate_factor)
+        needed = min(amount, self.capacity)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / (self.rate * rate_factor)
+    
+    def take(self, amount: float):
+        self.tokens -= amount
+    
+    def give_back(self, amount: float):
+        self.tokens = min(self.capacity, self.tokens + amount)
+    
+    def drain(self):
+        """Empty the bucket so it restarts from zero instead of bursting"""
+        self.tokens = min(self.tokens, 0.0)
+        self.updated = time.monotonic()
+
+
+class _KeyLimiter:
+    """Buckets, backoff state and the fair request queue of one provider key"""
+    
+    def __init__(self, rpm: int, tpm: int, headroom: float):
+        # One second of burst: enough to keep the pipe full without tripping
+        # the provider's own per-second smoothing
+        self.requests = TokenBucket(rpm * headroom / 60, max(1.0, rpm * headroom / 60)) if rpm else None
+        self.tokens = TokenBucket(tpm * headroom / 60, max(1.0, tpm * headroom / 60)) if tpm else None
+        self.rate_factor = 1.0
+        self.blocked_until = 0.0
+        # Arena -> waiting (future, estimated tokens), served round robin
+        self.queues: Dict[Hashable, Deque[Tuple[asyncio.Future, int]]] = {}
+        self.order: Deque[Hashable] = deque()
+        self.dispatcher: Optional[asyncio.Task] = None
+    
+    def wait_time(self, estimated_tokens: int) -> float:
+        wait = max(0.0, self.blocked_until - time.monotonic())
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1, self.rate_factor))
+        if self.tokens:
+            wait = max(wait, self.tokens.wait_time(estimated_tokens, self.rate_factor))
+        return wait
+    
+    def take(self, estimated_tokens: int):
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens:
+            self.tokens.take(estimated_tokens)
+
+
+class ProviderRateLimiter:
+    """
+    Request-per-minute and token-per-minute buckets per provider key
+    
+    Every call waits in a queue per arena; a dispatcher per key grants calls
+    round robin across arenas as the buckets allow, so one large arena cannot
+    starve the others. Rates run at PROVIDER_RATE_LIMIT_HEADROOM of the quota
+    and adapt AIMD-style: a 429 halves the rate and pauses the key until
+    Retry-After, and each success adds back a little, so throughput settles
+    just under the quota instead of alternating bursts and lockouts.
+    
+    Buckets are per process: with several worker processes, configure each
+    with its share of the quota.
+    """
+    
+    def __init__(self, headroom: float = None):
+        self.headroom = headroom or settings.PROVIDER_RATE_LIMIT_HEADROOM
+        self._keys: Dict[Hashable, _KeyLimiter] = {}
+    
+    def quota(self, provider: str) -> Tuple[int, int]:
+        """(requests per minute, tokens per minute) for a provider; 0 = unlimited"""
+        return {
+            "openai": (settings.OPENAI_RPM, settings.OPENAI_TPM),
+            "anthropic": (settings.ANTHROPIC_RPM, settings.ANTHROPIC_TPM),
+            "google": (settings.GOOGLE_RPM, settings.GOOGLE_TPM),
+            "grok": (settings.GROK_RPM, settings.GROK_TPM)
+        }.get(provider, (settings.PROVIDER_DEFAULT_RPM, settings.PROVIDER_DEFAULT_TPM))
+    
+    def _limiter(self, key: Hashable, provider: str) -> Optional[_KeyLimiter]:
+        limiter = self._keys.get(key)
+        if limiter is None:
+            rpm, tpm = self.quota(provider)
+            if not rpm and not tpm:
+                return None
+            limiter = self._keys[key] = _KeyLimiter(rpm, tpm, self.headroom)
+        return limiter
+    
+    async def acquire(self, key: Hashable, provider: str, estimated_tokens: int):
+        """Wait for this arena's turn and for room in the key's buckets"""
+        limiter = self._limiter(key, provider)
+        if limiter is None:
+            return
+        
+        arena = current_arena.get()
+        # Fast path: nobody waiting and room right now
+        if not limiter.order and limiter.wait_time(estimated_tokens) == 0:
+            limiter.take(estimated_tokens)
+            return
+        
+        future = asyncio.get_running_loop().create_future()
+        if arena not in limiter.queues:
+            limiter.queues[arena] = deque()
+            limiter.order.append(arena)
+        limiter.queues[arena].append((future, estimated_tokens))
+        if limiter.dispatcher is None or limiter.dispatcher.done():
+            limiter.dispatcher = asyncio.create_task(self._dispatch(limiter))
+        await future
+    
+    def record_usage(self, key: Hashable, estimated_tokens: int, actual_tokens: int):
+        """Correct the token bucket once the real usage of a call is known"""
+        limiter = self._keys.get(key)
+        if limiter and limiter.tokens:
+            if actual_tokens > estimated_tokens:
+                limiter.tokens.take(actual_tokens - estimated_tokens)
+            else:
+                limiter.tokens.give_back(estimated_tokens - actual_tokens)
+    
+    def record_success(self, key: Hashable):
+        """Additive increase back towards the full rate"""
+        limiter = self._keys.get(key)
+        if limiter:
+            limiter.rate_factor = min(1.0, limiter.rate_factor + _RATE_INCREASE)
+    
+    def record_rate_limited(self, key: Hashable, retry_after: Optional[float], attempt: int = 0):
+        """Multiplicative decrease and a pause until the provider's Retry-After"""
+        limiter = self._keys.get(key)
+        if limiter is None:
+            # Unmetered key: no buckets, but still honour the pause
+            limiter = self._keys[key] = _KeyLimiter(0, 0, self.headroom)
+        now = time.monotonic()
+        # Calls already in flight when the key was paused report the same overload; cut the rate once
+        if now >= limiter.blocked_until:
+            limiter.rate_factor = max(_MIN_RATE_FACTOR, limiter.rate_factor * _RATE_DECREASE)
+        pause = retry_after if retry_after is not None else min(60.0, 2 ** attempt)
+        limiter.blocked_until = max(limiter.blocked_until, now + pause)
+        # Resume at the reduced rate rather than with a full bucket
+        for bucket in (limiter.requests, limiter.tokens):
+            if bucket:
+                bucket.drain()
+        logger.warning(
+            f"Provider rate limited; pausing {pause:.1f}s at {limiter.rate_factor:.0%} of quota"
+        )
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            ":".join(str(part)[:12] for part in key): {
+                "rate_factor": round(limiter.rate_factor, 3),
+                "waiting": sum(len(queue) for queue in limiter.queues.values())
+            }
+            for key, limiter in self._keys.items()
+        }
+    
+    async def _dispatch(self, limiter: _KeyLimiter):
+        """Grant queued calls round robin across arenas as capacity frees up"""
+        while limiter.order:
+            arena = limiter.order[0]
+            queue = limiter.queues[arena]
+            while queue and queue[0][0].done():
+                # Caller gave up (cancelled or timed out)
+                queue.popleft()
+            if not queue:
+                limiter.order.popleft()
+                del limiter.queues[arena]
+                continue
+            
+            future, estimated_tokens = queue[0]
+            wait = limiter.wait_time(estimated_tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            
+            limiter.take(estimated_tokens)
+            queue.popleft()
+            future.set_result(None)
+            # Next arena's turn
+            limiter.order.rotate(-1)
@@ -0,0 +1,161 @@
+"""
+Agent rating engine
+Multi-player Elo ratings and competition stats, updated as arenas complete
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.agent import Agent
+
+# (agent_id, rank, score) of one ranked participant
+Standing = Tuple[int, int, float]
+
+
+def rate(ratings: np.ndarray, games: np.ndarray, ranks: np.ndarray, k_factor: float, provisional_games: int) -> np.ndarray:
+    """
+    New ratings after one multi-player result, in O(participants)
+    
+    Each participant's actual score is the share of the field it finished
+    ahead of (ties count half). Its expected score is the Elo expectation
+    against the mean rating of everyone else, which keeps the update linear
+    in the field size instead of comparing every pair. Agents still in their
+    first provisional_games competitions move twice as fast.
+    """
+    n = len(ratings)
+    if n < 2:
+        return ratings.copy()
+    
+    _, inverse, counts = np.unique(ranks, return_inverse=True, return_counts=True)
+    behind = n - np.cumsum(counts)  # Finished strictly behind each distinct rank
+    actual = (behind[inverse] + 0.5 * (counts[inverse] - 1)) / (n - 1)
+    
+    opponents = (ratings.sum() - ratings) / (n - 1)
+    expected = 1.0 / (1.0 + 10.0 ** ((opponents - ratings) / 400.0))
+    
+    k = np.where(games < provisional_games, 2.0 * k_factor, k_factor)
+    return ratings + k * (actual - expected)
+
+
+class RatingEngine:
+    """
+    Maintains Agent.reputation_score (an Elo rating) and competition stats
+    
+    Stats are kept as {"rating", "competitions", "wins", "average_score"}
+    per agent; update() applies one arena to them, so the live path
+    (apply_arena) and the offline recompute (recompute_ratings.py) share
+    the same arithmetic.
+    """
+    
+    def __init__(self, initial: float = None, k_factor: float = None, provisional_games: int = None):
+        self.initial = initial if initial is not None else settings.RATING_INITIAL
+        self.k_factor = k_factor if k_factor is not None else settings.RATING_K_FACTOR
+        self.provisional_games = (
+            provisional_games if provisional_games is not None else settings.RATING_PROVISIONAL_GAMES
+        )
+    
+    def new_stats(self) -> Dict[str, Any]:
+        """Stats of an agent that has not competed yet"""
+        return {"rating": self.initial, "competitions": 0, "wins": 0, "average_score": 0.0}
+    
+    def update(
+        self,
+        stats: Dict[int, Dict[str, Any]],
+        standings: List[Standing],
+        winner_agent_id: Optional[int] = None
+    ) -> List[int]:
+        """
+        Apply one arena's standings to the stats of its agents, in place
+        
+        Agents missing from stats start from new_stats(). An agent entered
+        more than once counts once, at its best rank.
+        
+        Returns:
+            Ids of the agents that were updated
+        """
+        best: Dict[int, Standing] = {}
+        for standing in standings:
+            agent_id = standing[0]
+            if agent_id not in best or standing[1] < best[agent_id][1]:
+                best[agent_id] = standing
+        if not best:
+            return []
+        
+        agent_ids = list(best)
+        for agent_id in agent_ids:
+            if agent_id not in stats:
+                stats[agent_id] = self.new_stats()
+        
+        ratings = rate(
+            np.array([stats[a]["rating"] for a in agent_ids], dtype=np.float64),
+            np.array([stats[a]["competitions"] for a in agent_ids], dtype=np.int64),
+            np.array([best[a][1] for a in agent_ids], dtype=np.int64),
+            self.k_factor,
+            self.provisional_games
+        )
+        
+        for agent_id, rating in zip(agent_ids, ratings):
+            entry = stats[agent_id]
+            competitions = entry["competitions"] + 1
+            entry["rating"] = round(float(rating), 2)
+            # Rounded as stored, so live updates and a full recompute agree
+            average = entry["average_score"] + (float(best[agent_id][2] or 0) - entry["average_score"]) / competitions
+            entry["average_score"] = round(average, 4)
+            entry["competitions"] = competitions
+            entry["wins"] += 1 if agent_id == winner_agent_id else 0
+        return agent_ids
+    
+    def apply_arena(self, db: Session, standings: List[Standing], winner_agent_id: Optional[int] = None) -> int:
+        """
+        Update the ratings and stats of a completed arena's agents
+        
+        Touched agents are read in one query (locked FOR UPDATE where the
+        database supports it, so concurrent arenas sharing an agent do not
+        lose updates) and written back in one bulk UPDATE. Does not commit;
+        the caller's transaction finalizes the arena.
+        
+        Returns:
+            Number of agents updated
+        """
+        agent_ids = {standing[0] for standing in standings}
+        if not agent_ids:
+            return 0
+        rows = db.query(
+            Agent.id, Agent.reputation_score, Agent.total_competitions, Agent.total_wins, Agent.average_score
+        ).filter(Agent.id.in_(agent_ids)).with_for_update().all()
+        
+        stats = {
+            row.id: {
+                # Agents that never competed carry the column default, not a rating
+                "rating": row.reputation_score if row.total_competitions else self.initial,
+                "competitions": row.total_competitions or 0,
+                "wins": row.total_wins or 0,
+                "average_score": row.average_score or 0.0
+            }
+            for row in rows
+        }
+        updated = self.update(stats, [s for s in standings if s[0] in stats], winner_agent_id)
+        self.write(db, [(agent_id, stats[agent_id]) for agent_id in updated])
+        return len(updated)
+    
+    def write(self, db: Session, stats: Iterable[Tuple[int, Dict[str, Any]]]):
+        """Bulk UPDATE of agents' rating columns from their stats"""
+        rows = [self.columns(agent_id, entry) for agent_id, entry in stats]
+        if rows:
+            db.execute(update(Agent), rows)
+    
+    def columns(self, agent_id: int, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Agent column values for one agent's stats"""
+        competitions = entry["competitions"]
+        return {
+            "id": agent_id,
+            "reputation_score": entry["rating"],
+            "total_competitions": competitions,
+            "total_wins": entry["wins"],
+            "total_losses": competitions - entry["wins"],
+            "win_rate": entry["wins"] / competitions if competitions else 0.0,
+            "average_score": entry["average_score"]
+        }
@@ -0,0 +1,127 @@
+"""
+Provider response cache
+Content-addressed, size-bounded disk cache for deterministic provider calls
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+from loguru import logger
+from app.config import settings
+
+
+class ResponseCache:
+    """
+    Disk cache of provider completions, keyed by a hash of the normalized request
+    
+    Each entry is one JSON file under a two-character fan-out directory. Hits
+    touch the file's mtime, and writes evict the least recently used entries
+    once the cache grows past max_bytes. File I/O runs in a thread so the
+    event loop never blocks on disk.
+    """
+    
+    def __init__(self, directory: str = None, max_bytes: int = None):
+        self.directory = directory or settings.PROVIDER_CACHE_DIR
+        self.max_bytes = max_bytes or settings.PROVIDER_CACHE_MAX_MB * 1024 * 1024
+        self._size: Optional[int] = None  # Bytes on disk, computed on first write
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def key(request: Dict[str, Any]) -> str:
+        """Stable hash of a request: same provider, model, parameters and prompt, same key"""
+        normalized = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(normalized.encode()).hexdigest()
+    
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = await asyncio.to_thread(self._read, key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+    
+    async def put(self, key: str, value: Dict[str, Any]):
+        await asyncio.to_thread(self._write, key, value)
+    
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._remove, self._path(key))
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "bytes": self._size}
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+    
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            os.utime(path)  # Mark as recently used
+            return entry
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable cache entry {key}: {e}")
+            self._remove(path)
+            return None
+    
+    def _write(self, key: str, value: Dict[str, Any]):
+        path = self._path(key)
+        data = json.dumps(value, default=str)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so readers never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        try:
+            # Overwriting a key replaces its old entry rather than adding to it
+            replaced = os.stat(path).st_size
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        
+        with self._lock:
+            if self._size is None:
+                self._size = self._disk_usage()
+            else:
+                self._size += len(data) - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+    
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+    
+    def _disk_usage(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+    
+    def _evict(self):
+        """Delete least recently used entries until the cache is at 90% of its budget"""
+        target = self.max_bytes * 0.9
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self._size = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self._size <= target:
+                break
+            self._remove(path)
+            self._size -= size
+    
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
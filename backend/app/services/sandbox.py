@@ -9,6 +9,13 @@ import time
 from typing import Dict, Any, Optional
 from loguru import logger
 from app.config import settings
+from app.services.sandbox_pool import SandboxWorkerPool, SandboxError
+from app.services.providers import ProviderGateway
+from app.services.sandbox_worker import cpu_budget_seconds
+
+
+# Resource telemetry passed through from an execution's result
+TELEMETRY_FIELDS = ("cpu_user_seconds", "cpu_system_seconds", "peak_rss_mb", "provider_latencies_ms")
 
 
 class SandboxManager:
@@ -16,38 +23,47 @@ class SandboxManager:
     
     def __init__(self):
         self.active_sandboxes: Dict[str, Any] = {}
+        self.worker_pool = SandboxWorkerPool()
+        # Shared provider clients, reused by every execution
+        self.providers = ProviderGateway()
         self.initialized = False
     
     async def initialize(self):
         """Initialize sandbox manager"""
         logger.info("Initializing sandbox manager...")
-        # In production, this would set up Docker containers or similar
-        # For MVP, we'll use a simpler approach
+        # Pre-start warm agent workers so executions skip interpreter startup
+        if settings.SANDBOX_BACKEND == "process":
+            await self.worker_pool.start()
         self.initialized = True
         logger.info("Sandbox manager initialized")
     
     async def cleanup(self):
         """Cleanup all sandboxes"""
         logger.info("Cleaning up sandboxes...")
-        # Cleanup logic here
+        await self.worker_pool.stop()
+        await self.providers.close()
         self.initialized = False
     
     async def execute_agent(
         self,
         agent_config: Dict[str, Any],
         task_description: str,
-        timeout_seconds: int = None
+        timeout_seconds: int = None,
+        criteria: Dict[str, Any] = None
     ) -> Dict[str, Any]:
         """
         Execute an agent in a sandboxed environment
         
         Args:
-            agent_config: Agent configuration (model, provider, etc.)
+            agent_config: Agent configuration (model, provider, config, code)
             task_description: Task to execute
             timeout_seconds: Maximum execution time
+            criteria: Bounty success criteria passed to the agent
         
         Returns:
-            Execution results with output, logs, metrics
+            Execution results with output, logs, metrics and resource telemetry
+            (CPU user/system seconds, peak RSS, output bytes, provider latencies,
+            time spent waiting for a worker)
         """
         timeout = timeout_seconds or settings.SANDBOX_TIMEOUT_SECONDS
         start_time = time.time()
@@ -55,25 +71,34 @@ class SandboxManager:
         try:
             # Execute agent (simplified for MVP)
             # In production, this would run in a Docker container
-            result = await self._run_agent_safely(agent_config, task_description, timeout)
+            result = await self._run_agent_safely(agent_config, task_description, timeout, criteria)
             
             execution_time = time.time() - start_time
+            output = result.get("output", "")
             
             return {
                 "success": True,
-                "output": result.get("output", ""),
+                "output": output,
                 "execution_time_seconds": execution_time,
                 "tokens_used": result.get("tokens_used", 0),
                 "api_calls": result.get("api_calls", 0),
+                "cached_tokens": result.get("cached_tokens", 0),
+                "cached_api_calls": result.get("cached_api_calls", 0),
                 "logs": result.get("logs", []),
+                "output_bytes": self._output_bytes(output),
+                "queue_wait_seconds": result.get("pool_wait_seconds", 0.0),
+                **{field: result.get(field) for field in TELEMETRY_FIELDS},
                 "error": None
             }
-            
-        except asyncio.TimeoutError:
+        
+        except asyncio.TimeoutError as e:
+            logger.warning(f"Agent execution timed out after {timeout} seconds")
             return {
                 "success": False,
                 "output": None,
-                "execution_time_seconds": timeout,
+                "execution_time_seconds": time.time() - start_time,
+                "logs": getattr(e, "logs", []),
+                **getattr(e, "telemetry", {}),
                 "error": f"Execution timeout after {timeout} seconds"
             }
         except Exception as e:
@@ -82,6 +107,8 @@ class SandboxManager:
                 "success": False,
                 "output": None,
                 "execution_time_seconds": time.time() - start_time,
+                "logs": getattr(e, "logs", []),
+                **getattr(e, "telemetry", {}),
                 "error": str(e)
             }
     
@@ -89,23 +116,125 @@ class SandboxManager:
         self,
         agent_config: Dict[str, Any],
         task_description: str,
-        timeout: int
+        timeout: int,
+        criteria: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Run agent with timeout and resource limits
+        
+        Raises asyncio.TimeoutError once the timeout passes: worker processes are
+        killed, and in-process work (provider calls) is cancelled.
+        """
+        # Agents with their own code run in an isolated worker process
+        if settings.SANDBOX_BACKEND == "process" and self._has_agent_code(agent_config):
+            return await self._run_in_subprocess(agent_config, task_description, timeout, criteria)
+        
+        return await asyncio.wait_for(
+            self._run_inline(agent_config, task_description, criteria),
+            timeout
+        )
+    
+    async def _run_inline(
+        self,
+        agent_config: Dict[str, Any],
+        task_description: str,
+        criteria: Dict[str, Any] = None
     ) -> Dict[str, Any]:
-        """Run agent with timeout and resource limits"""
-        # This is a simplified version
-        # In production, use proper sandboxing (Docker, Firecracker, etc.)
+        """
+        Run a prompt-only agent against its provider through the shared gateway
         
+        Agents whose provider has no configured key or endpoint are simulated.
+        """
         provider = agent_config.get("provider", "openai")
         model = agent_config.get("provider_model", "gpt-4")
+        config = agent_config.get("config") or {}
+        
+        if not self.providers.is_configured(provider, config.get("api_key"), config.get("base_url")):
+            # Simulate agent execution
+            await asyncio.sleep(0.1)  # Simulate processing
+            output = f"Agent executed task: {task_description[:50]}..."
+            
+            return {
+                "output": output,
+                # Estimated like a real call (~4 characters per token)
+                "tokens_used": (len(task_description) + len(output)) // 4,
+                "api_calls": 1,
+                "logs": ["Agent started", "Task processed", "Agent completed"]
+            }
+        
+        prompt = task_description
+        if criteria:
+            prompt += f"\n\nSuccess criteria:\n{json.dumps(criteria, indent=2)}"
         
-        # Simulate agent execution
-        # In real implementation, this would call the actual AI provider
-        await asyncio.sleep(0.1)  # Simulate processing
+        completion = await self.providers.complete(
+            provider=provider,
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            system=config.get("system_prompt"),
+            max_tokens=config.get("max_tokens", 1024),
+            temperature=config.get("temperature", 0.7),
+            api_key=config.get("api_key"),
+            base_url=config.get("base_url"),
+            use_cache=config.get("cache", True)
+        )
         
+        if completion["cached"]:
+            call_log = f"{provider}/{completion['model']} answered from cache"
+        else:
+            call_log = f"{provider}/{completion['model']} responded in {completion['latency_seconds']:.2f}s"
+        
+        # Cached calls still count towards tokens_used and api_calls (the agent
+        # consumed them) and are also reported separately as cached
         return {
-            "output": f"Agent executed task: {task_description[:50]}...",
-            "tokens_used": 100,  # Simulated
+            "output": completion["text"],
+            "tokens_used": completion["tokens_used"],
             "api_calls": 1,
-            "logs": ["Agent started", "Task processed", "Agent completed"]
+            "cached_tokens": completion["tokens_used"] if completion["cached"] else 0,
+            "cached_api_calls": 1 if completion["cached"] else 0,
+            "provider_latencies_ms": [] if completion["cached"] else [round(completion["latency_seconds"] * 1000, 1)],
+            "logs": ["Agent started", call_log, "Agent completed"]
         }
-
+    
+    def _output_bytes(self, output: Any) -> int:
+        """Size of an agent's output as stored"""
+        if output is None:
+            return 0
+        if isinstance(output, str):
+            return len(output.encode())
+        return len(json.dumps(output, default=str).encode())
+    
+    def _has_agent_code(self, agent_config: Dict[str, Any]) -> bool:
+        """Whether the agent brings code (custom code or an agent class) to execute"""
+        return bool(agent_config.get("code") or (agent_config.get("config") or {}).get("agent_class"))
+    
+    async def _run_in_subprocess(
+        self,
+        agent_config: Dict[str, Any],
+        task_description: str,
+        timeout: int,
+        criteria: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Run agent code on a warm worker process with memory and CPU rlimits
+        
+        Workers run in their own session (process group), so on timeout the
+        agent and anything it spawned are killed together and the worker is
+        replaced.
+        """
+        request = {
+            "agent_config": agent_config,
+            "task_description": task_description,
+            "criteria": criteria or {},
+            "limits": {
+                "cpu_seconds": cpu_budget_seconds(timeout, settings.MAX_AGENT_CPU_PERCENT)
+            }
+        }
+        
+        result = await self.worker_pool.run(request, timeout)
+        if not result.get("success", False):
+            raise SandboxError(
+                result.get("error") or "Agent reported failure",
+                result.get("logs"),
+                telemetry={field: result.get(field) for field in TELEMETRY_FIELDS}
+            )
+        return result
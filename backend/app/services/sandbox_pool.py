@@ -0,0 +1,379 @@
+"""
+Warm sandbox worker pool
+Keeps pre-started agent worker processes ready so executions skip interpreter startup
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+from loguru import logger
+from app.config import settings
+
+
+# Backend directory, so workers can be started with `python -m app.services.sandbox_worker`
+_BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# The only variables workers inherit; everything else the API process holds
+# (database URLs, provider API keys, payment secrets) stays out of agent code
+_ALLOWED_ENV = ("PATH", "HOME", "LANG", "LC_ALL", "TZ", "SYSTEMROOT")
+
+# Max size of one result line from a worker
+_RESULT_LINE_LIMIT = 64 * 1024 * 1024
+
+# Log lines kept per execution (the most recent ones)
+_MAX_LOG_LINES = 1000
+
+# How long a new worker may take to finish its pre-imports
+_READY_TIMEOUT_SECONDS = 60
+
+
+class SandboxError(RuntimeError):
+    """An execution failed; carries whatever the agent logged before failing and any telemetry"""
+    
+    def __init__(self, message: str, logs: List[str] = None, telemetry: Dict[str, Any] = None):
+        super().__init__(message)
+        self.logs = logs or []
+        self.telemetry = telemetry or {}
+
+
+class SandboxTimeoutError(SandboxError, TimeoutError):
+    """An execution overran its timeout and its worker was killed"""
+
+
+def describe_exit(returncode: Optional[int]) -> str:
+    """Human-readable reason for a worker that exited without a result"""
+    if returncode is not None and returncode < 0:
+        sig = -returncode
+        if sig == getattr(signal, "SIGXCPU", None):
+            return "Agent exceeded its CPU time limit"
+        return f"Agent process killed by signal {sig}"
+    return f"Agent process exited with code {returncode}"
+
+
+class SandboxWorker:
+    """One warm worker process, handling one request at a time"""
+    
+    def __init__(self, process: asyncio.subprocess.Process, workdir: str = None):
+        self.process = process
+        self.workdir = workdir
+        self.executions = 0
+        self.ran_code = False  # Ran agent-supplied code; never reused after that
+        self.rss_mb = 0.0
+        self.logs: deque = deque(maxlen=_MAX_LOG_LINES)
+        self.last_used = time.monotonic()
+    
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+    
+    async def wait_ready(self):
+        """Wait for the worker to finish its pre-imports"""
+        line = await self.process.stdout.readline()
+        if not line:
+            await self.process.wait()
+            raise RuntimeError(f"Sandbox worker failed to start: {describe_exit(self.process.returncode)}")
+    
+    async def execute(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send one request and wait for its result
+        
+        Log lines streamed by the worker are collected in self.logs as they
+        arrive, so they are still available if the execution is cut short.
+        """
+        self.logs.clear()
+        if (request.get("agent_config") or {}).get("code"):
+            self.ran_code = True
+        self.process.stdin.write(json.dumps(request, default=str).encode() + b"\n")
+        await self.process.stdin.drain()
+        
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                # The worker died mid-execution (rlimit signal, crash)
+                await self.process.wait()
+                raise SandboxError(describe_exit(self.process.returncode), list(self.logs))
+            message = json.loads(line)
+            if "log" not in message:
+                break
+            self.logs.append(message["log"])
+        
+        result = message
+        result["logs"] = list(self.logs)
+        self.executions += 1
+        self.rss_mb = result.pop("worker_rss_mb", 0.0) or 0.0
+        self.last_used = time.monotonic()
+        return result
+    
+    def kill(self):
+        """Kill the worker and every process in its group"""
+        try:
+            if os.name == "posix":
+                os.killpg(self.process.pid, signal.SIGKILL)
+            elif self.process.returncode is None:
+                self.process.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+    
+    async def terminate(self):
+        """Kill the worker, reap it and remove its working directory"""
+        self.kill()
+        await self.process.wait()
+        if self.workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class SandboxWorkerPool:
+    """
+    Pool of warm sandbox workers
+    
+    Starts min_workers up front and grows to max_workers while requests are
+    waiting for a free worker; workers idle for longer than idle_seconds are
+    retired back down to min_workers.
+    
+    A worker that ran custom agent code (Agent.code) is used for that one
+    execution only: the code could have patched modules, builtins or left
+    threads behind to read the next agent's config and keys. Only trusted
+    agent_class executions share workers, and those are recycled after
+    max_executions requests, once their RSS passes max_rss_mb, or whenever
+    an execution fails or times out, so leaked state does not accumulate.
+    """
+    
+    def __init__(
+        self,
+        min_workers: int = None,
+        max_workers: int = None,
+        max_executions: int = None,
+        max_rss_mb: int = None,
+        idle_seconds: float = None
+    ):
+        self.min_workers = settings.SANDBOX_POOL_MIN_WORKERS if min_workers is None else min_workers
+        self.max_workers = max(1, max_workers or settings.SANDBOX_POOL_MAX_WORKERS, self.min_workers)
+        self.max_executions = max_executions or settings.SANDBOX_WORKER_MAX_EXECUTIONS
+        self.max_rss_mb = max_rss_mb or settings.SANDBOX_WORKER_MAX_RSS_MB
+        self.idle_seconds = idle_seconds or settings.SANDBOX_POOL_IDLE_SECONDS
+        self._idle: List[SandboxWorker] = []
+        self._busy: Dict[int, SandboxWorker] = {}
+        self._size = 0  # Workers alive or starting
+        self._starting = 0
+        self._waiting = 0
+        self._spawn_failures = 0
+        self._spawn_error: Optional[Exception] = None
+        self._condition: Optional[asyncio.Condition] = None
+        self._reaper: Optional[asyncio.Task] = None
+        self._start_tasks: set = set()
+        self.started = False
+    
+    async def start(self):
+        """Pre-start the minimum number of workers"""
+        if self.started:
+            return
+        self._condition = asyncio.Condition()
+        self.started = True
+        async with self._condition:
+            tasks = [self._grow() for _ in range(self.min_workers)]
+        await asyncio.gather(*tasks)
+        self._reaper = asyncio.create_task(self._reap_idle())
+        logger.info(f"Sandbox worker pool started ({self.min_workers}-{self.max_workers} workers)")
+    
+    async def stop(self):
+        """Kill every worker"""
+        if not self.started:
+            return
+        self.started = False
+        if self._reaper:
+            self._reaper.cancel()
+        starting = list(self._start_tasks)
+        for task in starting:
+            task.cancel()
+        workers = self._idle + list(self._busy.values())
+        self._idle = []
+        self._busy = {}
+        self._size = 0
+        # Reap the killed processes while the event loop is still running
+        await asyncio.gather(
+            *starting,
+            *[worker.terminate() for worker in workers],
+            return_exceptions=True
+        )
+    
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": self._size,
+            "idle": len(self._idle),
+            "busy": len(self._busy),
+            "starting": self._starting,
+            "waiting": self._waiting
+        }
+    
+    async def run(self, request: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """
+        Execute a request on a warm worker
+        
+        The timeout covers the execution only, not the wait for a free worker.
+        An overdue execution (or a cancelled caller) gets its worker's whole
+        process group SIGKILLed before the slot is handed back, so nothing the
+        agent started keeps running.
+        
+        Raises:
+            SandboxTimeoutError: with the logs streamed before the deadline
+            SandboxError: if the worker died mid-execution
+        """
+        if not self.started:
+            await self.start()
+        
+        wait_start = time.monotonic()
+        worker = await self._acquire()
+        pool_wait = time.monotonic() - wait_start
+        healthy = False
+        try:
+            result = await asyncio.wait_for(worker.execute(request), timeout)
+            healthy = result.get("success", False)
+            result["pool_wait_seconds"] = pool_wait
+            return result
+        except asyncio.TimeoutError:
+            raise SandboxTimeoutError(f"Execution timeout after {timeout} seconds", list(worker.logs))
+        finally:
+            await self._release(worker, healthy)
+    
+    async def _acquire(self) -> SandboxWorker:
+        """
+        Take an idle worker, growing the pool with the queue of waiting requests
+        
+        New workers start in the background; a waiting request takes whichever
+        worker becomes free first, so a short execution is never held up behind
+        a cold start.
+        """
+        async with self._condition:
+            self._waiting += 1
+            failures_seen = self._spawn_failures
+            try:
+                while True:
+                    if self._idle:
+                        worker = self._idle.pop()
+                        self._busy[worker.pid] = worker
+                        return worker
+                    if self._spawn_failures > failures_seen and not self._busy and not self._starting:
+                        raise RuntimeError(f"Sandbox worker failed to start: {self._spawn_error}")
+                    # One starting worker per waiting request, up to max_workers
+                    if self._starting < self._waiting and self._size < self.max_workers:
+                        self._grow()
+                    await self._condition.wait()
+            finally:
+                self._waiting -= 1
+    
+    async def _release(self, worker: SandboxWorker, healthy: bool):
+        """Return a worker to the pool, or retire it if it should not be reused"""
+        self._busy.pop(worker.pid, None)
+        recycle = (
+            not healthy
+            or worker.ran_code
+            or worker.process.returncode is not None
+            or worker.executions >= self.max_executions
+            or worker.rss_mb >= self.max_rss_mb
+        )
+        if recycle:
+            await worker.terminate()
+        
+        async with self._condition:
+            if recycle:
+                self._size -= 1
+                if self.started and self._size < self.min_workers:
+                    self._grow()
+            elif self.started:
+                self._idle.append(worker)
+            self._condition.notify()
+    
+    def _grow(self) -> asyncio.Task:
+        """Start one more worker in the background (caller holds the condition)"""
+        self._size += 1
+        self._starting += 1
+        task = asyncio.create_task(self._start_worker())
+        self._start_tasks.add(task)
+        task.add_done_callback(self._start_tasks.discard)
+        return task
+    
+    async def _start_worker(self):
+        """Spawn a worker and park it as idle"""
+        try:
+            worker = await self._spawn()
+        except Exception as e:
+            logger.error(f"Failed to start sandbox worker: {e}")
+            async with self._condition:
+                self._size -= 1
+                self._starting -= 1
+                self._spawn_failures += 1
+                self._spawn_error = e
+                self._condition.notify_all()
+            return
+        
+        async with self._condition:
+            self._starting -= 1
+            if self.started:
+                self._idle.append(worker)
+                self._condition.notify()
+                return
+        await worker.terminate()
+    
+    async def _spawn(self) -> SandboxWorker:
+        """Start a worker process and wait until it is warm"""
+        # An empty directory of its own, so relative paths in agent code
+        # cannot reach .env, the SQLite database or the backend sources
+        workdir = tempfile.mkdtemp(prefix="aiarena-sandbox-")
+        try:
+            process = await self._start_process(workdir)
+        except BaseException:
+            shutil.rmtree(workdir, ignore_errors=True)
+            raise
+        worker = SandboxWorker(process, workdir)
+        try:
+            await asyncio.wait_for(worker.wait_ready(), _READY_TIMEOUT_SECONDS)
+        except BaseException:
+            # Also on cancellation, so a pool stopped mid-start leaves no process behind
+            await worker.terminate()
+            raise
+        return worker
+    
+    async def _start_process(self, workdir: str) -> asyncio.subprocess.Process:
+        return await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "app.services.sandbox_worker",
+            "--serve",
+            "--memory-mb", str(settings.MAX_AGENT_MEMORY_MB),
+            "--preimport", settings.SANDBOX_PREIMPORT_MODULES,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            cwd=workdir,
+            env=self._worker_env(),
+            start_new_session=(os.name == "posix"),
+            limit=_RESULT_LINE_LIMIT
+        )
+    
+    async def _reap_idle(self):
+        """Retire workers that sat idle too long, down to the minimum size"""
+        while self.started:
+            await asyncio.sleep(max(1.0, self.idle_seconds / 2))
+            now = time.monotonic()
+            retired = []
+            async with self._condition:
+                for worker in list(self._idle):
+                    if self._size <= self.min_workers:
+                        break
+                    if now - worker.last_used > self.idle_seconds:
+                        self._idle.remove(worker)
+                        self._size -= 1
+                        retired.append(worker)
+            for worker in retired:
+                await worker.terminate()
+    
+    def _worker_env(self) -> Dict[str, str]:
+        """Environment for worker processes: an allowlist, so no platform secret leaks through"""
+        env = {key: os.environ[key] for key in _ALLOWED_ENV if key in os.environ}
+        env["PYTHONPATH"] = _BACKEND_DIR
+        return env
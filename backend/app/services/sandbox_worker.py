@@ -0,0 +1,293 @@
+"""
+Sandbox worker process
+Runs agent executions in an isolated interpreter with resource limits
+
+Started by the sandbox worker pool as `python -m app.services.sandbox_worker
+--serve`: the worker pre-imports common agent dependencies, applies its memory
+limit, reports ready, then handles one JSON request per stdin line and answers
+with one JSON result line. The original stdout is reserved for the protocol:
+anything the agent prints is streamed back as {"log": ...} lines while it runs,
+so the logs survive even if the worker is killed mid-execution. A request
+that runs custom agent code is the worker's last: it exits after answering,
+so nothing that code left behind can reach the next agent.
+
+Without --serve the worker handles a single request read from stdin, which is
+handy for debugging an agent by hand.
+"""
+
+import argparse
+import contextlib
+import importlib
+import inspect
+import io
+import json
+import math
+import os
+import sys
+import time
+import traceback
+import types
+from typing import Any, Dict, List
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits
+    resource = None
+
+
+# Repository root, so agent_class paths like "agents.example_lead_generator:LeadGeneratorAgent" import
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+
+def apply_resource_limits(memory_mb: int, cpu_seconds: int):
+    """Cap address space and CPU time for this process"""
+    if resource is None:
+        return
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if cpu_seconds:
+        # SIGXCPU at the soft limit, SIGKILL one second later
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    # No core dumps from crashing agents
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+
+def set_cpu_budget(cpu_seconds: int):
+    """
+    Allow the next execution cpu_seconds of CPU on top of what this long-lived
+    worker has already used
+    
+    Only the soft limit moves, so it can be raised again for the following
+    execution (up to the inherited hard limit).
+    """
+    if resource is None or not cpu_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = math.ceil(usage.ru_utime + usage.ru_stime)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + cpu_seconds
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this worker in MB"""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _proc_status_mb(field: str) -> float:
+    """A memory field (VmRSS, VmHWM) from /proc/self/status in MB, or 0 if unavailable"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0.0
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this worker right now, in MB"""
+    return _proc_status_mb("VmRSS") or peak_rss_mb()
+
+
+def reset_peak_rss() -> bool:
+    """Reset the kernel's peak RSS mark so the next reading covers one execution (Linux only)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def cpu_times() -> Dict[str, float]:
+    """User and system CPU seconds used by this process and its reaped children"""
+    if resource is None:
+        return {"user": 0.0, "system": 0.0}
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        "user": own.ru_utime + children.ru_utime,
+        "system": own.ru_stime + children.ru_stime
+    }
+
+
+def preimport(modules: List[str]):
+    """Import common agent dependencies once so executions do not pay for them"""
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+
+def cpu_budget_seconds(timeout_seconds: float, cpu_percent: int) -> int:
+    """CPU seconds an agent may use: its share of the wall-clock timeout"""
+    return max(1, math.ceil(timeout_seconds * max(cpu_percent, 1) / 100))
+
+
+def load_agent(agent_config: Dict[str, Any]):
+    """
+    Build the agent callable from custom code or an agent class path
+    
+    Custom code (Agent.code) may define a class with an execute(task_description,
+    criteria) method, constructed with the agent's config like the examples in
+    agents/, or a module-level execute(task_description, criteria) function.
+    """
+    config = agent_config.get("config") or {}
+    code = agent_config.get("code")
+    
+    if code:
+        module = types.ModuleType("agent_code")
+        exec(compile(code, "<agent>", "exec"), module.__dict__)
+        for value in module.__dict__.values():
+            if inspect.isclass(value) and value.__module__ == "agent_code" and hasattr(value, "execute"):
+                return value(config).execute
+        if callable(module.__dict__.get("execute")):
+            return module.__dict__["execute"]
+        raise ValueError("Agent code must define a class with an execute() method or an execute() function")
+    
+    agent_class = config.get("agent_class")
+    if agent_class:
+        if _REPO_ROOT not in sys.path:
+            sys.path.insert(0, _REPO_ROOT)
+        module_name, _, class_name = agent_class.partition(":")
+        cls = getattr(importlib.import_module(module_name), class_name)
+        return cls(config).execute
+    
+    raise ValueError("Agent has no code or agent_class to execute")
+
+
+def run_request(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Execute one agent request and normalize its result, with resource telemetry"""
+    start = time.time()
+    cpu_before = cpu_times()
+    peak_resettable = reset_peak_rss()
+    
+    def telemetry() -> Dict[str, Any]:
+        cpu_after = cpu_times()
+        return {
+            "cpu_user_seconds": round(cpu_after["user"] - cpu_before["user"], 4),
+            "cpu_system_seconds": round(cpu_after["system"] - cpu_before["system"], 4),
+            # Without a resettable peak this is the worker's lifetime peak (an upper bound)
+            "peak_rss_mb": round(_proc_status_mb("VmHWM") if peak_resettable else peak_rss_mb(), 2),
+            "worker_time_seconds": time.time() - start
+        }
+    
+    try:
+        execute = load_agent(request["agent_config"])
+        raw = execute(request["task_description"], request.get("criteria") or {})
+    except MemoryError:
+        return {"success": False, "error": "Agent exceeded its memory limit", **telemetry()}
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"{type(e).__name__}: {e}",
+            "traceback": traceback.format_exc(),
+            **telemetry()
+        }
+    
+    if not isinstance(raw, dict):
+        raw = {"success": True, "output": raw}
+    metrics = raw.get("metrics") or {}
+    return {
+        "success": raw.get("success", True),
+        "output": raw.get("output"),
+        "tokens_used": raw.get("tokens_used", metrics.get("tokens_used", 0)),
+        "api_calls": raw.get("api_calls", metrics.get("api_calls", 0)),
+        # Agents calling providers themselves may report per-call latencies
+        "provider_latencies_ms": raw.get("provider_latencies_ms", metrics.get("provider_latencies_ms", [])),
+        "error": raw.get("error"),
+        **telemetry()
+    }
+
+
+class LogStream(io.TextIOBase):
+    """Forwards agent output to the parent one {"log": line} message per line"""
+    
+    def __init__(self, result_stream):
+        self.result_stream = result_stream
+        self.buffer = ""
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, text: str) -> int:
+        self.buffer += text
+        if "\n" in self.buffer:
+            *lines, self.buffer = self.buffer.split("\n")
+            for line in lines:
+                self._emit(line)
+        return len(text)
+    
+    def flush(self):
+        if self.buffer:
+            self._emit(self.buffer)
+            self.buffer = ""
+    
+    def _emit(self, line: str):
+        self.result_stream.write(json.dumps({"log": line}) + "\n")
+        self.result_stream.flush()
+
+
+def serve(result_stream, memory_mb: int, modules: List[str]):
+    """Handle requests line by line until stdin closes"""
+    preimport(modules)
+    apply_resource_limits(memory_mb, None)
+    
+    result_stream.write(json.dumps({"ready": True, "pid": os.getpid()}) + "\n")
+    result_stream.flush()
+    
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        set_cpu_budget(request.get("limits", {}).get("cpu_seconds"))
+        
+        logs = LogStream(result_stream)
+        with contextlib.redirect_stdout(logs), contextlib.redirect_stderr(logs):
+            result = run_request(request)
+        logs.flush()
+        result["worker_rss_mb"] = current_rss_mb()
+        
+        result_stream.write(json.dumps(result, default=str) + "\n")
+        result_stream.flush()
+        
+        if (request.get("agent_config") or {}).get("code"):
+            break
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent sandbox worker")
+    parser.add_argument("--serve", action="store_true", help="Handle requests until stdin closes")
+    parser.add_argument("--memory-mb", type=int, default=0, help="Address space limit for the worker")
+    parser.add_argument("--preimport", default="", help="Comma-separated modules to import at startup")
+    args = parser.parse_args()
+    
+    # Keep the real stdout for results and send stray fd-level agent output to stderr
+    result_stream = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    
+    if args.serve:
+        serve(result_stream, args.memory_mb, [m for m in args.preimport.split(",") if m])
+        return
+    
+    request = json.loads(sys.stdin.read())
+    limits = request.get("limits", {})
+    apply_resource_limits(limits.get("memory_mb"), limits.get("cpu_seconds"))
+    
+    result = run_request(request)
+    result_stream.write(json.dumps(result, default=str) + "\n")
+    result_stream.flush()
+
+
+if __name__ == "__main__":
+    main()
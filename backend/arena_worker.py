@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Arena worker fleet - runs queued arena jobs outside the API process
+
+Starts N worker processes, each running an ArenaWorkerPool that claims jobs
+from the shared arena_jobs table (and a JudgeBatchScheduler for batch-mode
+judging). Run as many copies of this script on as many hosts as needed; the
+claim protocol hands every job to exactly one worker.
+
+Usage:
+    python arena_worker.py --processes 4 --workers 4
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+
+from loguru import logger
+
+
+async def _run_pool(worker_count: int):
+    """Run one worker pool until SIGTERM/SIGINT"""
+    from app.database import init_db
+    from app.services.sandbox import SandboxManager
+    from app.services.arena_queue import ArenaWorkerPool
+    from app.services.judge import JudgeService
+    from app.services.judge_batch import JudgeBatchScheduler
+    
+    # Workers may start before the API has ever run against this database
+    init_db()
+    
+    sandbox_manager = SandboxManager()
+    await sandbox_manager.initialize()
+    pool = ArenaWorkerPool(worker_count=worker_count, sandbox_manager=sandbox_manager)
+    await pool.start()
+    scheduler = JudgeBatchScheduler(judge=JudgeService(providers=sandbox_manager.providers))
+    await scheduler.start()
+    
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop_event.set)
+    
+    await stop_event.wait()
+    await scheduler.stop()
+    await pool.stop()
+    await sandbox_manager.cleanup()
+
+
+def _process_main(worker_count: int):
+    """Entry point of each worker process"""
+    logger.info(f"Arena worker process {os.getpid()} starting with {worker_count} workers")
+    asyncio.run(_run_pool(worker_count))
+
+
+if __name__ == "__main__":
+    from app.config import settings
+    
+    parser = argparse.ArgumentParser(description="Run arena jobs from the database queue")
+    parser.add_argument("--processes", type=int, default=settings.ARENA_WORKER_PROCESSES,
+                        help="Number of worker processes")
+    parser.add_argument("--workers", type=int, default=settings.ARENA_WORKER_COUNT,
+                        help="Concurrent arena jobs per process")
+    args = parser.parse_args()
+    
+    # Spawn so each process opens its own database connections instead of
+    # inheriting the parent's pooled sockets
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_process_main, args=(args.workers,), name=f"arena-worker-{i}")
+        for i in range(args.processes)
+    ]
+    
+    print(f"Starting {args.processes} arena worker processes x {args.workers} workers")
+    for process in processes:
+        process.start()
+    
+    def _forward_signal(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+    
+    signal.signal(signal.SIGTERM, _forward_signal)
+    signal.signal(signal.SIGINT, _forward_signal)
+    
+    for process in processes:
+        process.join()
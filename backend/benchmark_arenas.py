@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Arena throughput benchmark
+
+Builds synthetic users, bounties, agents and arenas in a scratch database and
+runs them through ArenaRunner with stub sandbox and judge latencies, then
+prints a JSON report (arenas/sec, latency percentiles, DB queries per arena,
+peak RSS) that can be saved and diffed across commits.
+
+Usage:
+    python benchmark_arenas.py --arenas 50 --participants 10 --concurrency 8
+    python benchmark_arenas.py --database-url postgresql://... --mode queue --output bench.json
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark arena throughput with stub providers")
+    parser.add_argument("--database-url", default="sqlite:///:memory:",
+                        help="Scratch database (tables are created; use an empty database)")
+    parser.add_argument("--arenas", type=int, default=20, help="Number of arenas to run")
+    parser.add_argument("--participants", type=int, default=10, help="Agents per arena")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Arenas in flight at once (direct mode) or worker count (queue mode)")
+    parser.add_argument("--mode", choices=["direct", "queue"], default="direct",
+                        help="Call ArenaRunner directly or go through the arena job queue")
+    parser.add_argument("--sandbox-latency-ms", type=float, default=50.0, help="Mean agent execution latency")
+    parser.add_argument("--sandbox-jitter-ms", type=float, default=20.0, help="Uniform +/- jitter on agent latency")
+    parser.add_argument("--judge-latency-ms", type=float, default=200.0, help="Judge call latency")
+    parser.add_argument("--heat-size", type=int, default=None, help="Run arenas in tournament mode")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for latencies")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    return parser.parse_args()
+
+
+ARGS = parse_args() if __name__ == "__main__" else None
+
+if ARGS:
+    # Configure the app for the scratch database before it creates its engine
+    os.environ["DATABASE_URL"] = ARGS.database_url
+    os.environ["ENVIRONMENT"] = "benchmark"
+    os.environ["ARENA_JOB_POLL_INTERVAL_SECONDS"] = "0.01"
+    # Agents are stubbed, so skip starting the warm worker pool
+    os.environ["SANDBOX_BACKEND"] = "inline"
+
+from loguru import logger
+from sqlalchemy import event
+
+from app.database import Base, engine, SessionLocal
+from app.models.user import User
+from app.models.bounty import Bounty, BountyStatus, BountyType
+from app.models.agent import Agent, AgentStatus, AgentProvider
+from app.models.arena import Arena, ArenaStatus, ArenaParticipation
+from app.models.arena_job import ArenaJob, ArenaJobStatus
+from app.services.arena_runner import ArenaRunner
+from app.services.sandbox import SandboxManager
+from app.services.judge import JudgeService
+
+
+# Arena being run by the current task, so queries can be attributed to it
+_current_arena = contextvars.ContextVar("current_arena", default=None)
+_query_counts = {}
+
+
+class StubSandboxManager(SandboxManager):
+    """Sandbox that sleeps for a configurable latency instead of running agents"""
+    
+    def __init__(self, latency_ms: float, jitter_ms: float, rng: random.Random):
+        super().__init__()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rng = rng
+    
+    async def _run_agent_safely(self, agent_config, task_description, timeout, criteria=None):
+        delay = max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        return {
+            "output": f"Stub output {self.rng.random():.6f} for: {task_description[:50]}",
+            "tokens_used": self.rng.randint(100, 1000),
+            "api_calls": 1,
+            "logs": ["Agent started", "Agent completed"]
+        }
+
+
+class StubJudgeService(JudgeService):
+    """Judge that builds the real prompt but replaces the model call with a sleep"""
+    
+    def __init__(self, latency_ms: float):
+        super().__init__()
+        self.latency_ms = latency_ms
+    
+    async def judge_arena(self, bounty_criteria, agent_results):
+        self._build_judge_prompt(bounty_criteria, agent_results)
+        await asyncio.sleep(self.latency_ms / 1000)
+        return self._simple_scoring(agent_results)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    arena_id = _current_arena.get()
+    if arena_id is not None:
+        _query_counts[arena_id] = _query_counts.get(arena_id, 0) + 1
+
+
+def seed_database(arena_count: int, participants: int, heat_size: int = None):
+    """Create synthetic users, agents, bounties and arenas; returns arena ids"""
+    db = SessionLocal()
+    try:
+        poster = User(email="poster@bench.local", username="bench_poster", hashed_password="x")
+        builder = User(email="builder@bench.local", username="bench_builder", hashed_password="x")
+        db.add_all([poster, builder])
+        db.commit()
+        
+        agents = [
+            Agent(
+                name=f"Bench Agent {i}",
+                config={"temperature": 0.7},
+                provider=AgentProvider.OPENAI,
+                provider_model="gpt-4",
+                builder_id=builder.id,
+                status=AgentStatus.ACTIVE
+            )
+            for i in range(participants)
+        ]
+        db.add_all(agents)
+        db.commit()
+        
+        arena_ids = []
+        for i in range(arena_count):
+            bounty = Bounty(
+                title=f"Bench Bounty {i}",
+                description="Generate 100 qualified leads for SaaS companies",
+                bounty_type=BountyType.LEAD_GENERATION,
+                budget=100.0,
+                platform_fee=15.0,
+                agent_reward=80.0,
+                success_criteria=json.dumps({"metric": "lead_count", "target": 100}),
+                poster_id=poster.id,
+                status=BountyStatus.IN_PROGRESS
+            )
+            db.add(bounty)
+            db.flush()
+            arena = Arena(
+                name=f"Bench Arena {i}",
+                bounty_id=bounty.id,
+                max_participants=participants,
+                heat_size=heat_size,
+                status=ArenaStatus.REGISTRATION_OPEN
+            )
+            db.add(arena)
+            db.flush()
+            db.add_all([
+                ArenaParticipation(arena_id=arena.id, agent_id=agent.id, agent_builder_id=builder.id)
+                for agent in agents
+            ])
+            arena_ids.append(arena.id)
+        db.commit()
+        return arena_ids
+    finally:
+        db.close()
+
+
+async def run_direct(arena_ids, sandbox_manager, judge_service, concurrency):
+    """Run arenas straight through ArenaRunner; returns per-arena latencies"""
+    runner = ArenaRunner(sandbox_manager=sandbox_manager)
+    runner.judge_service = judge_service
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = {}
+    
+    async def run_one(arena_id):
+        async with semaphore:
+            _current_arena.set(arena_id)
+            db = SessionLocal()
+            start = time.perf_counter()
+            try:
+                await runner.run_arena(arena_id, db)
+            finally:
+                latencies[arena_id] = time.perf_counter() - start
+                db.close()
+    
+    await asyncio.gather(*[run_one(arena_id) for arena_id in arena_ids])
+    return latencies
+
+
+async def run_queue(arena_ids, sandbox_manager, judge_service, concurrency):
+    """Enqueue every arena and let an ArenaWorkerPool drain the queue"""
+    from app.services.arena_queue import ArenaJobQueue, ArenaWorkerPool
+    
+    class _TracingRunner(ArenaRunner):
+        async def run_arena(self, arena_id, db, fence=None):
+            _current_arena.set(arena_id)
+            return await super().run_arena(arena_id, db, fence=fence)
+    
+    queue = ArenaJobQueue()
+    db = SessionLocal()
+    enqueued_at = {}
+    for arena_id in arena_ids:
+        queue.enqueue(db, arena_id)
+        enqueued_at[arena_id] = time.perf_counter()
+    
+    pool = ArenaWorkerPool(worker_count=concurrency, sandbox_manager=sandbox_manager, queue=queue)
+    pool.runner = _TracingRunner(sandbox_manager=sandbox_manager)
+    pool.runner.judge_service = judge_service
+    
+    latencies = {}
+    await pool.start()
+    try:
+        while len(latencies) < len(arena_ids):
+            await asyncio.sleep(0.01)
+            done = db.query(ArenaJob.arena_id).filter(
+                ArenaJob.status.in_([ArenaJobStatus.COMPLETED, ArenaJobStatus.FAILED])
+            ).all()
+            now = time.perf_counter()
+            for (arena_id,) in done:
+                latencies.setdefault(arena_id, now - enqueued_at[arena_id])
+            db.commit()
+    finally:
+        await pool.stop()
+        db.close()
+    return latencies
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+async def main(args):
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    
+    Base.metadata.create_all(bind=engine)
+    arena_ids = seed_database(args.arenas, args.participants, args.heat_size)
+    
+    rng = random.Random(args.seed)
+    sandbox_manager = StubSandboxManager(args.sandbox_latency_ms, args.sandbox_jitter_ms, rng)
+    await sandbox_manager.initialize()
+    judge_service = StubJudgeService(args.judge_latency_ms)
+    
+    event.listen(engine, "before_cursor_execute", _count_query)
+    start = time.perf_counter()
+    if args.mode == "queue":
+        latencies = await run_queue(arena_ids, sandbox_manager, judge_service, args.concurrency)
+    else:
+        latencies = await run_direct(arena_ids, sandbox_manager, judge_service, args.concurrency)
+    total_seconds = time.perf_counter() - start
+    event.remove(engine, "before_cursor_execute", _count_query)
+    await sandbox_manager.cleanup()
+    
+    db = SessionLocal()
+    completed = db.query(Arena).filter(
+        Arena.id.in_(arena_ids), Arena.status == ArenaStatus.COMPLETED
+    ).count()
+    db.close()
+    
+    values = list(latencies.values())
+    queries = [_query_counts.get(arena_id, 0) for arena_id in arena_ids]
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+    
+    return {
+        "commit": git_commit(),
+        "config": {
+            "database": engine.dialect.name,
+            "mode": args.mode,
+            "arenas": args.arenas,
+            "participants": args.participants,
+            "concurrency": args.concurrency,
+            "heat_size": args.heat_size,
+            "sandbox_latency_ms": args.sandbox_latency_ms,
+            "sandbox_jitter_ms": args.sandbox_jitter_ms,
+            "judge_latency_ms": args.judge_latency_ms
+        },
+        "results": {
+            "arenas_completed": completed,
+            "total_seconds": round(total_seconds, 4),
+            "arenas_per_second": round(completed / total_seconds, 4) if total_seconds else 0.0,
+            "latency_seconds": {
+                "p50": round(percentile(values, 50), 4),
+                "p95": round(percentile(values, 95), 4),
+                "p99": round(percentile(values, 99), 4),
+                "max": round(max(values), 4) if values else 0.0
+            },
+            "db_queries_per_arena": {
+                "mean": round(sum(queries) / len(queries), 2) if queries else 0.0,
+                "max": max(queries) if queries else 0
+            },
+            "peak_rss_mb": round(peak_rss_mb, 2)
+        }
+    }
+
+
+if __name__ == "__main__":
+    report = asyncio.run(main(ARGS))
+    output = json.dumps(report, indent=2)
+    print(output)
+    if ARGS.output:
+        with open(ARGS.output, "w") as f:
+            f.write(output + "\n")
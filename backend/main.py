@@ -13,7 +13,7 @@ import uvicorn
 from loguru import logger
 import os
 
-from app.database import engine, Base, get_db
+from app.database import engine, get_db, init_db
 from app.api import auth, bounties, agents, arenas, users, payments
 from app.config import settings
 from sqlalchemy import desc
@@ -41,42 +41,10 @@ async def lifespan(app: FastAPI):
     # Create database tables (only if they don't exist - safe for production)
     # This will NOT drop existing tables or data
     try:
-        Base.metadata.create_all(bind=engine, checkfirst=True)
+        init_db()
         db_type = "PostgreSQL" if settings.DATABASE_URL.startswith("postgresql") else "SQLite"
         logger.info(f"✅ Database tables verified/created using {db_type} (existing data preserved)")
         
-        # Add crypto payment columns if they don't exist (migration)
-        try:
-            from sqlalchemy import text, inspect
-            inspector = inspect(engine)
-            columns = [col['name'] for col in inspector.get_columns('bounties')]
-            
-            columns_to_add = {
-                'payment_method': ("VARCHAR DEFAULT 'fiat'", "TEXT DEFAULT 'fiat'"),
-                'crypto_type': ("VARCHAR", "TEXT"),
-                'crypto_wallet_address': ("VARCHAR", "TEXT"),
-                'crypto_amount': ("DOUBLE PRECISION", "REAL")
-            }
-            
-            with engine.begin() as conn:  # Use begin() for transaction management
-                for col_name, (pg_def, sqlite_def) in columns_to_add.items():
-                    if col_name not in columns:
-                        logger.info(f"🔄 Adding missing column: {col_name}")
-                        if db_type == "PostgreSQL":
-                            sql = f"ALTER TABLE bounties ADD COLUMN {col_name} {pg_def}"
-                        else:
-                            sql = f"ALTER TABLE bounties ADD COLUMN {col_name} {sqlite_def}"
-                        
-                        try:
-                            conn.execute(text(sql))
-                            logger.info(f"✅ Added column: {col_name}")
-                        except Exception as col_error:
-                            logger.warning(f"⚠️  Could not add column {col_name} (may already exist): {col_error}")
-                    else:
-                        logger.debug(f"⏭️  Column {col_name} already exists")
-        except Exception as migration_error:
-            logger.warning(f"⚠️  Migration check failed (columns may already exist): {migration_error}")
-        
         # CRITICAL: Warn if using SQLite on Railway (data won't persist)
         if (os.getenv("RAILWAY_ENVIRONMENT") or os.getenv("RAILWAY")) and settings.DATABASE_URL.startswith("sqlite"):
             logger.error("=" * 60)
@@ -104,10 +72,29 @@ async def lifespan(app: FastAPI):
     app.state.sandbox_manager = sandbox_manager
     logger.info("✅ Agent sandbox initialized")
     
+    # Start background arena workers (unless a separate worker fleet runs them)
+    if settings.ARENA_WORKERS_IN_API:
+        from app.services.arena_queue import ArenaWorkerPool
+        arena_worker_pool = ArenaWorkerPool(sandbox_manager=sandbox_manager)
+        await arena_worker_pool.start()
+        app.state.arena_worker_pool = arena_worker_pool
+        logger.info("✅ Arena worker pool started")
+        
+        # Submits batch-mode judge requests and re-queues their arenas when answered
+        from app.services.judge import JudgeService
+        from app.services.judge_batch import JudgeBatchScheduler
+        judge_batch_scheduler = JudgeBatchScheduler(judge=JudgeService(providers=sandbox_manager.providers))
+        await judge_batch_scheduler.start()
+        app.state.judge_batch_scheduler = judge_batch_scheduler
+    
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down AI Agent Bounty Arena...")
+    if hasattr(app.state, 'judge_batch_scheduler'):
+        await app.state.judge_batch_scheduler.stop()
+    if hasattr(app.state, 'arena_worker_pool'):
+        await app.state.arena_worker_pool.stop()
     if hasattr(app.state, 'sandbox_manager'):
         await app.state.sandbox_manager.cleanup()
 
@@ -305,7 +292,7 @@ async def health_check():
         if os.getenv("RAILWAY_ENVIRONMENT") and db_url.startswith("sqlite"):
             db_info["warning"] = "Using SQLite on Railway - data will be lost! Add PostgreSQL database."
             db_info["database"] = "SQLite (⚠️ NOT PERSISTENT)"
-        
+    
     except Exception as e:
         db_info["status"] = "error"
         db_info["database"] = f"Connection failed: {str(e)[:100]}"
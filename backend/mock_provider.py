@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Mock LLM provider for load testing
+
+Serves the parts of the OpenAI and Anthropic HTTP APIs the platform uses
+(chat completions and messages, with and without streaming, and the
+OpenAI and Anthropic batch APIs), with
+configurable latency distributions, output sizes, error rates, rate limits
+and 429 bursts. Point the provider settings at it to exercise the real client
+code paths offline:
+
+    python mock_provider.py --port 8900 --latency-ms 800 --latency-dist lognormal --rpm 600
+    
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8900
+    OPENAI_API_KEY=mock  ANTHROPIC_API_KEY=mock
+
+Judge prompts get a well-formed scores JSON back, so arenas complete end to
+end. GET /mock/stats reports request counts and latencies; POST /mock/config
+changes any setting while the server runs.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+import uuid
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+
+
+class MockConfig(BaseModel):
+    """Behaviour of the mock provider (every field can be changed at runtime)"""
+    latency_ms: float = 500.0  # Mean time to first token
+    latency_dist: str = "lognormal"  # constant | uniform | normal | lognormal | pareto
+    latency_sigma: float = 0.5  # Spread: stddev fraction (normal), sigma (lognormal), alpha (pareto)
+    tokens_per_second: float = 80.0  # Generation speed after the first token (0 = instant)
+    output_tokens: int = 200  # Mean completion length
+    output_tokens_jitter: float = 0.3  # Uniform +/- fraction around output_tokens
+    error_rate: float = 0.0  # Fraction of requests answered with HTTP 500
+    rpm: int = 0  # Requests per minute before 429s (0 = unlimited)
+    burst_every_seconds: float = 0.0  # Every N seconds...
+    burst_duration_seconds: float = 0.0  # ...answer everything with 429 for this long
+    retry_after_seconds: float = 1.0  # Retry-After sent with 429s
+    batch_seconds: float = 5.0  # Time until a submitted batch has finished
+    seed: Optional[int] = None
+
+
+config = MockConfig()
+rng = random.Random()
+started_at = time.monotonic()
+recent_requests: deque = deque()
+stats: Dict[str, Any] = {"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0, "streamed": 0, "batched": 0, "latencies_ms": deque(maxlen=10000)}
+files: Dict[str, str] = {}
+batches: Dict[str, Dict[str, Any]] = {}
+
+app = FastAPI(title="Mock LLM Provider")
+
+WORDS = (
+    "agent arena bounty lead score output task result market data analysis "
+    "customer growth pipeline revenue insight signal model quality plan"
+).split()
+
+
+def sample_latency() -> float:
+    """Seconds to first token, drawn from the configured distribution"""
+    mean = config.latency_ms / 1000
+    sigma = config.latency_sigma
+    if config.latency_dist == "constant":
+        value = mean
+    elif config.latency_dist == "uniform":
+        value = rng.uniform(mean * (1 - sigma), mean * (1 + sigma))
+    elif config.latency_dist == "normal":
+        value = rng.gauss(mean, mean * sigma)
+    elif config.latency_dist == "pareto":
+        # Heavy tail: alpha = 1 + 1/sigma, scaled to keep the mean
+        alpha = 1 + 1 / max(sigma, 1e-3)
+        value = mean * (alpha - 1) / alpha * rng.paretovariate(alpha)
+    else:
+        # Lognormal with the configured mean
+        value = rng.lognormvariate(math.log(max(mean, 1e-6)) - sigma ** 2 / 2, sigma)
+    return max(0.0, value)
+
+
+def sample_output_tokens() -> int:
+    jitter = config.output_tokens * config.output_tokens_jitter
+    return max(1, int(rng.uniform(config.output_tokens - jitter, config.output_tokens + jitter)))
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def generate_text(prompt: str, tokens: int) -> str:
+    """Completion text: judge-shaped JSON for judge prompts, filler words otherwise"""
+    agents = len(re.findall(r"^Agent \d+:", prompt, re.MULTILINE))
+    if "AGENT RESULTS" in prompt and agents:
+        scores = sorted(
+            ({"agent_id": i + 1, "score": round(rng.uniform(40, 100), 1), "feedback": "Mock evaluation"} for i in range(agents)),
+            key=lambda s: s["score"],
+            reverse=True
+        )
+        for rank, score in enumerate(scores, 1):
+            score["rank"] = rank
+        return json.dumps({"scores": scores, "winner_id": scores[0]["agent_id"], "overall_feedback": "Mock judge"})
+    return " ".join(rng.choice(WORDS) for _ in range(tokens))
+
+
+def split_tokens(text: str) -> List[str]:
+    """Stream chunks of roughly one token each"""
+    return [text[i:i + 4] for i in range(0, len(text), 4)] or [""]
+
+
+def check_limits() -> Optional[JSONResponse]:
+    """429 or 500 response for this request, if it should fail"""
+    now = time.monotonic()
+    stats["requests"] += 1
+    
+    if config.burst_every_seconds and config.burst_duration_seconds:
+        if (now - started_at) % config.burst_every_seconds < config.burst_duration_seconds:
+            return rate_limited()
+    
+    if config.rpm:
+        while recent_requests and now - recent_requests[0] > 60:
+            recent_requests.popleft()
+        if len(recent_requests) >= config.rpm:
+            return rate_limited()
+        recent_requests.append(now)
+    
+    if config.error_rate and rng.random() < config.error_rate:
+        stats["errors"] += 1
+        return JSONResponse(status_code=500, content={"error": {"type": "server_error", "message": "Mock failure"}})
+    return None
+
+
+def rate_limited() -> JSONResponse:
+    stats["rate_limited"] += 1
+    return JSONResponse(
+        status_code=429,
+        headers={"retry-after": str(config.retry_after_seconds)},
+        content={"error": {"type": "rate_limit_error", "message": "Mock rate limit"}}
+    )
+
+
+async def generate(prompt: str, stream: bool):
+    """Wait out the first-token latency; returns (text, chunks, seconds per chunk)"""
+    start = time.monotonic()
+    await asyncio.sleep(sample_latency())
+    text = generate_text(prompt, sample_output_tokens())
+    chunks = split_tokens(text)
+    per_chunk = 1 / config.tokens_per_second if config.tokens_per_second else 0.0
+    if not stream and per_chunk:
+        await asyncio.sleep(per_chunk * len(chunks))
+        stats["latencies_ms"].append((time.monotonic() - start) * 1000)
+    return text, chunks, per_chunk, start
+
+
+def sse(data: Dict[str, Any], event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def openai_chat_completions(request: Request):
+    body = await request.json()
+    failure = check_limits()
+    if failure:
+        return failure
+    
+    prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+    model = body.get("model", "mock-model")
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    created = int(time.time())
+    text, chunks, per_chunk, start = await generate(prompt, body.get("stream", False))
+    usage = {
+        "prompt_tokens": count_tokens(prompt),
+        "completion_tokens": len(chunks),
+        "total_tokens": count_tokens(prompt) + len(chunks)
+    }
+    stats["ok"] += 1
+    
+    if not body.get("stream"):
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage
+        }
+    
+    async def events():
+        stats["streamed"] += 1
+        base = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model}
+        yield sse({**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]})
+        for chunk in chunks:
+            await asyncio.sleep(per_chunk)
+            yield sse({**base, "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]})
+        yield sse({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage})
+        yield "data: [DONE]\n\n"
+        stats["latencies_ms"].append((time.monotonic() - start) * 1000)
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/v1/messages")
+async def anthropic_messages(request: Request):
+    body = await request.json()
+    failure = check_limits()
+    if failure:
+        return failure
+    
+    def content_text(content):
+        if isinstance(content, list):
+            return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+        return str(content)
+    
+    prompt = "\n".join(content_text(m.get("content", "")) for m in body.get("messages", []))
+    system = content_text(body.get("system", ""))
+    model = body.get("model", "mock-model")
+    message_id = f"msg_{uuid.uuid4().hex[:24]}"
+    input_tokens = count_tokens(system + prompt)
+    text, chunks, per_chunk, start = await generate(prompt, body.get("stream", False))
+    stats["ok"] += 1
+    
+    if not body.get("stream"):
+        return {
+            "id": message_id,
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": len(chunks)}
+        }
+    
+    async def events():
+        stats["streamed"] += 1
+        yield sse({"type": "message_start", "message": {
+            "id": message_id, "type": "message", "role": "assistant", "model": model, "content": [],
+            "stop_reason": None, "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": 0}
+        }}, "message_start")
+        yield sse({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}, "content_block_start")
+        for chunk in chunks:
+            await asyncio.sleep(per_chunk)
+            yield sse({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": chunk}}, "content_block_delta")
+        yield sse({"type": "content_block_stop", "index": 0}, "content_block_stop")
+        yield sse({"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                   "usage": {"output_tokens": len(chunks)}}, "message_delta")
+        yield sse({"type": "message_stop"}, "message_stop")
+        stats["latencies_ms"].append((time.monotonic() - start) * 1000)
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def batch_answer(prompt: str) -> Optional[str]:
+    """Completion text for one batched request, or None if it should fail"""
+    stats["batched"] += 1
+    if config.error_rate and rng.random() < config.error_rate:
+        stats["errors"] += 1
+        return None
+    return generate_text(prompt, sample_output_tokens())
+
+
+def batch_finished(batch: Dict[str, Any]) -> bool:
+    return time.monotonic() - batch["submitted"] >= config.batch_seconds
+
+
+@app.post("/v1/files")
+async def openai_upload_file(request: Request):
+    form = await request.form()
+    upload = form["file"]
+    file_id = f"file-{uuid.uuid4().hex[:24]}"
+    files[file_id] = (await upload.read()).decode()
+    return {"id": file_id, "object": "file", "purpose": form.get("purpose"), "filename": upload.filename}
+
+
+@app.get("/v1/files/{file_id}/content")
+async def openai_file_content(file_id: str):
+    if file_id not in files:
+        return JSONResponse(status_code=404, content={"error": {"message": "No such file"}})
+    return PlainTextResponse(files[file_id])
+
+
+@app.post("/v1/batches")
+async def openai_create_batch(request: Request):
+    body = await request.json()
+    if body.get("input_file_id") not in files:
+        return JSONResponse(status_code=400, content={"error": {"message": "No such input file"}})
+    batch_id = f"batch_{uuid.uuid4().hex[:24]}"
+    batches[batch_id] = {"submitted": time.monotonic(), "input_file_id": body["input_file_id"], "output_file_id": None}
+    return {"id": batch_id, "object": "batch", "status": "validating", "endpoint": body.get("endpoint")}
+
+
+@app.get("/v1/batches/{batch_id}")
+async def openai_get_batch(batch_id: str):
+    batch = batches.get(batch_id)
+    if batch is None:
+        return JSONResponse(status_code=404, content={"error": {"message": "No such batch"}})
+    if not batch_finished(batch):
+        return {"id": batch_id, "object": "batch", "status": "in_progress"}
+    
+    if batch["output_file_id"] is None:
+        lines = []
+        for line in files[batch["input_file_id"]].splitlines():
+            item = json.loads(line)
+            prompt = "\n".join(str(m.get("content", "")) for m in item["body"].get("messages", []))
+            text = batch_answer(prompt)
+            response = {"status_code": 500, "body": {"error": {"message": "Mock failure"}}} if text is None else {
+                "status_code": 200,
+                "body": {
+                    "object": "chat.completion",
+                    "model": item["body"].get("model"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": count_tokens(prompt), "completion_tokens": count_tokens(text)}
+                }
+            }
+            lines.append(json.dumps({"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": item["custom_id"], "response": response}))
+        batch["output_file_id"] = f"file-{uuid.uuid4().hex[:24]}"
+        files[batch["output_file_id"]] = "\n".join(lines)
+    return {"id": batch_id, "object": "batch", "status": "completed", "output_file_id": batch["output_file_id"]}
+
+
+@app.post("/v1/messages/batches")
+async def anthropic_create_batch(request: Request):
+    body = await request.json()
+    batch_id = f"msgbatch_{uuid.uuid4().hex[:24]}"
+    batches[batch_id] = {"submitted": time.monotonic(), "requests": body.get("requests", []), "results": None}
+    return {"id": batch_id, "type": "message_batch", "processing_status": "in_progress"}
+
+
+@app.get("/v1/messages/batches/{batch_id}")
+async def anthropic_get_batch(batch_id: str, request: Request):
+    batch = batches.get(batch_id)
+    if batch is None:
+        return JSONResponse(status_code=404, content={"error": {"type": "not_found_error", "message": "No such batch"}})
+    if not batch_finished(batch):
+        return {"id": batch_id, "type": "message_batch", "processing_status": "in_progress", "results_url": None}
+    return {
+        "id": batch_id,
+        "type": "message_batch",
+        "processing_status": "ended",
+        "results_url": f"{str(request.base_url).rstrip('/')}/v1/messages/batches/{batch_id}/results"
+    }
+
+
+@app.get("/v1/messages/batches/{batch_id}/results")
+async def anthropic_batch_results(batch_id: str):
+    batch = batches.get(batch_id)
+    if batch is None or not batch_finished(batch):
+        return JSONResponse(status_code=404, content={"error": {"type": "not_found_error", "message": "No results"}})
+    
+    if batch["results"] is None:
+        lines = []
+        for item in batch["requests"]:
+            params = item.get("params", {})
+            prompt = "\n".join(str(m.get("content", "")) for m in params.get("messages", []))
+            text = batch_answer(prompt)
+            result = {"type": "errored", "error": {"type": "api_error", "message": "Mock failure"}} if text is None else {
+                "type": "succeeded",
+                "message": {
+                    "id": f"msg_{uuid.uuid4().hex[:24]}",
+                    "type": "message",
+                    "role": "assistant",
+                    "model": params.get("model"),
+                    "content": [{"type": "text", "text": text}],
+                    "stop_reason": "end_turn",
+                    "usage": {"input_tokens": count_tokens(prompt), "output_tokens": count_tokens(text)}
+                }
+            }
+            lines.append(json.dumps({"custom_id": item["custom_id"], "result": result}))
+        batch["results"] = "\n".join(lines)
+    return PlainTextResponse(batch["results"])
+
+
+@app.get("/v1/models")
+async def list_models():
+    return {"object": "list", "data": [{"id": "mock-model", "object": "model", "owned_by": "mock"}]}
+
+
+@app.get("/mock/stats")
+async def get_stats():
+    latencies = sorted(stats["latencies_ms"])
+    
+    def pct(p):
+        return round(latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))], 1) if latencies else 0.0
+    
+    return {
+        **{key: value for key, value in stats.items() if key != "latencies_ms"},
+        "latency_ms": {"p50": pct(50), "p95": pct(95), "p99": pct(99), "max": pct(100)},
+        "config": config.model_dump()
+    }
+
+
+@app.post("/mock/config")
+async def update_config(changes: Dict[str, Any]):
+    global config
+    config = MockConfig(**{**config.model_dump(), **changes})
+    if "seed" in changes:
+        rng.seed(config.seed)
+    return config.model_dump()
+
+
+@app.post("/mock/reset")
+async def reset_stats():
+    recent_requests.clear()
+    stats.update({"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0, "streamed": 0, "batched": 0})
+    stats["latencies_ms"].clear()
+    return {"reset": True}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mock OpenAI/Anthropic provider for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    # One flag per MockConfig field, e.g. --latency-ms 800 --latency-dist pareto
+    for name, value in MockConfig().model_dump().items():
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            type=type(value) if value is not None else int,
+            default=value
+        )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    args = parse_args()
+    config = MockConfig(**{name: getattr(args, name) for name in MockConfig.model_fields})
+    rng.seed(config.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Recompute agent ratings from arena history
+
+Replays every completed arena in completion order through the RatingEngine
+and rewrites each agent's reputation_score, total_competitions, total_wins,
+total_losses, win_rate and average_score. Participations are streamed in one
+ordered pass (server-side cursor on PostgreSQL), so memory holds the per-agent
+stats and one arena's standings, not the history.
+
+Usage:
+    python recompute_ratings.py
+    python recompute_ratings.py --database-url postgresql://... --batch-size 10000 --dry-run
+"""
+
+import argparse
+import os
+import time
+from itertools import groupby
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Recompute agent ratings from historical arena results")
+    parser.add_argument("--database-url", default=None, help="Database to recompute (defaults to DATABASE_URL)")
+    parser.add_argument("--batch-size", type=int, default=5000,
+                        help="Rows fetched per round trip while streaming, and agents per bulk update")
+    parser.add_argument("--dry-run", action="store_true", help="Replay and report without writing")
+    return parser.parse_args()
+
+
+ARGS = parse_args() if __name__ == "__main__" else None
+if ARGS and ARGS.database_url:
+    os.environ["DATABASE_URL"] = ARGS.database_url
+
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.models.agent import Agent
+from app.models.arena import Arena, ArenaStatus, ArenaParticipation
+from app.services.ratings import RatingEngine
+
+
+def stream_standings(db, batch_size: int):
+    """(arena_id, winner_id, agent_id, rank, score) rows of completed arenas, arena by arena"""
+    return db.query(
+        ArenaParticipation.arena_id,
+        Arena.winner_id,
+        ArenaParticipation.agent_id,
+        ArenaParticipation.rank,
+        ArenaParticipation.score
+    ).join(
+        Arena, Arena.id == ArenaParticipation.arena_id
+    ).filter(
+        Arena.status == ArenaStatus.COMPLETED,
+        ArenaParticipation.rank.isnot(None)
+    ).order_by(
+        Arena.completed_at, Arena.id, ArenaParticipation.rank
+    ).execution_options(stream_results=True, yield_per=batch_size)
+
+
+def recompute(db, batch_size: int = 5000, dry_run: bool = False, engine: RatingEngine = None) -> dict:
+    """
+    Replay all arena results and rewrite every agent's rating columns
+
+    Agents without any completed arena are reset to the column defaults.
+    Everything is written in one transaction.
+    """
+    engine = engine or RatingEngine()
+    stats = {}
+    arenas = 0
+    participations = 0
+    start = time.perf_counter()
+
+    for (arena_id, winner_id), rows in groupby(stream_standings(db, batch_size), key=lambda row: row[:2]):
+        standings = [(row.agent_id, row.rank, row.score) for row in rows]
+        engine.update(stats, standings, winner_id)
+        arenas += 1
+        participations += len(standings)
+
+    if not dry_run:
+        db.execute(
+            update(Agent)
+            .values(
+                reputation_score=0.0, total_competitions=0, total_wins=0,
+                total_losses=0, win_rate=0.0, average_score=0.0
+            )
+            .execution_options(synchronize_session=False)
+        )
+        items = list(stats.items())
+        for offset in range(0, len(items), batch_size):
+            engine.write(db, items[offset:offset + batch_size])
+        db.commit()
+
+    top = sorted(stats.items(), key=lambda item: item[1]["rating"], reverse=True)[:5]
+    return {
+        "arenas": arenas,
+        "participations": participations,
+        "agents_rated": len(stats),
+        "seconds": round(time.perf_counter() - start, 2),
+        "dry_run": dry_run,
+        "top": [{"agent_id": agent_id, "rating": entry["rating"]} for agent_id, entry in top]
+    }
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        report = recompute(db, batch_size=ARGS.batch_size, dry_run=ARGS.dry_run)
+    finally:
+        db.close()
+    print(f"Replayed {report['arenas']} arenas ({report['participations']} participations) "
+          f"for {report['agents_rated']} agents in {report['seconds']}s"
+          + (" (dry run, nothing written)" if report["dry_run"] else ""))
+    for entry in report["top"]:
+        print(f"  agent {entry['agent_id']}: {entry['rating']}")
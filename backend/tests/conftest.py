@@ -0,0 +1,79 @@
+"""
+Shared fixtures: a throwaway SQLite database and no real provider calls
+"""
+
+import json
+import os
+import tempfile
+
+# Settings are read at import time, so configure the environment first
+_TMP = tempfile.mkdtemp(prefix="aiarena-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP}/test.db"
+os.environ["ENVIRONMENT"] = "test"
+os.environ["JUDGE_CACHE_ENABLED"] = "false"
+os.environ["PROVIDER_CACHE_ENABLED"] = "false"
+os.environ["BLOB_STORE_DIR"] = os.path.join(_TMP, "blobs")
+for _key in ("OPENAI_API_KEY", "ANTHROPIC_API_KEY", "GOOGLE_API_KEY", "GROK_API_KEY"):
+    os.environ.pop(_key, None)
+
+import pytest
+
+from app.database import Base, SessionLocal, engine
+from app.models import (
+    Agent, AgentProvider, AgentStatus, Arena, ArenaParticipation, Bounty, BountyStatus, User
+)
+
+
+Base.metadata.create_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    """A session on emptied tables"""
+    # SQLite does not enforce foreign keys by default, so table order does not matter
+    with engine.begin() as connection:
+        for table in Base.metadata.tables.values():
+            connection.execute(table.delete())
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_arena(db):
+    """Factory for an arena with n active agents entered, returning the arena id"""
+    counter = {"users": 0}
+    
+    def make(agents: int = 3, criteria: dict = None) -> int:
+        counter["users"] += 1
+        user = User(email=f"u{counter['users']}@example.com", username=f"u{counter['users']}", hashed_password="x")
+        db.add(user)
+        db.commit()
+        entered = [
+            Agent(
+                name=f"agent-{i}", config={}, provider=AgentProvider.OPENAI, provider_model="gpt-4",
+                builder_id=user.id, status=AgentStatus.ACTIVE
+            )
+            for i in range(agents)
+        ]
+        db.add_all(entered)
+        bounty = Bounty(
+            title="Leads", description="Generate leads", budget=100, platform_fee=15, agent_reward=80,
+            success_criteria=json.dumps(criteria or {"metric": "lead_count", "target": 10}),
+            poster_id=user.id, status=BountyStatus.IN_PROGRESS
+        )
+        db.add(bounty)
+        db.commit()
+        arena = Arena(name="arena", bounty_id=bounty.id)
+        db.add(arena)
+        db.commit()
+        db.add_all([
+            ArenaParticipation(arena_id=arena.id, agent_id=agent.id, agent_builder_id=user.id)
+            for agent in entered
+        ])
+        db.commit()
+        return arena.id
+    
+    return make
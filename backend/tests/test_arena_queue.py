@@ -0,0 +1,194 @@
+"""
+Arena job queue: leasing, heartbeats, retry limits and lease fencing
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import Arena, ArenaJob, ArenaJobStatus, ArenaStatus
+from app.services.arena_queue import ArenaJobQueue, ArenaWorkerPool
+from app.services.arena_runner import ArenaRunner, LeaseLostError
+from app.services.providers import ProviderGateway
+
+
+class StubSandbox:
+    """Sandbox manager that answers every execution with a lead list, without running code"""
+    
+    def __init__(self):
+        self.providers = ProviderGateway(cache=None)
+        self.calls = 0
+    
+    async def execute_agent(self, agent_config, task_description, timeout_seconds=None, criteria=None):
+        self.calls += 1
+        return {
+            "success": True,
+            "output": {"leads": [{"company": f"c{i}"} for i in range(self.calls)]},
+            "execution_time_seconds": 0.01,
+            "logs": []
+        }
+
+
+def _expire(db, job_id, attempts=None):
+    values = {"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}
+    if attempts is not None:
+        values["attempts"] = attempts
+    db.query(ArenaJob).filter(ArenaJob.id == job_id).update(values)
+    db.commit()
+
+
+def test_enqueue_returns_the_active_job(db, make_arena):
+    queue = ArenaJobQueue()
+    arena_id = make_arena()
+    
+    first = queue.enqueue(db, arena_id)
+    assert queue.enqueue(db, arena_id).id == first.id
+    assert db.query(ArenaJob).count() == 1
+
+
+def test_lease_claims_each_job_once(db, make_arena):
+    queue = ArenaJobQueue(lease_seconds=30)
+    jobs = [queue.enqueue(db, make_arena()).id for _ in range(2)]
+    
+    first = queue.lease(db, "w1")
+    second = queue.lease(db, "w2")
+    
+    assert [first.id, second.id] == jobs
+    assert first.status == ArenaJobStatus.RUNNING
+    assert first.lease_owner == "w1"
+    assert first.attempts == 1
+    assert queue.lease(db, "w3") is None
+
+
+def test_heartbeat_only_renews_the_owners_lease(db, make_arena):
+    queue = ArenaJobQueue(lease_seconds=30)
+    job_id = queue.enqueue(db, make_arena()).id
+    queue.lease(db, "w1")
+    
+    assert queue.heartbeat(db, job_id, "w1")
+    assert not queue.heartbeat(db, job_id, "w2")
+
+
+def test_fail_requeues_until_out_of_attempts(db, make_arena):
+    queue = ArenaJobQueue(max_attempts=2)
+    arena_id = make_arena()
+    job_id = queue.enqueue(db, arena_id).id
+    
+    queue.lease(db, "w1")
+    queue.fail(db, job_id, "w1", "boom")
+    job = db.get(ArenaJob, job_id)
+    assert job.status == ArenaJobStatus.QUEUED
+    
+    queue.lease(db, "w1")
+    queue.fail(db, job_id, "w1", "boom again")
+    db.expire_all()
+    job = db.get(ArenaJob, job_id)
+    assert job.status == ArenaJobStatus.FAILED
+    assert job.last_error == "boom again"
+    assert db.get(Arena, arena_id).status == ArenaStatus.CANCELLED
+
+
+def test_fail_ignores_a_worker_that_lost_the_lease(db, make_arena):
+    queue = ArenaJobQueue()
+    job_id = queue.enqueue(db, make_arena()).id
+    queue.lease(db, "w1")
+    
+    queue.fail(db, job_id, "w2", "not mine")
+    assert db.get(ArenaJob, job_id).status == ArenaJobStatus.RUNNING
+
+
+def test_requeue_expired_retries_jobs_with_attempts_left(db, make_arena):
+    queue = ArenaJobQueue(max_attempts=3)
+    job_id = queue.enqueue(db, make_arena()).id
+    queue.lease(db, "w1")
+    _expire(db, job_id)
+    
+    assert queue.requeue_expired(db) == 1
+    db.expire_all()
+    job = db.get(ArenaJob, job_id)
+    assert job.status == ArenaJobStatus.QUEUED
+    assert job.lease_owner is None
+
+
+def test_requeue_expired_fails_jobs_out_of_attempts(db, make_arena):
+    queue = ArenaJobQueue(max_attempts=2)
+    arena_id = make_arena()
+    job_id = queue.enqueue(db, arena_id).id
+    queue.lease(db, "w1")
+    _expire(db, job_id, attempts=2)
+    
+    assert queue.requeue_expired(db) == 0
+    db.expire_all()
+    assert db.get(ArenaJob, job_id).status == ArenaJobStatus.FAILED
+    assert db.get(Arena, arena_id).status == ArenaStatus.CANCELLED
+
+
+def test_requeue_expired_leaves_live_leases_alone(db, make_arena):
+    queue = ArenaJobQueue(lease_seconds=30)
+    job_id = queue.enqueue(db, make_arena()).id
+    queue.lease(db, "w1")
+    
+    assert queue.requeue_expired(db) == 0
+    assert db.get(ArenaJob, job_id).status == ArenaJobStatus.RUNNING
+
+
+def test_finalize_rolls_back_when_the_lease_is_lost(db, make_arena):
+    queue = ArenaJobQueue(lease_seconds=30)
+    arena_id = make_arena()
+    job_id = queue.enqueue(db, arena_id).id
+    queue.lease(db, "w1")
+    runner = ArenaRunner(sandbox_manager=StubSandbox())
+    
+    with pytest.raises(LeaseLostError):
+        asyncio.run(runner.run_arena(arena_id, db, fence=lambda session: queue.renew(session, job_id, "w2")))
+    db.expire_all()
+    arena = db.get(Arena, arena_id)
+    assert arena.status != ArenaStatus.COMPLETED
+    assert arena.winner_id is None
+    
+    # The owner resumes from the checkpoints and finalizes
+    asyncio.run(runner.run_arena(arena_id, db, fence=lambda session: queue.renew(session, job_id, "w1")))
+    db.expire_all()
+    arena = db.get(Arena, arena_id)
+    assert arena.status == ArenaStatus.COMPLETED
+    assert arena.winner_id is not None
+
+
+class _Queue(ArenaJobQueue):
+    """Queue whose heartbeats return a fixed answer or raise"""
+    
+    def __init__(self, answer, lease_seconds):
+        super().__init__(lease_seconds=lease_seconds)
+        self.answer = answer
+        self.heartbeats = 0
+    
+    def heartbeat(self, db, job_id, worker_id):
+        self.heartbeats += 1
+        if isinstance(self.answer, Exception):
+            raise self.answer
+        return self.answer
+
+
+def _run_heartbeats(queue):
+    pool = ArenaWorkerPool(worker_count=1, queue=queue, sandbox_manager=StubSandbox())
+    
+    async def main():
+        run = asyncio.create_task(asyncio.sleep(30))
+        await asyncio.wait_for(pool._heartbeat_loop(1, "w1", run), 5)
+        await asyncio.sleep(0)
+        return run.cancelled()
+    
+    return asyncio.run(main())
+
+
+def test_heartbeat_loop_cancels_the_run_when_the_lease_is_gone():
+    queue = _Queue(False, lease_seconds=0.3)
+    assert _run_heartbeats(queue)
+    assert queue.heartbeats == 1
+
+
+def test_heartbeat_loop_cancels_the_run_once_the_lease_would_have_expired():
+    queue = _Queue(RuntimeError("database down"), lease_seconds=0.3)
+    assert _run_heartbeats(queue)
+    assert queue.heartbeats >= 3
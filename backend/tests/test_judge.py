@@ -0,0 +1,97 @@
+"""
+LLM judge verdicts, with the judge models stubbed out
+"""
+
+import asyncio
+import json
+
+from app.services.judge import JudgeService
+
+CRITERIA = {"description": "Find qualified leads", "judge": "llm"}
+
+
+class StubJudge(JudgeService):
+    """Judge whose models answer from a script instead of a provider"""
+    
+    def __init__(self, answers):
+        super().__init__(cache=None)
+        self.answers = answers
+        self.asked = []
+    
+    def _candidates(self):
+        return [("openai", "gpt-4"), ("anthropic", "claude-3")]
+    
+    async def _complete(self, provider, model, prompt):
+        self.asked.append(model)
+        answer = self.answers[model]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer if isinstance(answer, str) else json.dumps(answer)
+
+
+def _results(n):
+    return [{"success": True, "output": f"lead list {i}", "execution_time_seconds": 1.0} for i in range(n)]
+
+
+def test_verdicts_without_ranks_are_ranked_by_score():
+    judge = StubJudge({"gpt-4": {"scores": [
+        {"agent_id": 1, "score": 40, "rank": None},
+        {"agent_id": 2, "score": 90},
+        {"agent_id": 3, "score": 70, "rank": "2"}
+    ], "overall_feedback": "ok"}})
+    
+    verdict = asyncio.run(judge.judge_arena(CRITERIA, _results(3)))
+    
+    assert [(s["agent_id"], s["rank"]) for s in verdict["scores"]] == [(2, 1), (3, 2), (1, 3)]
+    assert verdict["winner_id"] == 2
+    assert verdict["judge_model"] == "gpt-4"
+
+
+def test_agents_the_judge_left_out_rank_last():
+    judge = StubJudge({"gpt-4": {"scores": [
+        {"agent_id": 2, "score": 60, "rank": 1},
+        {"agent_id": 2, "score": 99, "rank": 1},
+        {"agent_id": 7, "score": 99, "rank": 1}
+    ]}})
+    
+    verdict = asyncio.run(judge.judge_arena(CRITERIA, _results(3)))
+    
+    assert [(s["agent_id"], s["rank"], s["score"]) for s in verdict["scores"]] == [
+        (2, 1, 60.0), (1, 2, 0.0), (3, 3, 0.0)
+    ]
+
+
+def test_a_failing_primary_falls_through_to_the_backup():
+    judge = StubJudge({
+        "gpt-4": RuntimeError("upstream 500"),
+        "claude-3": {"scores": [{"agent_id": 1, "score": 10, "rank": 2}, {"agent_id": 2, "score": 80, "rank": 1}]}
+    })
+    
+    verdict = asyncio.run(judge.judge_arena(CRITERIA, _results(2)))
+    
+    assert judge.asked == ["gpt-4", "claude-3"]
+    assert verdict["winner_id"] == 2
+    assert verdict["judge_model"] == "claude-3"
+
+
+def test_unusable_answers_fall_back_to_simple_scoring():
+    judge = StubJudge({"gpt-4": "no verdict today", "claude-3": {"scores": []}})
+    
+    verdict = asyncio.run(judge.judge_arena(CRITERIA, _results(2)))
+    
+    assert verdict.get("fallback")
+    assert sorted(s["rank"] for s in verdict["scores"]) == [1, 2]
+
+
+def test_objective_criteria_never_ask_a_model():
+    judge = StubJudge({})
+    results = [
+        {"success": True, "output": {"leads": [{"company": "a"}]}, "execution_time_seconds": 1.0},
+        {"success": True, "output": {"leads": [{"company": "a"}, {"company": "b"}]}, "execution_time_seconds": 1.0}
+    ]
+    
+    verdict = asyncio.run(judge.judge_arena({"metric": "lead_count"}, results))
+    
+    assert judge.asked == []
+    assert verdict["judge_model"] == "metrics"
+    assert verdict["winner_id"] == 2
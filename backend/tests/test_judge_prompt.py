@@ -0,0 +1,59 @@
+"""
+Judge prompt token budgeting
+"""
+
+from app.services.judge_prompt import JudgePromptBuilder, count_tokens
+
+CRITERIA = {"metric": "lead_count", "target": 10}
+
+
+def _result(chars):
+    return {"success": True, "output": "x" * chars, "execution_time_seconds": 1.0, "tokens_used": 0}
+
+
+def _builder(agent_tokens, agents):
+    """A builder with agent_tokens of output budget per agent, on top of the fixed parts"""
+    probe = JudgePromptBuilder(CRITERIA, 0)
+    return JudgePromptBuilder(CRITERIA, probe.fixed_tokens + agents * (probe.section_tokens + agent_tokens))
+
+
+def test_everything_fits_when_outputs_are_short():
+    builder = _builder(1000, 3)
+    results = [_result(400), _result(800), _result(1200)]
+    assert builder.allocate(results) == [builder.output_tokens(r) for r in results]
+
+
+def test_short_outputs_leave_their_share_to_long_ones():
+    builder = _builder(1000, 3)
+    results = [_result(400), _result(40000), _result(80000)]
+    
+    allocation = builder.allocate(results)
+    
+    assert allocation[0] == builder.output_tokens(results[0])
+    assert allocation[1] == allocation[2] == (3000 - allocation[0]) // 2
+    assert sum(allocation) <= builder.agent_budget - 3 * builder.section_tokens
+
+
+def test_long_outputs_split_the_budget_evenly():
+    builder = _builder(500, 4)
+    allocation = builder.allocate([_result(10000 * (i + 1)) for i in range(4)])
+    assert allocation == [500] * 4
+
+
+def test_allocation_is_never_negative():
+    builder = JudgePromptBuilder(CRITERIA, 10)
+    assert builder.allocate([_result(1000), _result(10)]) == [0, 0]
+
+
+def test_build_stays_within_the_budget():
+    builder = _builder(300, 5)
+    results = [_result(100), _result(50000), {"success": False, "output": None}] + [
+        {"success": True, "output": {"leads": [{"company": f"c{i}", "notes": "n" * 200} for i in range(200)]}}
+        for _ in range(2)
+    ]
+    
+    prompt = builder.build(results)
+    
+    assert count_tokens(prompt) <= builder.token_budget
+    assert "x" * 100 in prompt
+    assert prompt.count("Agent ") >= 5
@@ -0,0 +1,105 @@
+"""
+Objective metric scoring
+"""
+
+import numpy as np
+import pytest
+
+from app.services.metrics import _scale, evaluate_metrics, is_objective
+
+
+def _result(output, success=True, seconds=1.0):
+    return {"success": success, "output": output, "execution_time_seconds": seconds}
+
+
+def _leads(n):
+    return {"leads": [{"company": f"c{i}", "contact": f"p{i}@example.com"} for i in range(n)]}
+
+
+def test_scale_against_a_target_caps_at_100():
+    assert _scale(np.array([5.0, 10.0, 20.0]), 10.0, True) == pytest.approx([50, 100, 100])
+
+
+def test_scale_without_a_target_uses_the_best_participant():
+    assert _scale(np.array([2.0, 8.0, np.nan]), None, True) == pytest.approx([25, 100, 0])
+    assert _scale(np.array([2.0, 8.0]), None, False) == pytest.approx([100, 25])
+
+
+def test_scale_lower_is_better_against_a_zero_target():
+    assert _scale(np.array([0.0, 0.25, 1.0]), 0.0, False) == pytest.approx([100, 75, 0])
+
+
+def test_scale_of_unmeasurable_values_is_zero():
+    assert _scale(np.array([np.nan, np.nan]), None, True) == pytest.approx([0, 0])
+
+
+def test_lead_count_ranks_by_leads_then_speed():
+    judged = evaluate_metrics(
+        {"metric": "lead_count", "target": 10},
+        [_result(_leads(5), seconds=2.0), _result(_leads(10)), _result(_leads(5), seconds=1.0)]
+    )
+    assert judged["winner_id"] == 2
+    assert [(s["agent_id"], s["rank"], s["score"]) for s in judged["scores"]] == [
+        (2, 1, 100.0), (3, 2, 50.0), (1, 3, 50.0)
+    ]
+    assert judged["metrics"]["lead_count"] == [5.0, 10.0, 5.0]
+    assert judged["judge_model"] == "metrics"
+
+
+def test_failed_executions_score_zero():
+    judged = evaluate_metrics(
+        {"metric": "lead_count", "target": 10},
+        [_result(_leads(10), success=False), _result(_leads(2))]
+    )
+    failed = next(s for s in judged["scores"] if s["agent_id"] == 1)
+    assert failed["score"] == 0.0
+    assert failed["feedback"].startswith("Execution failed")
+    assert judged["winner_id"] == 2
+
+
+def test_weighted_metrics_average_their_scores():
+    criteria = {"metrics": [
+        {"metric": "lead_count", "target": 10, "weight": 3},
+        {"metric": "duplicate_rate", "target": 0.0}
+    ]}
+    judged = evaluate_metrics(criteria, [_result(_leads(5))])
+    # lead_count 50 (weight 3) and no duplicates 100 (weight 1)
+    assert judged["scores"][0]["score"] == pytest.approx(62.5)
+
+
+def test_unregistered_metrics_are_left_to_the_llm_judge():
+    outputs = [_result({"conversion_rate": 0.9}), _result({"conversion_rate": 0.1})]
+    assert evaluate_metrics({"metric": "conversion_rate"}, outputs) is None
+    assert evaluate_metrics({"metric": "conversion_rate", "self_reported": "yes"}, outputs) is None
+
+
+def test_self_reported_metrics_need_an_explicit_opt_in():
+    outputs = [_result({"conversion_rate": 0.1}), _result({"conversion_rate": 0.4})]
+    judged = evaluate_metrics({"metric": "conversion_rate", "self_reported": True}, outputs)
+    assert judged["winner_id"] == 2
+    assert judged["scores"][1]["score"] == pytest.approx(25.0)
+
+
+def test_unmeasurable_outputs_are_left_to_the_llm_judge():
+    assert evaluate_metrics({"metric": "lead_count"}, [_result("no leads here"), _result(None)]) is None
+
+
+def test_non_objective_criteria_return_none():
+    results = [_result(_leads(3))]
+    assert evaluate_metrics({"metric": "lead_count", "judge": "llm"}, results) is None
+    assert evaluate_metrics({"description": "find good leads"}, results) is None
+    assert evaluate_metrics({"metric": "lead_count"}, []) is None
+
+
+@pytest.mark.parametrize("criteria, objective", [
+    ({"metric": "lead_count"}, True),
+    ({"metrics": [{"metric": "lead_count"}, {"metric": "email_validity"}]}, True),
+    ({"metric": "conversion_rate", "self_reported": True}, True),
+    ({"metric": "conversion_rate"}, False),
+    ({"metrics": [{"metric": "lead_count"}, {"metric": "conversion_rate"}]}, False),
+    ({"metric": "lead_count", "judge": "llm"}, False),
+    ({"metrics": []}, False),
+    ("lead_count", False),
+])
+def test_is_objective(criteria, objective):
+    assert is_objective(criteria) is objective
@@ -0,0 +1,93 @@
+"""
+Multi-player Elo ratings and competition stats
+"""
+
+import numpy as np
+import pytest
+
+from app.models import Agent
+from app.services.ratings import RatingEngine, rate
+
+
+def _rate(ratings, games, ranks, k_factor=32.0, provisional_games=0):
+    return rate(np.array(ratings, dtype=np.float64), np.array(games), np.array(ranks), k_factor, provisional_games)
+
+
+def test_two_equal_players_move_half_the_k_factor():
+    assert _rate([1500, 1500], [5, 5], [1, 2]) == pytest.approx([1516, 1484])
+
+
+def test_equal_field_is_zero_sum():
+    new = _rate([1500, 1500, 1500, 1500], [5] * 4, [1, 2, 3, 4])
+    assert new.sum() == pytest.approx(6000)
+    assert list(new) == sorted(new, reverse=True)
+    assert new[1] - 1500 == pytest.approx(32 * (2 / 3 - 0.5))
+
+
+def test_ties_between_equals_change_nothing():
+    assert _rate([1500, 1500, 1500], [5] * 3, [1, 1, 1]) == pytest.approx([1500] * 3)
+
+
+def test_tied_players_score_half_a_win_against_each_other():
+    new = _rate([1500, 1500, 1500], [5] * 3, [1, 1, 3])
+    assert new[0] == pytest.approx(new[1])
+    assert new[0] - 1500 == pytest.approx(32 * (0.75 - 0.5))
+
+
+def test_a_lone_participant_keeps_its_rating():
+    assert _rate([1612.5], [3], [1]) == pytest.approx([1612.5])
+
+
+def test_an_upset_moves_ratings_further():
+    favourite_wins = _rate([1700, 1300], [5, 5], [1, 2])
+    underdog_wins = _rate([1700, 1300], [5, 5], [2, 1])
+    assert favourite_wins[0] - 1700 < 1700 - underdog_wins[0]
+    assert underdog_wins[1] - 1300 > 16
+
+
+def test_provisional_agents_move_twice_as_fast():
+    new = _rate([1500, 1500], [0, 10], [1, 2], provisional_games=5)
+    assert new[0] - 1500 == pytest.approx(32)
+    assert new[1] - 1500 == pytest.approx(-16)
+
+
+def test_update_counts_a_repeated_agent_once_at_its_best_rank():
+    engine = RatingEngine(initial=1500, k_factor=32, provisional_games=0)
+    stats = {}
+    
+    updated = engine.update(stats, [(1, 3, 40.0), (2, 2, 60.0), (1, 1, 90.0)], winner_agent_id=1)
+    
+    assert sorted(updated) == [1, 2]
+    assert stats[1] == {"rating": 1516.0, "competitions": 1, "wins": 1, "average_score": 90.0}
+    assert stats[2] == {"rating": 1484.0, "competitions": 1, "wins": 0, "average_score": 60.0}
+
+
+def test_update_keeps_a_running_average_score():
+    engine = RatingEngine(initial=1500, k_factor=32, provisional_games=0)
+    stats = {}
+    for score in (80.0, 40.0, 60.0):
+        engine.update(stats, [(1, 1, score), (2, 2, 0.0)])
+    assert stats[1]["competitions"] == 3
+    assert stats[1]["average_score"] == pytest.approx(60.0)
+    assert stats[1]["wins"] == 0
+
+
+def test_update_without_standings_does_nothing():
+    stats = {}
+    assert RatingEngine().update(stats, []) == []
+    assert stats == {}
+
+
+def test_apply_arena_writes_ratings_back(db, make_arena):
+    make_arena(agents=2)
+    first, second = [agent.id for agent in db.query(Agent).order_by(Agent.id)]
+    engine = RatingEngine(initial=1500, k_factor=32, provisional_games=0)
+    
+    assert engine.apply_arena(db, [(first, 1, 75.0), (second, 2, 25.0)], winner_agent_id=first) == 2
+    db.commit()
+    db.expire_all()
+    
+    winner, loser = db.get(Agent, first), db.get(Agent, second)
+    assert (winner.reputation_score, winner.total_competitions, winner.total_wins) == (1516.0, 1, 1)
+    assert (loser.reputation_score, loser.total_competitions, loser.total_wins) == (1484.0, 1, 0)
+    assert winner.average_score == pytest.approx(75.0)